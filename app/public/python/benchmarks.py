@@ -0,0 +1,709 @@
+#  _*_ coding:utf-8 _*_
+"""
+性能基准脚本：对比优化前后实现的耗时，并校验结果一致
+用法：
+    python benchmarks.py metadata [--files a.xml b.xml ...] [--repeat 5]
+    python benchmarks.py diff [--pair a.xml b.xml] [--nodes 20000] [--skip-xmldiff]
+    python benchmarks.py fuzzy [--sizes 1000 10000 100000] [--brute-limit 500] [--min-score 0.85]
+    python benchmarks.py mapping-db [--files 20000] [--guids-per-file 100]
+    python benchmarks.py guid-table [--guids 1000000] [--files 100000] [--matches-per-file 20] [--workers 4]
+    python benchmarks.py automaton [--guids 100000] [--files 200] [--items 2000] [--naive-samples 200]
+    python benchmarks.py worker [--rows 50000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+import compare_xml_by_folder2 as folder_diff
+import fuzzy_index
+import guid_automaton
+import guid_mapping_db
+from guid_match_table import GuidMatchTable
+import main as xml_main
+
+
+# -------------------------- 基准用的原始实现 --------------------------
+def legacy_extract_xml_metadata(root):
+    """优化前的extract_xml_metadata：递归遍历全树，每个值逐字段逐关键字比较"""
+    metadata = {
+        "physical_port": None,
+        "message_name": None,
+        "dp_name": None,
+        "full_name": None
+    }
+    keyword_mapping = xml_main.KEYWORD_MAPPING
+
+    def traverse_nodes(node):
+        for attr_name, attr_value in node.attrib.items():
+            attr_name_lower = attr_name.lower()
+            attr_value_lower = str(attr_value).lower()
+            for field, keywords in keyword_mapping.items():
+                if metadata[field] is not None:
+                    continue
+                for kw in keywords:
+                    if kw in attr_name_lower or kw in attr_value_lower:
+                        metadata[field] = attr_value
+                        break
+        node_text = str(node.text).strip() if node.text else ""
+        if node_text:
+            for field, keywords in keyword_mapping.items():
+                if metadata[field] is not None:
+                    continue
+                for kw in keywords:
+                    if kw in node_text.lower():
+                        metadata[field] = node_text
+                        break
+        for child in node:
+            traverse_nodes(child)
+
+    traverse_nodes(root)
+    return metadata
+
+
+def legacy_flatten_xml(root, parent_path=""):
+    """优化前的flatten_xml：递归展平，每层extend子列表"""
+    nodes = []
+    tag_count = {}
+    for child in root:
+        tag_count[child.tag] = tag_count.get(child.tag, 0) + 1
+        index = tag_count[child.tag]
+        current_path = f"{parent_path}/{child.tag}[{index}]" if parent_path else f"{child.tag}[{index}]"
+        nodes.append((current_path, dict(sorted(child.attrib.items())), (child.text or "").strip()))
+        nodes.extend(legacy_flatten_xml(child, current_path))
+    return nodes
+
+
+def legacy_compare_nodes_detail(nodes_a, nodes_b, file_a_name, file_b_name):
+    """优化前的compare_nodes_detail：两边都建字典，对全部路径排序后逐个比较属性"""
+    diffs = []
+    dict_a = {n[0]: (n[1], n[2]) for n in nodes_a}
+    dict_b = {n[0]: (n[1], n[2]) for n in nodes_b}
+    for path in sorted(set(dict_a.keys()) | set(dict_b.keys())):
+        attrs_a, text_a = dict_a.get(path, ({}, ""))
+        attrs_b, text_b = dict_b.get(path, ({}, ""))
+        if path not in dict_a:
+            diffs.append([file_a_name, path, "节点新增", file_a_name, "", file_b_name, "新增节点"])
+            continue
+        elif path not in dict_b:
+            diffs.append([file_a_name, path, "节点删除", file_a_name, "存在", file_b_name, "已删除"])
+            continue
+        for key in sorted(set(attrs_a.keys()) | set(attrs_b.keys())):
+            val_a = attrs_a.get(key)
+            val_b = attrs_b.get(key)
+            if val_a != val_b:
+                diffs.append([file_a_name, f"{path}/@{key}", "属性差异", file_a_name, val_a, file_b_name, val_b])
+        if text_a != text_b:
+            diffs.append([file_a_name, path, "文本差异", file_a_name, text_a, file_b_name, text_b])
+    return diffs
+
+
+def legacy_compare_xml(file_a, file_b):
+    root_a = ET.parse(file_a).getroot()
+    root_b = ET.parse(file_b).getroot()
+    return legacy_compare_nodes_detail(
+        legacy_flatten_xml(root_a), legacy_flatten_xml(root_b),
+        os.path.basename(file_a), os.path.basename(file_b)
+    )
+
+
+def legacy_build_guid_info(guids, metadata):
+    """GuidMatchTable之前的guid_info：每个GUID一个字典，匹配文件名逐条追加（含重复）"""
+    guid_info = {}
+    fields = list(metadata)
+    for i, guid in enumerate(guids):
+        guid_info[guid] = {
+            "metadata": {field: metadata[field][i] for field in fields},
+            "indices": [i],
+            "xml_files": []
+        }
+    return guid_info
+
+
+def legacy_file_lists(guid_info):
+    return {
+        guid: list(dict.fromkeys(info["xml_files"]))
+        for guid, info in guid_info.items() if info["xml_files"]
+    }
+
+
+# 规范化之前的xml_guid_mapping.db结构：映射表每行保存完整文件路径和节点路径，没有唯一约束
+LEGACY_MAPPING_DDL = (
+    '''
+    CREATE TABLE guid_xml_mapping (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        guid TEXT NOT NULL,
+        xml_file_path TEXT NOT NULL,
+        match_node_path TEXT NOT NULL,
+        match_attribute TEXT NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE xml_metadata (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        xml_file_path TEXT NOT NULL UNIQUE,
+        xml_file_name TEXT NOT NULL,
+        physical_port TEXT,
+        message_name TEXT,
+        dp_name TEXT,
+        full_name TEXT,
+        parse_time TIMESTAMP NOT NULL,
+        file_size INTEGER,
+        file_mtime_ns INTEGER,
+        content_hash TEXT
+    )
+    ''',
+    '''
+    CREATE TABLE excel_metadata (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        guid TEXT NOT NULL UNIQUE,
+        physical_port TEXT,
+        message_name TEXT,
+        dp_name TEXT,
+        full_name TEXT,
+        source_row INTEGER
+    )
+    ''',
+    "CREATE INDEX idx_guid ON guid_xml_mapping(guid)",
+    "CREATE INDEX idx_xml_path ON guid_xml_mapping(xml_file_path)",
+    "CREATE INDEX idx_xml_name ON xml_metadata(xml_file_name)",
+    "CREATE INDEX idx_excel_guid ON excel_metadata(guid)",
+)
+
+
+# -------------------------- 工具函数 --------------------------
+def write_deep_sample(path, depth=200, breadth=2000):
+    """生成一个深层XML：外层depth层嵌套，内层breadth个无关键字节点，关键字分布在文件不同位置"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<Root>")
+        for level in range(depth):
+            f.write(f'<Level{level} id="L{level}" kind="group">')
+        f.write('<Header PhysicalPort="PORT_A" msgName="MSG_A">')
+        for i in range(breadth):
+            f.write(f'<Item id="{i}" kind="value" unit="m/s">value {i}</Item>')
+        f.write('<Signal DP_Name="DP_A" FullName="FULL_A"/></Header>')
+        for i in range(breadth):
+            f.write(f'<Item id="t{i}" kind="value" unit="m/s">value {i}</Item>')
+        for level in reversed(range(depth)):
+            f.write(f"</Level{level}>")
+        f.write("</Root>")
+
+
+def write_diff_sample(path_a, path_b, nodes=20000):
+    """生成一对基线XML：B相对A改了约1%的属性、0.5%的文本，并删掉/新增少量末尾节点（不打乱同级编号）"""
+    def write(path, variant):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("<Root>")
+            for i in range(nodes // 4):
+                guid = f"{i:08x}-0000-4000-8000-{i:012x}"
+                rate = "20" if variant == "b" and i % 100 == 0 else "10"
+                f.write(f'<Message Guid="{guid}" Name="MSG_{i}" Rate="{rate}">')
+                text = "changed" if variant == "b" and i % 200 == 0 else f"value {i}"
+                f.write(f'<Signal Name="SIG_{i}_A" Unit="m/s">{text}</Signal>')
+                if not (variant == "b" and i % 397 == 0):  # B中删除的信号
+                    f.write(f'<Signal Name="SIG_{i}_B" Unit="deg">value {i}</Signal>')
+                if variant == "b" and i % 503 == 0:
+                    f.write(f'<Signal Name="SIG_{i}_NEW" Unit="m">new</Signal>')
+                f.write("</Message>")
+            f.write("</Root>")
+
+    write(path_a, "a")
+    write(path_b, "b")
+
+
+def make_icd_names(count, seed=0):
+    """生成ICD风格的消息名及其变体（大小写/分隔符/后缀/个别字符不同），返回 (源名称, 目标名称)"""
+    rng = random.Random(seed)
+    systems = ["FCS", "NAV", "ENG", "HYD", "ELEC", "FUEL", "CABIN", "DISP", "COMM", "BRAKE"]
+    words = ["STATUS", "CMD", "DATA", "FAULT", "MODE", "TEMP", "PRESS", "POS", "RATE", "VALID", "REQ", "ACK"]
+    sources = []
+    targets = []
+    for i in range(count):
+        name = f"{rng.choice(systems)}_{rng.choice(words)}_{rng.choice(words)}_{i}"
+        sources.append(name)
+        variant = rng.random()
+        if variant < 0.3:
+            targets.append(name)
+        elif variant < 0.5:
+            targets.append(name.lower().replace("_", " "))
+        elif variant < 0.65:
+            targets.append(f"{name}_V2")
+        elif variant < 0.8:
+            targets.append(name[:-1] + "X")
+        else:
+            targets.append(f"{rng.choice(systems)}_{rng.choice(words)}_{rng.randint(0, count * 10)}")
+    rng.shuffle(targets)
+    return sources, targets
+
+
+def brute_force_best(index, name):
+    """朴素两两比较：与全部目标名称计算Dice系数"""
+    key = index.normalizer(name)
+    grams = fuzzy_index.trigrams(key)
+    best = (None, 0.0)
+    for target_name, target_grams in zip(index.names, index.grams):
+        score = fuzzy_index.dice(grams, target_grams)
+        if score > best[1]:
+            best = (target_name, score)
+    return best
+
+
+def bench_fuzzy(args):
+    normalizer = fuzzy_index.build_normalizer(fuzzy_index.NORMALIZE_RULES)
+    print(f"最低相似度：{args.min_score}（一致率只统计两两比较最佳分不低于它的名称）")
+    print(f"{'名称数':>10}{'建索引(s)':>12}{'查询(s)':>10}{'每名称(μs)':>12}{'平均候选':>10}{'两两比较(s)':>14}{'最佳分一致':>12}")
+    for size in args.sizes:
+        sources, targets = make_icd_names(size)
+        start = time.perf_counter()
+        index = fuzzy_index.TrigramIndex(targets, normalizer, args.min_score)
+        build_time = time.perf_counter() - start
+        start = time.perf_counter()
+        results = [index.best_match(name) for name in sources]
+        query_time = time.perf_counter() - start
+
+        # 两两比较只对前brute_limit个源名称实测，按比例外推全量耗时
+        sample = sources[:min(size, args.brute_limit)]
+        start = time.perf_counter()
+        brute = [brute_force_best(index, name) for name in sample]
+        brute_time = (time.perf_counter() - start) * size / len(sample)
+        matched = [(b, r) for b, r in zip(brute, results) if b[1] >= args.min_score]
+        agree = sum(abs(b[1] - r[1]) < 1e-9 for b, r in matched) / max(len(matched), 1)
+        estimated = "" if len(sample) == size else "≈"
+        print(f"{size:>10}{build_time:>12.2f}{query_time:>10.2f}{query_time / size * 1e6:>12.1f}"
+              f"{index.candidates_scanned / size:>10.0f}{estimated + f'{brute_time:.1f}':>14}{agree:>12.1%}")
+
+
+def write_legacy_mapping_db(path, files=20000, guids_per_file=100, seed=0):
+    """按旧结构生成映射库：GUID池为文件数×2，每个文件引用guids_per_file个GUID，节点路径来自几十种ICD结构"""
+    rng = random.Random(seed)
+    guid_pool = [f"{rng.getrandbits(128):032x}" for _ in range(files * 2)]
+    guid_pool = [f"{g[:8]}-{g[8:12]}-{g[12:16]}-{g[16:20]}-{g[20:]}" for g in guid_pool]
+    node_paths = [
+        f"ICD/Equipment/Port{p}/Message/Signals/Signal{'/Parameter' * depth}"
+        for p in range(20) for depth in range(3)
+    ]
+    attributes = ["ref", "Guid", "SignalRef"]
+    root = r"D:\01_PROJECT\OHMS\CXF ICD CXF AS2.0_CFG1.3"
+
+    conn = sqlite3.connect(path)
+    for ddl in LEGACY_MAPPING_DDL:
+        conn.execute(ddl)
+    for file_index in range(files):
+        xml_file_name = f"Equipment_{file_index:06d}_A664_CFG.xml"
+        xml_file_path = f"{root}\\System{file_index % 40:02d}\\{xml_file_name}"
+        conn.execute(
+            "INSERT INTO xml_metadata (xml_file_path, xml_file_name, physical_port, message_name, parse_time) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (xml_file_path, xml_file_name, f"P{file_index % 200}", f"MSG_{file_index}", "2025-01-01 00:00:00")
+        )
+        conn.executemany(
+            "INSERT INTO guid_xml_mapping (guid, xml_file_path, match_node_path, match_attribute) VALUES (?, ?, ?, ?)",
+            [(rng.choice(guid_pool), xml_file_path, rng.choice(node_paths), rng.choice(attributes))
+             for _ in range(guids_per_file)]
+        )
+    conn.commit()
+    conn.close()
+
+
+def bench_guid(index):
+    return f"{index:08x}-{index % 65536:04x}-4{index % 4096:03x}-8000-{index * 2654435761 % 2 ** 48:012x}"
+
+
+def file_match_stream(start, stop, guids, matches_per_file):
+    """按文件序号确定地生成 (文件名, 匹配到的GUID列表)；约5%为同一文件内的重复匹配"""
+    for file_index in range(start, stop):
+        rng = random.Random(file_index)
+        picked = [bench_guid(rng.randrange(guids)) for _ in range(matches_per_file)]
+        picked.extend(picked[:matches_per_file // 20])
+        yield f"Equipment_{file_index:06d}_A664_CFG.xml", picked
+
+
+def _guid_table_worker(task):
+    start, stop, guids, matches_per_file = task
+    table = GuidMatchTable()
+    for xml_file_name, matched in file_match_stream(start, stop, guids, matches_per_file):
+        table.add_file_matches(xml_file_name, matched)
+    return table
+
+
+def traced(func, *args):
+    """返回 (结果, 耗时秒, 结果常驻的Python内存MB, 峰值MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        current, peak = tracemalloc.get_traced_memory()
+        return result, elapsed, current / 1024 / 1024, peak / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def bench_guid_table(args):
+    guids = [bench_guid(i) for i in range(args.guids)]
+    fields = ("physical_port", "message_name", "dp_name", "full_name")
+    metadata = {field: [f"{field}_{i % 5000}" for i in range(args.guids)] for field in fields}
+
+    def build_legacy():
+        guid_info = legacy_build_guid_info(guids, metadata)
+        for xml_file_name, matched in file_match_stream(0, args.files, args.guids, args.matches_per_file):
+            for guid in matched:
+                guid_info[guid]["xml_files"].append(xml_file_name)
+        return guid_info
+
+    def build_table():
+        table = GuidMatchTable(guids, metadata, range(args.guids))
+        for xml_file_name, matched in file_match_stream(0, args.files, args.guids, args.matches_per_file):
+            table.add_file_matches(xml_file_name, matched)
+        return table
+
+    print(f"{args.guids}个GUID × {args.files}个文件，每个文件{args.matches_per_file}个匹配")
+    print(f"{'实现':<20}{'累积(s)':>10}{'常驻(MB)':>12}{'峰值(MB)':>12}{'汇总(s)':>10}")
+    legacy, legacy_time, legacy_mb, legacy_peak = traced(build_legacy)
+    start = time.perf_counter()
+    expected = legacy_file_lists(legacy)
+    legacy_final = time.perf_counter() - start
+    print(f"{'dict-of-dicts':<20}{legacy_time:>10.2f}{legacy_mb:>12.1f}{legacy_peak:>12.1f}{legacy_final:>10.2f}")
+    del legacy
+
+    table, table_time, table_mb, table_peak = traced(build_table)
+    start = time.perf_counter()
+    actual = table.file_lists()
+    table_final = time.perf_counter() - start
+    print(f"{'GuidMatchTable':<20}{table_time:>10.2f}{table_mb:>12.1f}{table_peak:>12.1f}{table_final:>10.2f}")
+    print(f"结果一致：{actual == expected}，内存为原来的{table_mb / max(legacy_mb, 1e-9):.1%}")
+
+    # 各进程分别累积一段文件，主进程按文件顺序合并
+    step = -(-args.files // args.workers)
+    tasks = [(start, min(start + step, args.files), args.guids, args.matches_per_file)
+             for start in range(0, args.files, step)]
+    start = time.perf_counter()
+    merged = GuidMatchTable(guids, metadata, range(args.guids))
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for part in executor.map(_guid_table_worker, tasks):
+            merged.merge(part)
+    print(f"{args.workers}进程累积后合并：{time.perf_counter() - start:.2f}秒，结果一致：{merged.file_lists() == expected}")
+
+
+def write_embedded_guid_samples(folder, files, items, guids, seed=0):
+    """生成XML样例：约1/3的GUID是整个属性值，其余内嵌在复合属性值、花括号、前缀和节点文本中，另有不在Excel中的GUID"""
+    rng = random.Random(seed)
+    paths = []
+    for file_index in range(files):
+        path = os.path.join(folder, f"Equipment_{file_index:04d}.xml")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f'<Root PhysicalPort="PORT_{file_index}">')
+            for i in range(items):
+                a, b, c = (bench_guid(rng.randrange(guids * 2)) for _ in range(3))  # 约一半不在GUID集合中
+                kind = i % 3
+                if kind == 0:
+                    f.write(f'<Message Guid="{a}" Name="MSG_{i}"><Signal Unit="m/s">value {i}</Signal></Message>')
+                elif kind == 1:
+                    f.write(f'<Message ref="{a};{b}" Id="{{{c}}}"><Signal Unit="deg">value {i}</Signal></Message>')
+                else:
+                    f.write(f'<Message Name="MSG_{i}"><Desc>源：ID_{a}，见{b}</Desc>tail {c}</Message>')
+            f.write("</Root>")
+        paths.append(path)
+    return paths
+
+
+def collect_strings(path):
+    root = ET.parse(path).getroot()
+    strings = []
+    for node in root.iter():
+        strings.extend(node.attrib.values())
+        strings.extend(text for text in (node.text, node.tail) if text)
+    return strings
+
+
+def bench_automaton(args):
+    guids = [bench_guid(i) for i in range(args.guids)]
+    guid_keys = frozenset(guids)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = write_embedded_guid_samples(tmp_dir, args.files, args.items, args.guids)
+        total_mb = sum(os.path.getsize(path) for path in paths) / 1024 / 1024
+        print(f"{args.guids}个GUID，{args.files}个XML共{total_mb:.1f}MB（每个{args.items}个节点组）")
+        options = dict(xml_main.DEFAULT_MATCH_OPTIONS, prefilter=False, stream_threshold=None)
+
+        def run(automaton):
+            matches = 0
+            start = time.perf_counter()
+            for path in paths:
+                result = xml_main.match_xml_file(path, guid_keys, options, automaton=automaton)
+                matches += len(result["matches"])
+            return time.perf_counter() - start, matches
+
+        print(f"{'模式':<28}{'建自动机(s)':>12}{'匹配(s)':>10}{'MB/s':>10}{'匹配行':>10}")
+        seconds, matches = run(None)
+        print(f"{'整值匹配（原路径）':<28}{'-':>12}{seconds:>10.2f}{total_mb / seconds:>10.1f}{matches:>10}")
+        exact_seconds = seconds
+        found = {}
+        backends = [name for name in guid_automaton.BACKENDS
+                    if name != "pyahocorasick" or guid_automaton.HAS_PYAHOCORASICK]
+        for backend in backends:
+            start = time.perf_counter()
+            automaton = guid_automaton.GuidAutomaton(guids, backend=backend)
+            build_seconds = time.perf_counter() - start
+            seconds, matches = run(automaton)
+            found[backend] = matches
+            print(f"{'子串匹配/' + backend:<28}{build_seconds:>12.2f}{seconds:>10.2f}{total_mb / seconds:>10.1f}"
+                  f"{matches:>10}   相对整值×{seconds / exact_seconds:.2f}")
+        print(f"各实现匹配行数一致：{len(set(found.values())) == 1}")
+
+        # 朴素做法：每个字符串逐个检查全部GUID，只抽样估算
+        strings = collect_strings(paths[0])[:args.naive_samples]
+        per_file = len(collect_strings(paths[0]))
+        start = time.perf_counter()
+        for text in strings:
+            [guid for guid in guids if guid in text]
+        per_string = (time.perf_counter() - start) / max(len(strings), 1)
+        print(f"朴素逐GUID子串检查：每个字符串{per_string * 1000:.1f}ms，"
+              f"全部{per_file * args.files}个字符串估计≈{per_string * per_file * args.files:.0f}秒")
+
+
+def write_worker_samples(folder, rows, seed=0):
+    """生成MoICD样式的BUS工作表（约1/4重复键）和一个目标CSV"""
+    import pandas as pd
+    rng = random.Random(seed)
+    keys = [(rng.choice("IO"), f"PORT_{rng.randrange(rows // 20)}", f"MSG_{rng.randrange(rows // 2)}")
+            for _ in range(rows)]
+    df = pd.DataFrame({
+        "I/O": [key[0] for key in keys],
+        "PhysicalPort": [key[1] for key in keys],
+        "Word_Name/Message_Name": [key[2] for key in keys],
+        "Guid": [bench_guid(i) for i in range(rows)],
+        "DP_Name": [f"DP_{i % 997}" for i in range(rows)],
+        "Fullname": [f"FULL_{i}" for i in range(rows)],
+    })
+    xlsx_path = os.path.join(folder, "moicd.xlsx")
+    df.to_excel(xlsx_path, sheet_name="BUS", index=False)
+    csv_path = os.path.join(folder, "target.csv")
+    df[["Word_Name/Message_Name"]].sample(frac=0.5, random_state=seed).to_csv(csv_path, index=False)
+    return xlsx_path, csv_path
+
+
+def bench_worker(args):
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        xlsx_path, csv_path = write_worker_samples(tmp_dir, args.rows)
+        env = dict(os.environ, WORKBOOK_CACHE_DIR=os.path.join(tmp_dir, "cache"))
+        jobs = {
+            "membership": ("compare_csv_and_xlsx_messagename.py",
+                           ["--xlsx", xlsx_path, "--csv1", csv_path, "--csv1-col", "Word_Name/Message_Name",
+                            "--export-formats", "csv"]),
+            "dedup": ("get_port_message_name.py", ["--input", xlsx_path, "--export-formats", "csv"]),
+        }
+        print(f"工作表{args.rows}行，每种任务重复{args.repeat}次，取中位数")
+        print(f"{'任务':<14}{'每次新进程(ms)':>16}{'常驻进程首次(ms)':>18}{'常驻进程重复(ms)':>18}")
+
+        spawned = {}
+        for method, (script, job_args) in jobs.items():
+            times = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                subprocess.run([sys.executable, os.path.join(script_dir, script), *job_args], cwd=tmp_dir, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+                times.append((time.perf_counter() - start) * 1000)
+            spawned[method] = statistics.median(times)
+
+        worker = subprocess.Popen([sys.executable, os.path.join(script_dir, "tool_worker.py")], cwd=tmp_dir, env=env,
+                                  stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                  text=True, encoding="utf-8")
+
+        def call(request_id, method, params):
+            start = time.perf_counter()
+            worker.stdin.write(json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+                               + "\n")
+            worker.stdin.flush()
+            for line in worker.stdout:
+                message = json.loads(line)
+                if message.get("id") == request_id:
+                    if "error" in message:
+                        raise RuntimeError(message["error"]["message"])
+                    return (time.perf_counter() - start) * 1000
+
+        try:
+            start = time.perf_counter()
+            call(0, "ping", {})
+            print(f"常驻进程启动（导入依赖）：{(time.perf_counter() - start) * 1000:.0f}ms")
+            request_id = 1
+            for method, (_, job_args) in jobs.items():
+                times = []
+                for _ in range(args.repeat + 1):
+                    times.append(call(request_id, method, {"args": job_args, "cwd": tmp_dir}))
+                    request_id += 1
+                print(f"{method:<14}{spawned[method]:>16.0f}{times[0]:>18.0f}{statistics.median(times[1:]):>18.0f}")
+            call(request_id, "shutdown", {})
+        finally:
+            worker.stdin.close()
+            worker.wait()
+
+
+def time_call(func, arg, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        xml_main.name_keyword_fields.cache_clear()
+        start = time.perf_counter()
+        result = func(arg)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+# -------------------------- 基准项 --------------------------
+def bench_metadata(args):
+    files = args.files
+    tmp_dir = None
+    if not files:
+        tmp_dir = tempfile.TemporaryDirectory()
+        sample = os.path.join(tmp_dir.name, "deep_sample.xml")
+        write_deep_sample(sample)
+        files = [sample]
+
+    print(f"{'文件':<40}{'原实现(ms)':>14}{'预编译(ms)':>14}{'加速比':>10}  结果一致")
+    for path in files:
+        root = ET.parse(path).getroot()
+        legacy_time, legacy_result = time_call(legacy_extract_xml_metadata, root, args.repeat)
+        new_time, new_result = time_call(xml_main.extract_xml_metadata, root, args.repeat)
+        speedup = legacy_time / new_time if new_time > 0 else float("inf")
+        print(f"{os.path.basename(path):<40}{legacy_time * 1000:>14.2f}{new_time * 1000:>14.2f}"
+              f"{speedup:>9.1f}x  {legacy_result == new_result}")
+
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+
+
+def time_pair(func, file_a, file_b, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(file_a, file_b)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def peak_memory(func, *args):
+    """单次调用期间Python分配内存的峰值（MB）"""
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def stream_diff_list(file_a, file_b):
+    return list(folder_diff.iter_stream_diff(file_a, file_b))
+
+
+def bench_diff(args):
+    tmp_dir = None
+    if args.pair:
+        file_a, file_b = args.pair
+    else:
+        tmp_dir = tempfile.TemporaryDirectory()
+        file_a = os.path.join(tmp_dir.name, "baseline_a.xml")
+        file_b = os.path.join(tmp_dir.name, "baseline_b.xml")
+        write_diff_sample(file_a, file_b, args.nodes)
+
+    size_mb = (os.path.getsize(file_a) + os.path.getsize(file_b)) / 1024 / 1024
+    print(f"对比文件：{os.path.basename(file_a)} / {os.path.basename(file_b)}（共{size_mb:.2f}MB）")
+    legacy_time, legacy_result = time_pair(legacy_compare_xml, file_a, file_b, args.repeat)
+    fast_time, fast_result = time_pair(folder_diff.compare_xml, file_a, file_b, args.repeat)
+    # 新引擎按文档顺序输出，与原实现的排序顺序不同，按集合比较
+    same = sorted(map(tuple, legacy_result)) == sorted(map(tuple, fast_result))
+    print(f"{'引擎':<24}{'耗时(ms)':>12}{'差异条数':>10}")
+    print(f"{'原flatten+排序对比':<24}{legacy_time * 1000:>12.1f}{len(legacy_result):>10}")
+    print(f"{'fast':<24}{fast_time * 1000:>12.1f}{len(fast_result):>10}  "
+          f"较原实现快{legacy_time / max(fast_time, 1e-9):.1f}倍，结果一致：{same}")
+    stream_time, stream_result = time_pair(stream_diff_list, file_a, file_b, args.repeat)
+    same = sorted(fast_result) == sorted(stream_result)
+    print(f"{'stream':<24}{stream_time * 1000:>12.1f}{len(stream_result):>10}  结果与fast一致：{same}")
+    print(f"内存峰值：fast {peak_memory(folder_diff.compare_xml, file_a, file_b):.1f}MB，"
+          f"stream {peak_memory(stream_diff_list, file_a, file_b):.1f}MB")
+    if not args.skip_xmldiff:
+        xmldiff_time, xmldiff_result = time_pair(folder_diff.xmldiff_records, file_a, file_b, 1)
+        print(f"{'xmldiff':<24}{xmldiff_time * 1000:>12.1f}{len(xmldiff_result):>10}  "
+              f"fast较xmldiff快{xmldiff_time / max(fast_time, 1e-9):.1f}倍")
+
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+
+
+def bench_mapping_db(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "xml_guid_mapping.db")
+        start = time.perf_counter()
+        write_legacy_mapping_db(db_path, args.files, args.guids_per_file)
+        print(f"生成旧结构映射库：{args.files}个文件×{args.guids_per_file}个GUID，耗时{time.perf_counter() - start:.1f}秒")
+        guid_mapping_db.migrate_database(db_path, args.samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="性能基准：对比优化前后实现")
+    subparsers = parser.add_subparsers(dest="bench", required=True)
+
+    metadata_parser = subparsers.add_parser("metadata", help="extract_xml_metadata 单文件耗时")
+    metadata_parser.add_argument("--files", nargs="*", help="参与测试的XML文件（默认生成深层样例）")
+    metadata_parser.add_argument("--repeat", type=int, default=5, help="重复次数，取最快一次（默认：5）")
+    metadata_parser.set_defaults(func=bench_metadata)
+
+    diff_parser = subparsers.add_parser("diff", help="XML基线差异引擎（原实现 / fast / stream / xmldiff）耗时与内存")
+    diff_parser.add_argument("--pair", nargs=2, metavar=("A", "B"), help="参与测试的一对XML（默认生成样例）")
+    diff_parser.add_argument("--nodes", type=int, default=20000, help="生成样例的节点数（默认：20000）")
+    diff_parser.add_argument("--repeat", type=int, default=3, help="重复次数，取最快一次（默认：3）")
+    diff_parser.add_argument("--skip-xmldiff", action="store_true", help="不测xmldiff（大文件时很慢）")
+    diff_parser.set_defaults(func=bench_diff)
+
+    fuzzy_parser = subparsers.add_parser("fuzzy", help="三元组索引模糊匹配与朴素两两比较的耗时随规模变化")
+    fuzzy_parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000],
+                              help="源/目标名称数量（默认：1000 10000 100000）")
+    fuzzy_parser.add_argument("--brute-limit", type=int, default=500,
+                              help="两两比较实测的源名称数，更多时按比例外推（默认：500）")
+    fuzzy_parser.add_argument("--min-score", type=float, default=0.85, help="索引的最低相似度（默认：0.85）")
+    fuzzy_parser.set_defaults(func=bench_fuzzy)
+
+    mapping_parser = subparsers.add_parser("mapping-db", help="映射库旧结构→规范化结构的大小与查询耗时")
+    mapping_parser.add_argument("--files", type=int, default=20000, help="XML文件数（默认：20000）")
+    mapping_parser.add_argument("--guids-per-file", type=int, default=100, help="每个文件的映射行数（默认：100）")
+    mapping_parser.add_argument("--samples", type=int, default=500, help="每种查询抽样的键数（默认：500）")
+    mapping_parser.set_defaults(func=bench_mapping_db)
+
+    table_parser = subparsers.add_parser("guid-table", help="guid_info字典与GuidMatchTable的内存占用")
+    table_parser.add_argument("--guids", type=int, default=1000000, help="GUID数（默认：1000000）")
+    table_parser.add_argument("--files", type=int, default=100000, help="XML文件数（默认：100000）")
+    table_parser.add_argument("--matches-per-file", type=int, default=20, help="每个文件匹配的GUID数（默认：20）")
+    table_parser.add_argument("--workers", type=int, default=4, help="合并测试的进程数（默认：4）")
+    table_parser.set_defaults(func=bench_guid_table)
+
+    automaton_parser = subparsers.add_parser("automaton", help="子串匹配（各自动机实现）与整值匹配的扫描耗时")
+    automaton_parser.add_argument("--guids", type=int, default=100000, help="GUID数（默认：100000）")
+    automaton_parser.add_argument("--files", type=int, default=200, help="XML文件数（默认：200）")
+    automaton_parser.add_argument("--items", type=int, default=2000, help="每个文件的节点组数（默认：2000）")
+    automaton_parser.add_argument("--naive-samples", type=int, default=200,
+                                  help="朴素逐GUID检查抽样的字符串数（默认：200）")
+    automaton_parser.set_defaults(func=bench_automaton)
+
+    worker_parser = subparsers.add_parser("worker", help="每次新建进程与常驻JSON-RPC进程（tool_worker.py）的请求延迟")
+    worker_parser.add_argument("--rows", type=int, default=50000, help="工作表行数（默认：50000）")
+    worker_parser.add_argument("--repeat", type=int, default=5, help="每种任务的重复次数（默认：5）")
+    worker_parser.set_defaults(func=bench_worker)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
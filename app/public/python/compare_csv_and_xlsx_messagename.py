@@ -1,14 +1,29 @@
 import pandas as pd
 import argparse
-from typing import Tuple, Set, Literal, List, Dict
+from typing import Tuple, Set, Literal, List, Dict, Iterable
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 import os
+import sys
+from workbook_cache import load_sheet
+from result_export import EXPORT_FORMATS, StreamingXlsxWriter, export_dataframe_formats, report_export
+from fuzzy_index import (DEFAULT_NORMALIZE_RULES, DEFAULT_SUFFIX_PATTERN, NORMALIZE_RULES, TrigramIndex,
+                         build_normalizer)
+import time
+
+try:
+    import pyarrow  # noqa: F401  pd.read_csv(engine="pyarrow") 需要
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
 
 def load_source_xlsx(xlsx_path: str) -> Set[str]:
     """
     加载XLSX源文件，提取 Word_Name/Message_Name 列的不重复值集合
     """
     try:
-        xlsx_df = pd.read_excel(xlsx_path, engine='openpyxl', sheet_name="BUS")
+        # 经列式缓存只加载需要的一列
+        xlsx_df = load_sheet(xlsx_path, sheet_name="BUS", columns=['Word_Name/Message_Name'])
         if 'Word_Name/Message_Name' not in xlsx_df.columns:
             raise ValueError("XLSX文件中未找到 'Word_Name/Message_Name' 列")
         
@@ -24,207 +39,481 @@ def load_source_xlsx(xlsx_path: str) -> Set[str]:
         print(f"❌ XLSX数据加载错误：{e}")
         exit(1)
 
-def load_target_csvs(csv1_path: str, csv1_col: str, csv2_path: str, csv2_col: str) -> Tuple[Set[str], Set[str], str, str]:
+def peak_memory_mb():
+    """整个进程至今的内存峰值（MB，只增不减，不能归到单个文件）；Linux/macOS用resource，Windows有psutil时用peak_wset，都不可用时返回None"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 / 1024
+    except (ImportError, AttributeError):
+        return None
+
+
+def resolve_csv_engine(engine: str, chunksize: int) -> str:
+    """auto：有pyarrow且不分块时用pyarrow（多线程解析），否则用C引擎；pyarrow不支持分块读取"""
+    if engine == "auto":
+        return "pyarrow" if HAS_PYARROW and not chunksize else "c"
+    if engine == "pyarrow" and chunksize:
+        print("⚠️  pyarrow引擎不支持分块读取，已改用C引擎")
+        return "c"
+    return engine
+
+
+def load_single_csv(csv_path: str, col_name: str, csv_label: str,
+                    engine: str = "auto", chunksize: int = 0) -> Tuple[Set[str], str]:
     """
-    加载两个CSV目标文件，提取各自指定列的不重复值集合，同时返回CSV文件名（用于标注来源）
-    Returns: (csv1_set, csv2_set, csv1_filename, csv2_filename)
+    加载单个CSV的指定列，返回值集合和文件名
+    只读取需要的一列（usecols），按字符串读取；chunksize>0时分块读入集合，内存只与块大小和不重复值数量有关
     """
-    def load_single_csv(csv_path: str, col_name: str, csv_label: str) -> Tuple[Set[str], str]:
-        """辅助函数：加载单个CSV的指定列，返回值集合和文件名"""
-        try:
-            csv_df = pd.read_csv(csv_path)
-            if col_name not in csv_df.columns:
-                raise ValueError(f"未找到列 '{col_name}'")
-            
-            csv_values = csv_df[col_name].dropna().astype(str).unique()
-            csv_set = set(csv_values)
-            csv_filename = os.path.basename(csv_path)  # 提取文件名（不含路径）
-            print(f"✅ {csv_label}（CSV）加载完成：共 {len(csv_set)} 个不重复的 '{col_name}'（文件：{csv_filename}）")
-            return csv_set, csv_filename
-        except FileNotFoundError as e:
-            print(f"❌ 错误：{csv_label}未找到 - {e}")
-            exit(1)
-        except Exception as e:
-            print(f"❌ {csv_label}数据加载错误：{e}")
-            exit(1)
-    
-    # 加载两个CSV，获取值集合和文件名
-    csv1_set, csv1_filename = load_single_csv(csv1_path, csv1_col, "第一个目标CSV")
-    csv2_set, csv2_filename = load_single_csv(csv2_path, csv2_col, "第二个目标CSV")
-    return csv1_set, csv2_set, csv1_filename, csv2_filename
+    try:
+        start = time.perf_counter()
+        # 先只读表头确认列存在
+        if col_name not in pd.read_csv(csv_path, nrows=0).columns:
+            raise ValueError(f"未找到列 '{col_name}'")
+
+        engine = resolve_csv_engine(engine, chunksize)
+        read_options = {"usecols": [col_name], "dtype": str, "engine": engine}
+        if chunksize:
+            csv_set = set()
+            row_count = 0
+            for chunk in pd.read_csv(csv_path, chunksize=chunksize, **read_options):
+                row_count += len(chunk)
+                csv_set.update(chunk[col_name].dropna().unique())
+        else:
+            csv_df = pd.read_csv(csv_path, **read_options)
+            row_count = len(csv_df)
+            csv_set = set(csv_df[col_name].dropna().unique())
+            del csv_df
+
+        elapsed = time.perf_counter() - start
+        csv_filename = os.path.basename(csv_path)  # 提取文件名（不含路径）
+        print(f"✅ {csv_label}（CSV）加载完成：共 {len(csv_set)} 个不重复的 '{col_name}'（文件：{csv_filename}）")
+        print(f"   读取{row_count}行，耗时{elapsed:.2f}秒，{row_count / max(elapsed, 1e-9):.0f}行/秒，"
+              f"引擎：{engine}{f'，分块{chunksize}行' if chunksize else ''}")
+        return csv_set, csv_filename
+    except FileNotFoundError as e:
+        print(f"❌ 错误：{csv_label}未找到 - {e}")
+        exit(1)
+    except Exception as e:
+        print(f"❌ {csv_label}数据加载错误：{e}")
+        exit(1)
+
+
+def ordinal(index: int) -> str:
+    """0 -> 第一个，1 -> 第二个 …（超过十个用数字）"""
+    numerals = "一二三四五六七八九十"
+    return f"第{numerals[index]}个" if index < len(numerals) else f"第{index + 1}个"
+
+
+def load_target_csvs(targets: List[Tuple[str, str]], engine: str = "auto", chunksize: int = 0,
+                     threads: int = 1) -> Tuple[List[Set[str]], List[str]]:
+    """
+    加载多个CSV目标文件，提取各自指定列的不重复值集合，同时返回CSV文件名（用于标注来源）
+    targets: [(CSV路径, 列名), ...]，顺序即位掩码中的位序
+    threads>1时多个文件并发加载（解析主要在C/Arrow层完成，线程可以并行）
+    Returns: (各CSV值集合列表, 各CSV文件名列表)
+    """
+    jobs = [
+        (csv_path, col_name, f"{ordinal(index)}目标CSV", engine, chunksize)
+        for index, (csv_path, col_name) in enumerate(targets)
+    ]
+    if threads > 1 and len(jobs) > 1:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            loaded = list(executor.map(lambda job: load_single_csv(*job), jobs))
+    else:
+        loaded = [load_single_csv(*job) for job in jobs]
+    # 多个文件并发加载，且pyarrow的内存不经过Python分配器，无法可靠地按文件计量，只报告整个进程的峰值
+    peak = peak_memory_mb()
+    if peak is not None:
+        print(f"   {len(jobs)}个CSV加载完成，进程内存峰值{peak:.0f}MB（整个进程至今的峰值，非单个文件）")
+    return [csv_set for csv_set, _ in loaded], [csv_filename for _, csv_filename in loaded]
+
+
+def status_label(mask: int, target_count: int) -> str:
+    """按位掩码给出存在状态；两个CSV时沿用原有的四种状态文字"""
+    full = (1 << target_count) - 1
+    if target_count == 2:
+        return {3: "两个CSV都存在", 1: "只在第一个CSV存在", 2: "只在第二个CSV存在", 0: "两个CSV都不存在"}[mask]
+    if mask == full:
+        return f"全部{target_count}个CSV都存在"
+    if mask == 0:
+        return f"全部{target_count}个CSV都不存在"
+    if mask & (mask - 1) == 0:
+        return f"只在{ordinal(mask.bit_length() - 1)}CSV存在"
+    return f"部分CSV存在（{bin(mask).count('1')}/{target_count}）"
+
+
+def mask_sources(mask: int, target_filenames: List[str]) -> str:
+    labels = [name for bit, name in enumerate(target_filenames) if mask >> bit & 1]
+    return "、".join(labels) if labels else "无"
+
+
+MATCH_MODES = ("exact", "normalized", "fuzzy")
+MATCH_METHOD_LABELS = {"exact": "精确", "normalized": "规范化", "fuzzy": "模糊"}
+
+
+def match_masks(
+    source_set: Set[str],
+    target_sets: List[Set[str]],
+    match_mode: str,
+    normalizer=None,
+    min_score: float = 0.85
+) -> Tuple[Dict[str, int], Dict[str, Tuple[str, float, str]]]:
+    """
+    规范化/模糊模式下计算每个源名称的位掩码，并记录所有目标中的最佳匹配：
+    先精确比较，再比较规范化后的名称，fuzzy模式下最后查三元组索引，相似度不低于min_score记为存在
+    Returns: ({名称: 位掩码}, {名称: (最佳匹配, 相似度, 匹配方式)})
+    """
+    if match_mode == "fuzzy":
+        indexes = [TrigramIndex(target_set, normalizer, min_score) for target_set in target_sets]
+        lookups = [index.best_match for index in indexes]
+    else:
+        # 规范化名称 -> 第一个原始名称
+        normalized_maps = []
+        for target_set in target_sets:
+            normalized = {}
+            for name in target_set:
+                normalized.setdefault(normalizer(name), name)
+            normalized_maps.append(normalized)
+        lookups = [
+            lambda message, normalized=normalized: (normalized.get(normalizer(message)), 1.0)
+            for normalized in normalized_maps
+        ]
+
+    masks = {}
+    best_matches = {}
+    for message in source_set:
+        mask = 0
+        best = ("", 0.0, "")
+        for bit, (target_set, lookup) in enumerate(zip(target_sets, lookups)):
+            if message in target_set:
+                mask |= 1 << bit
+                best = (message, 1.0, MATCH_METHOD_LABELS["exact"])
+                continue
+            match, score = lookup(message)
+            if match is None:
+                continue
+            method = "normalized" if score == 1.0 else "fuzzy"
+            if score >= min_score:
+                mask |= 1 << bit
+            if score > best[1]:
+                best = (match, score, MATCH_METHOD_LABELS[method])
+        masks[message] = mask
+        best_matches[message] = best
+    return masks, best_matches
+
 
 def compare_data(
     source_set: Set[str],
-    csv1_set: Set[str],
-    csv2_set: Set[str],
-    csv1_filename: str,
-    csv2_filename: str
-) -> List[Dict[str, str]]:
+    target_sets: List[Set[str]],
+    target_filenames: List[str],
+    match_mode: str = "exact",
+    normalizer=None,
+    min_score: float = 0.85
+) -> Tuple[List[Dict[str, str]], Counter]:
     """
-    对比源数据在两个CSV中的存在情况，返回详细结果列表（含来源标注）
-    Returns: 列表包含字典，每个字典对应一个MESSAGE_NAME的对比结果
+    对比源数据在多个CSV中的存在情况：每个名称的存在情况记为位掩码（第i位表示在第i个CSV中存在），
+    统计在同一遍中用Counter按掩码计数，耗时与名称数量成线性关系
+    match_mode为normalized/fuzzy时按规范化名称/三元组相似度判断存在，结果中增加最佳匹配、相似度和匹配方式
+    Returns: (详细结果列表（按名称排序，含来源标注）, {位掩码: 名称数})
     """
+    best_matches = None
+    if match_mode == "exact":
+        masks = dict.fromkeys(source_set, 0)
+        for bit, target_set in enumerate(target_sets):
+            flag = 1 << bit
+            for message in source_set.intersection(target_set):
+                masks[message] |= flag
+    else:
+        masks, best_matches = match_masks(source_set, target_sets, match_mode, normalizer, min_score)
+
+    # 同一掩码的状态和来源只生成一次
+    labels = {}
+    mask_counts = Counter()
     result_list = []
-    for message in sorted(source_set):  # 按字母排序
-        in_csv1 = message in csv1_set
-        in_csv2 = message in csv2_set
-        
-        # 标注来源
-        source_labels = []
-        if in_csv1:
-            source_labels.append(csv1_filename)
-        if in_csv2:
-            source_labels.append(csv2_filename)
-        
-        source_desc = "、".join(source_labels) if source_labels else "无"
-        status = "两个CSV都存在" if in_csv1 and in_csv2 else \
-                "只在第一个CSV存在" if in_csv1 else \
-                "只在第二个CSV存在" if in_csv2 else \
-                "两个CSV都不存在"
-        
-        result_list.append({
+    for message in sorted(masks):  # 按字母排序
+        mask = masks[message]
+        mask_counts[mask] += 1
+        label = labels.get(mask)
+        if label is None:
+            label = labels[mask] = (status_label(mask, len(target_sets)), mask_sources(mask, target_filenames))
+        item = {
             "Word_Name/Message_Name": message,
-            "存在状态": status,
-            "查找来源（CSV文件）": source_desc
-        })
-    return result_list
+            "存在状态": label[0],
+            "查找来源（CSV文件）": label[1]
+        }
+        if best_matches is not None:
+            match, score, method = best_matches[message]
+            item["最佳匹配"] = match
+            item["相似度"] = round(score, 3)
+            item["匹配方式"] = method
+        result_list.append(item)
+    return result_list, mask_counts
+
+
+def summary_items(mask_counts: Counter, target_filenames: List[str]) -> List[Tuple[str, str, int]]:
+    """
+    由掩码计数生成统计项 [(图标, 统计项, 数量)]：
+    两个CSV时与原报告相同（都存在 / 只在A / 只在B / 都不存在）；
+    多个CSV时先列各CSV的覆盖数，再按数量列出实际出现的每种存在组合
+    """
+    target_count = len(target_filenames)
+    if target_count == 2:
+        return [
+            ("✅", "两个CSV都存在", mask_counts[3]),
+            ("⚠️ ", f"只在 '{target_filenames[0]}' 存在", mask_counts[1]),
+            ("⚠️ ", f"只在 '{target_filenames[1]}' 存在", mask_counts[2]),
+            ("❌", "两个CSV都不存在", mask_counts[0]),
+        ]
+
+    full = (1 << target_count) - 1
+    items = []
+    for bit, filename in enumerate(target_filenames):
+        covered = sum(count for mask, count in mask_counts.items() if mask >> bit & 1)
+        items.append(("📁", f"在 '{filename}' 中存在", covered))
+    for mask, count in sorted(mask_counts.items(), key=lambda item: (-item[1], item[0])):
+        icon = "✅" if mask == full else "❌" if mask == 0 else "⚠️ "
+        if mask == full:
+            label = f"全部{target_count}个CSV都存在"
+        elif mask == 0:
+            label = f"全部{target_count}个CSV都不存在"
+        else:
+            label = f"只在 {mask_sources(mask, target_filenames)} 存在"
+        items.append((icon, label, count))
+    return items
+
+
+def percent(count: int, total: int) -> float:
+    return count / total * 100 if total > 0 else 0
+
+
+TXT_BUFFER_SIZE = 1024 * 1024
+TXT_FOOTER = f"""
+================================================================================
+📝 说明：
+- 查找来源标注了该名称在哪些CSV文件中被找到（多个文件用、分隔）
+- 所有结果已按 Word_Name/Message_Name 字母顺序排序
+================================================================================
+    """
+
+
+def format_txt_item(idx: int, item: Dict[str, str]) -> str:
+    best = ""
+    if "最佳匹配" in item:
+        best = (f"\n   最佳匹配：{item['最佳匹配'] or '无'}（相似度{item['相似度']:.3f}"
+                f"{'，' + item['匹配方式'] if item['匹配方式'] else ''}）")
+    return (f"\n{idx:03d}. 名称：{item['Word_Name/Message_Name']}"
+            f"\n   状态：{item['存在状态']}"
+            f"\n   来源：{item['查找来源（CSV文件）']}"
+            f"{best}"
+            "\n" + "-" * 80)
+
+
+def txt_page_path(output_path: str, page: int) -> str:
+    """第1页就是output_path，之后为 原名_002.txt、原名_003.txt …"""
+    if page == 1:
+        return output_path
+    base, ext = os.path.splitext(output_path)
+    return f"{base}_{page:03d}{ext}"
+
 
 def generate_txt_report(
-    result_list: List[Dict[str, str]],
-    csv1_col: str,
-    csv2_col: str,
-    csv1_filename: str,
-    csv2_filename: str,
-    output_path: str = "XLSX_双CSV对比结果.txt"
+    result_list: Iterable[Dict[str, str]],
+    total_source: int,
+    mask_counts: Counter,
+    target_cols: List[str],
+    target_filenames: List[str],
+    output_path: str = "XLSX_双CSV对比结果.txt",
+    max_detail: int = 0,
+    page_size: int = 0,
+    match_desc: str = ""
 ):
-    """生成详细TXT报告（含来源标注）"""
-    total_source = len(result_list)
-    both_exists = sum(1 for item in result_list if item["存在状态"] == "两个CSV都存在")
-    only_csv1 = sum(1 for item in result_list if item["存在状态"] == "只在第一个CSV存在")
-    only_csv2 = sum(1 for item in result_list if item["存在状态"] == "只在第二个CSV存在")
-    neither = sum(1 for item in result_list if item["存在状态"] == "两个CSV都不存在")
-    
-    # 计算占比
-    both_rate = (both_exists / total_source) * 100 if total_source > 0 else 0
-    only_csv1_rate = (only_csv1 / total_source) * 100 if total_source > 0 else 0
-    only_csv2_rate = (only_csv2 / total_source) * 100 if total_source > 0 else 0
-    neither_rate = (neither / total_source) * 100 if total_source > 0 else 0
-    
-    # 生成报告内容
-    report = f"""
+    """
+    生成详细TXT报告（含来源标注）：统计头由对比时的掩码计数生成，明细逐条经缓冲写入文件，不在内存中拼接整份报告
+    result_list: 任意可迭代的结果（可以是生成器）
+    max_detail: >0时只写前max_detail条明细，其余只计数
+    page_size: >0时每个文件最多page_size条明细，超出部分写到 原名_002.txt 等后续分页文件
+    match_desc: 非精确匹配时的匹配方式说明，写在对比配置中
+    """
+    targets_desc = "\n".join(
+        f"- 目标数据{index}：CSV文件 '{filename}' 的 '{col}' 列"
+        for index, (filename, col) in enumerate(zip(target_filenames, target_cols), 1)
+    )
+    if match_desc:
+        targets_desc += f"\n- 匹配方式：{match_desc}"
+    stats_desc = "\n".join(
+        f"- {icon} {label}：{count} 个（{percent(count, total_source):.2f}%）"
+        for icon, label, count in summary_items(mask_counts, target_filenames)
+    )
+    header = f"""
 ==================================== 对比报告 ====================================
 📋 对比配置：
 - 源数据：XLSX文件的 'Word_Name/Message_Name' 列
-- 目标数据1：CSV文件 '{csv1_filename}' 的 '{csv1_col}' 列
-- 目标数据2：CSV文件 '{csv2_filename}' 的 '{csv2_col}' 列
+{targets_desc}
 
 📊 统计信息：
 - 源数据总不重复值：{total_source} 个
-- ✅ 两个CSV都存在：{both_exists} 个（{both_rate:.2f}%）
-- ⚠️  只在 '{csv1_filename}' 存在：{only_csv1} 个（{only_csv1_rate:.2f}%）
-- ⚠️  只在 '{csv2_filename}' 存在：{only_csv2} 个（{only_csv2_rate:.2f}%）
-- ❌ 两个CSV都不存在：{neither} 个（{neither_rate:.2f}%）
+{stats_desc}
 
 --------------------------------------------------------------------------------
 📋 详细结果列表（按Word_Name/Message_Name排序）：
 """
+
+    page = 1
+    page_paths = [output_path]
+    f = open(output_path, "w", encoding="utf-8", buffering=TXT_BUFFER_SIZE)
+    try:
+        f.write(header)
+        written = 0
+        for idx, item in enumerate(result_list, 1):
+            if max_detail and idx > max_detail:
+                break  # 省略的条数由total_source得出
+            if page_size and written == page_size:
+                f.write(f"\n（明细续见：{os.path.basename(txt_page_path(output_path, page + 1))}）\n")
+                f.close()
+                page += 1
+                page_paths.append(txt_page_path(output_path, page))
+                f = open(page_paths[-1], "w", encoding="utf-8", buffering=TXT_BUFFER_SIZE)
+                f.write(f"📋 详细结果列表（第{page}页，自第{idx}条起）：\n")
+                written = 0
+            f.write(format_txt_item(idx, item))
+            written += 1
+
+        if max_detail and total_source > max_detail:
+            f.write(f"\n……其余 {total_source - max_detail} 条明细已省略（--max-detail {max_detail}），完整结果见XLSX/CSV导出\n")
+        f.write(TXT_FOOTER)
+    finally:
+        f.close()
     
-    # 添加每条结果的详细信息
-    for idx, item in enumerate(result_list, 1):
-        report += f"\n{idx:03d}. 名称：{item['Word_Name/Message_Name']}"
-        report += f"\n   状态：{item['存在状态']}"
-        report += f"\n   来源：{item['查找来源（CSV文件）']}"
-        report += "\n" + "-"*80
-    
-    report += f"""
-================================================================================
-📝 说明：
-- 查找来源标注了该名称在哪些CSV文件中被找到（多个文件用、分隔）
-- 所有结果已按 Word_Name/Message_Name 字母顺序排序
-================================================================================
-    """
-    
-    # 保存TXT报告
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(report)
-    
-    print(f"\n📄 TXT报告已保存到：{os.path.abspath(output_path)}")
+    print(f"\n📄 TXT报告已保存到：{os.path.abspath(output_path)}"
+          f"{f'（共{len(page_paths)}页）' if len(page_paths) > 1 else ''}")
 
 def generate_xlsx_report(
     result_list: List[Dict[str, str]],
-    csv1_col: str,
-    csv2_col: str,
-    csv1_filename: str,
-    csv2_filename: str,
+    mask_counts: Counter,
+    target_cols: List[str],
+    target_filenames: List[str],
     output_path: str = "XLSX_双CSV对比结果.xlsx"
 ):
-    """生成XLSX格式报告（含来源标注，便于后续筛选处理）"""
-    # 转换为DataFrame
-    df = pd.DataFrame(result_list)
-    
-    # 创建Excel写入器，设置样式（可选，让表格更美观）
-    with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+    """生成XLSX格式报告（含来源标注，便于后续筛选处理），流式写入，内存占用与结果行数无关"""
+    start = time.perf_counter()
+    with StreamingXlsxWriter(output_path) as writer:
         # 写入详细结果表
-        df.to_excel(writer, sheet_name="详细对比结果", index=False)
+        columns = ["Word_Name/Message_Name", "存在状态", "查找来源（CSV文件）"]
+        if result_list and "最佳匹配" in result_list[0]:
+            columns += ["最佳匹配", "相似度", "匹配方式"]
+        detail_sheet = writer.add_sheet("详细对比结果", columns)
+        for item in result_list:
+            detail_sheet.write_row([item[col] for col in columns])
         
-        # 写入统计汇总表
+        # 写入统计汇总表（由掩码计数生成，不再逐项遍历结果列表）
         total_source = len(result_list)
         summary_data = [
             ["统计项", "数量", "占比（%）"],
             ["源数据总不重复值", total_source, "100.00"],
-            ["两个CSV都存在", sum(1 for item in result_list if item["存在状态"] == "两个CSV都存在"), 
-             f"{(sum(1 for item in result_list if item['存在状态'] == '两个CSV都存在')/total_source*100):.2f}" if total_source>0 else "0.00"],
-            [f"只在 '{csv1_filename}' 存在", sum(1 for item in result_list if item["存在状态"] == "只在第一个CSV存在"),
-             f"{(sum(1 for item in result_list if item['存在状态'] == '只在第一个CSV存在')/total_source*100):.2f}" if total_source>0 else "0.00"],
-            [f"只在 '{csv2_filename}' 存在", sum(1 for item in result_list if item["存在状态"] == "只在第二个CSV存在"),
-             f"{(sum(1 for item in result_list if item['存在状态'] == '只在第二个CSV存在')/total_source*100):.2f}" if total_source>0 else "0.00"],
-            ["两个CSV都不存在", sum(1 for item in result_list if item["存在状态"] == "两个CSV都不存在"),
-             f"{(sum(1 for item in result_list if item['存在状态'] == '两个CSV都不存在')/total_source*100):.2f}" if total_source>0 else "0.00"]
         ]
-        summary_df = pd.DataFrame(summary_data[1:], columns=summary_data[0])
-        summary_df.to_excel(writer, sheet_name="统计汇总", index=False)
+        summary_data.extend(
+            [label, count, f"{percent(count, total_source):.2f}"]
+            for _, label, count in summary_items(mask_counts, target_filenames)
+        )
+        summary_sheet = writer.add_sheet("统计汇总", summary_data[0])
+        summary_sheet.write_rows(summary_data[1:])
         
         # 写入配置信息表
         config_data = [
             ["配置项", "内容"],
             ["源数据文件", os.path.abspath(args.xlsx)],
             ["源数据列名", "Word_Name/Message_Name"],
-            ["第一个CSV文件", f"{csv1_filename}（列名：{csv1_col}）"],
-            ["第二个CSV文件", f"{csv2_filename}（列名：{csv2_col}）"],
-            ["对比时间", pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")]
         ]
-        config_df = pd.DataFrame(config_data[1:], columns=config_data[0])
-        config_df.to_excel(writer, sheet_name="对比配置", index=False)
+        config_data.extend(
+            [f"{ordinal(index)}CSV文件", f"{filename}（列名：{col}）"]
+            for index, (filename, col) in enumerate(zip(target_filenames, target_cols))
+        )
+        config_data.append(["对比时间", pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")])
+        config_sheet = writer.add_sheet("对比配置", config_data[0])
+        config_sheet.write_rows(config_data[1:])
     
+    report_export(output_path, time.perf_counter() - start)
     print(f"📊 XLSX报告已保存到：{os.path.abspath(output_path)}")
 
-def main():
-    parser = argparse.ArgumentParser(description="XLSX的Word_Name/Message_Name列，在两个CSV的指定列中查找存在性（输出TXT+XLSX）")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="XLSX的Word_Name/Message_Name列，在多个CSV的指定列中查找存在性（输出TXT+XLSX）")
     parser.add_argument("--xlsx", required=True, help="XLSX源文件路径（含Word_Name/Message_Name列）")
-    parser.add_argument("--csv1", required=True, help="第一个CSV目标文件路径")
-    parser.add_argument("--csv1-col", required=True, help="第一个CSV中用于查找的列名")
-    parser.add_argument("--csv2", required=True, help="第二个CSV目标文件路径")
-    parser.add_argument("--csv2-col", required=True, help="第二个CSV中用于查找的列名")
+    parser.add_argument("--csv1", help="第一个CSV目标文件路径")
+    parser.add_argument("--csv1-col", help="第一个CSV中用于查找的列名")
+    parser.add_argument("--csv2", help="第二个CSV目标文件路径")
+    parser.add_argument("--csv2-col", help="第二个CSV中用于查找的列名")
+    parser.add_argument("--csv", nargs=2, action="append", default=[], metavar=("PATH", "COL"),
+                        help="追加一个CSV目标文件及其查找列，可重复（排在--csv1/--csv2之后）")
+    parser.add_argument("--csv-engine", choices=["auto", "c", "pyarrow", "python"], default="auto",
+                        help="CSV解析引擎（默认auto：有pyarrow时用多线程的pyarrow，分块读取时用C引擎）")
+    parser.add_argument("--chunksize", type=int, default=0,
+                        help="分块读取CSV的行数，用于超过内存的大文件（默认0：整列一次读入）")
+    parser.add_argument("--csv-threads", type=int, default=4, help="同时加载的CSV文件数（默认：4）")
+    parser.add_argument("--match-mode", choices=MATCH_MODES, default="exact",
+                        help="匹配方式：exact精确（默认）；normalized按规范化后的名称；fuzzy再按三元组相似度找最相近的名称")
+    parser.add_argument("--normalize", nargs="+", choices=NORMALIZE_RULES, default=list(DEFAULT_NORMALIZE_RULES),
+                        help=f"normalized/fuzzy模式的规范化规则（默认：{' '.join(DEFAULT_NORMALIZE_RULES)}）")
+    parser.add_argument("--strip-suffix", default=DEFAULT_SUFFIX_PATTERN,
+                        help="规则含suffix时去掉的后缀（正则，默认：%(default)s）")
+    parser.add_argument("--min-score", type=float, default=0.85,
+                        help="fuzzy模式下视为存在的最低相似度（三元组Dice系数，0~1，默认：0.85）")
     parser.add_argument("--txt-output", default="XLSX_双CSV对比结果.txt", help="TXT报告输出路径（默认：XLSX_双CSV对比结果.txt）")
+    parser.add_argument("--max-detail", type=int, default=0,
+                        help="TXT报告最多写出的明细条数（默认0：全部写出；统计信息始终基于全部结果）")
+    parser.add_argument("--txt-page-size", type=int, default=0,
+                        help="TXT报告每个文件的明细条数，超出部分写入 原名_002.txt 等分页文件（默认0：不分页）")
     parser.add_argument("--xlsx-output", default="XLSX_双CSV对比结果.xlsx", help="XLSX报告输出路径（默认：XLSX_双CSV对比结果.xlsx）")
+    parser.add_argument("--export-formats", nargs="+", choices=EXPORT_FORMATS, default=["xlsx"],
+                        help="详细结果导出格式，可多选（默认：xlsx；csv/parquet与XLSX报告同名，只含详细结果表）")
     
     global args  # 全局变量，供generate_xlsx_report使用
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+
+    targets = []
+    for path, col, flag in ((args.csv1, args.csv1_col, "--csv1"), (args.csv2, args.csv2_col, "--csv2")):
+        if path is None:
+            continue
+        if col is None:
+            parser.error(f"{flag} 需要同时指定 {flag}-col")
+        targets.append((path, col))
+    targets.extend((path, col) for path, col in args.csv)
+    if not targets:
+        parser.error("至少需要一个CSV目标文件（--csv1/--csv2 或 --csv PATH COL）")
+    target_cols = [col for _, col in targets]
     
     # 1. 加载所有数据（含CSV文件名提取）
     source_set = load_source_xlsx(args.xlsx)
-    csv1_set, csv2_set, csv1_filename, csv2_filename = load_target_csvs(
-        args.csv1, args.csv1_col, args.csv2, args.csv2_col
-    )
+    target_sets, target_filenames = load_target_csvs(targets, args.csv_engine, args.chunksize, args.csv_threads)
     
-    # 2. 对比数据（生成详细结果列表，含来源标注）
-    result_list = compare_data(source_set, csv1_set, csv2_set, csv1_filename, csv2_filename)
+    # 2. 对比数据（生成详细结果列表，含来源标注；同时按位掩码计数）
+    normalizer = None
+    match_desc = ""
+    if args.match_mode != "exact":
+        normalizer = build_normalizer(args.normalize, args.strip_suffix)
+        match_desc = f"{args.match_mode}（规范化规则：{'、'.join(args.normalize)}"
+        match_desc += f"，最低相似度{args.min_score}）" if args.match_mode == "fuzzy" else "）"
+    start = time.perf_counter()
+    result_list, mask_counts = compare_data(source_set, target_sets, target_filenames,
+                                            args.match_mode, normalizer, args.min_score)
+    print(f"⏱  对比{len(result_list)}个名称（{args.match_mode}）耗时{time.perf_counter() - start:.2f}秒")
     
     # 3. 生成双格式报告
-    generate_txt_report(result_list, args.csv1_col, args.csv2_col, csv1_filename, csv2_filename, args.txt_output)
-    generate_xlsx_report(result_list, args.csv1_col, args.csv2_col, csv1_filename, csv2_filename, args.xlsx_output)
+    generate_txt_report(result_list, len(result_list), mask_counts, target_cols, target_filenames, args.txt_output,
+                        args.max_detail, args.txt_page_size, match_desc)
+    if "xlsx" in args.export_formats:
+        generate_xlsx_report(result_list, mask_counts, target_cols, target_filenames, args.xlsx_output)
+    other_formats = [fmt for fmt in args.export_formats if fmt != "xlsx"]
+    if other_formats:
+        export_dataframe_formats(pd.DataFrame(result_list), args.xlsx_output, other_formats)
     
-    print("\n🎉 对比完成！已生成TXT和XLSX两种格式报告")
+    report_formats = ["TXT", *(fmt.upper() for fmt in dict.fromkeys(args.export_formats))]
+    print(f"\n🎉 对比完成！已生成{'、'.join(report_formats)}格式报告")
 
 if __name__ == "__main__":
     main()
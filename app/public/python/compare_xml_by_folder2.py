@@ -1,10 +1,24 @@
 # -*- coding: utf-8 -*-
 import os
+import argparse
+import hashlib
+import time
 import xml.etree.ElementTree as ET
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 from time import sleep
-from xmldiff import main, formatting
+from xmldiff import main as xmldiff_main, formatting
 import pandas as pd
 from tqdm import tqdm  # ✅ 新增：进度条库
+from result_export import EXPORT_FORMATS, RecordStreamWriter
+from diff_cache import DEFAULT_CACHE_PATH, DEFAULT_MAX_MB, DiffCache, cache_key, pack_records, unpack_records
+
+# 结构化差异记录，字段与输出Excel的列一一对应
+DiffRecord = namedtuple("DiffRecord", [
+    "file_name", "path", "diff_type", "source_file", "source_value", "target_file", "target_value"
+])
+DIFF_COLUMNS = ["文件名", "节点路径/属性", "差异类型", "源文件", "源文件值", "对比文件", "对比文件值"]
+ENGINES = ("fast", "stream", "xmldiff")
 
 def get_all_xml_files(folder):
     """获取文件夹内的所有 XML 文件路径"""
@@ -16,71 +30,102 @@ def get_all_xml_files(folder):
     return xml_files
 
 
+def iter_flatten_xml(root, parent_path=""):
+    """按先序逐个产出 (xpath, 属性dict, 文本)，为同级同名节点加编号"""
+    def child_entries(node, path):
+        # 同级同名节点按出现顺序编号
+        tag_count = {}
+        entries = []
+        for child in node:
+            index = tag_count.get(child.tag, 0) + 1
+            tag_count[child.tag] = index
+            entries.append((child, f"{path}/{child.tag}[{index}]" if path else f"{child.tag}[{index}]"))
+        return entries
+
+    # 显式栈先序遍历，避免深层XML触发递归深度限制
+    stack = child_entries(root, parent_path)
+    stack.reverse()
+    while stack:
+        node, current_path = stack.pop()
+        yield current_path, node.attrib, (node.text or "").strip()
+        if len(node):
+            children = child_entries(node, current_path)
+            children.reverse()
+            stack.extend(children)
+
+
 def flatten_xml(root, parent_path=""):
     """将 XML 展平为 [(xpath, 属性dict, 文本)]，为同级同名节点加编号"""
-    nodes = []
-    tag_count = {}
-    for child in root:
-        tag_count[child.tag] = tag_count.get(child.tag, 0) + 1
-        index = tag_count[child.tag]
-        current_path = f"{parent_path}/{child.tag}[{index}]" if parent_path else f"{child.tag}[{index}]"
+    return [
+        (path, dict(sorted(attrs.items())), text)
+        for path, attrs, text in iter_flatten_xml(root, parent_path)
+    ]
 
-        nodes.append((current_path, dict(sorted(child.attrib.items())), (child.text or "").strip()))
-        nodes.extend(flatten_xml(child, current_path))
-    return nodes
 
+def iter_node_diffs(path, attrs_a, text_a, attrs_b, text_b, file_a_name, file_b_name):
+    """对比同一路径下两个节点的属性和文本"""
+    # 属性差异（属性完全相同时不排序、不逐个比较）
+    if attrs_a != attrs_b:
+        for key in sorted(attrs_a.keys() | attrs_b.keys()):
+            val_a = attrs_a.get(key)
+            val_b = attrs_b.get(key)
+            if val_a != val_b:
+                yield DiffRecord(file_a_name, f"{path}/@{key}", "属性差异", file_a_name, val_a, file_b_name, val_b)
 
-def compare_nodes_detail(nodes_a, nodes_b, file_a_name, file_b_name):
-    """详细对比两个 XML 节点，输出每条差异（带源/对比文件与值）"""
-    diffs = []
+    # 文本差异
+    if text_a != text_b:
+        yield DiffRecord(file_a_name, path, "文本差异", file_a_name, text_a, file_b_name, text_b)
 
-    dict_a = {n[0]: (n[1], n[2]) for n in nodes_a}
-    dict_b = {n[0]: (n[1], n[2]) for n in nodes_b}
 
-    # 所有路径集合
-    all_paths = set(dict_a.keys()) | set(dict_b.keys())
+def added_record(path, file_a_name, file_b_name):
+    return DiffRecord(file_a_name, path, "节点新增", file_a_name, "", file_b_name, "新增节点")
 
-    for path in sorted(all_paths):
-        attrs_a, text_a = dict_a.get(path, ({}, ""))
-        attrs_b, text_b = dict_b.get(path, ({}, ""))
 
-        # 节点新增 / 删除
-        if path not in dict_a:
-            diffs.append([
-                file_a_name, path, "节点新增",
-                file_a_name, "", file_b_name, "新增节点"
-            ])
-            continue
-        elif path not in dict_b:
-            diffs.append([
-                file_a_name, path, "节点删除",
-                file_a_name, "存在", file_b_name, "已删除"
-            ])
+def deleted_record(path, file_a_name, file_b_name):
+    return DiffRecord(file_a_name, path, "节点删除", file_a_name, "存在", file_b_name, "已删除")
+
+
+def iter_compare_nodes(nodes_a, nodes_b, file_a_name, file_b_name):
+    """
+    按路径对比两组展平节点，逐条产出DiffRecord。
+    只为A建字典，B边遍历边查找：先按B的文档顺序产出新增/属性/文本差异，最后按A的顺序产出删除
+    """
+    dict_a = {path: (attrs, text) for path, attrs, text in nodes_a}
+
+    for path, attrs_b, text_b in nodes_b:
+        entry_a = dict_a.pop(path, None)
+        # 节点新增
+        if entry_a is None:
+            yield added_record(path, file_a_name, file_b_name)
             continue
+        attrs_a, text_a = entry_a
+        yield from iter_node_diffs(path, attrs_a, text_a, attrs_b, text_b, file_a_name, file_b_name)
 
-        # 属性差异
-        all_keys = set(attrs_a.keys()) | set(attrs_b.keys())
-        for key in sorted(all_keys):
-            val_a = attrs_a.get(key)
-            val_b = attrs_b.get(key)
-            if val_a != val_b:
-                diffs.append([
-                    file_a_name, f"{path}/@{key}", "属性差异",
-                    file_a_name, val_a, file_b_name, val_b
-                ])
+    # 节点删除
+    for path in dict_a:
+        yield deleted_record(path, file_a_name, file_b_name)
+
+
+def iter_compare_node_maps(map_a, map_b, file_a_name, file_b_name):
+    """对比两个已展平的 {xpath: (属性, 文本)}，不修改输入，同一份展平结果可参与多次对比"""
+    for path, (attrs_b, text_b) in map_b.items():
+        entry_a = map_a.get(path)
+        if entry_a is None:
+            yield added_record(path, file_a_name, file_b_name)
+            continue
+        yield from iter_node_diffs(path, entry_a[0], entry_a[1], attrs_b, text_b, file_a_name, file_b_name)
+    for path in map_a:
+        if path not in map_b:
+            yield deleted_record(path, file_a_name, file_b_name)
 
-        # 文本差异
-        if text_a != text_b:
-            diffs.append([
-                file_a_name, f"{path}", "文本差异",
-                file_a_name, text_a, file_b_name, text_b
-            ])
 
-    return diffs
+def compare_nodes_detail(nodes_a, nodes_b, file_a_name, file_b_name):
+    """详细对比两个 XML 节点，输出每条差异（带源/对比文件与值）"""
+    return list(iter_compare_nodes(nodes_a, nodes_b, file_a_name, file_b_name))
 
 
 def conpare_xml2(file_a, ile_b):
-    diff = main.diff_files(file_a, ile_b)
+    diff = xmldiff_main.diff_files(file_a, ile_b)
     formatter=formatting.XmlDiffFormatter()
     if diff:
         print(diff)
@@ -94,50 +139,587 @@ def compare_xml(file_a, file_b):
     except Exception as e:
         return {"error": f"解析失败: {e}"}
 
-    nodes_a = flatten_xml(root_a)
-    nodes_b = flatten_xml(root_b)
+    nodes_a = iter_flatten_xml(root_a)
+    nodes_b = iter_flatten_xml(root_b)
 
     return compare_nodes_detail(nodes_a, nodes_b, os.path.basename(file_a), os.path.basename(file_b))
 
 
-def main1(folder_a, folder_b, output_excel="xml_diff_result.xlsx"):
+# -------------------------- 流式对比（超大文件） --------------------------
+DEFAULT_STREAM_WINDOW = 100000
+
+
+def iter_stream_nodes(xml_file):
+    """
+    iterparse逐个产出 (xpath, 属性dict, 文本)，路径编号规则与flatten_xml相同（不含根节点）。
+    节点在结束时产出（后序），产出后立即从父节点移除，内存只与深度有关
+    """
+    # 栈元素：[节点, 路径, 子节点同名计数]
+    stack = []
+    for event, elem in ET.iterparse(xml_file, events=("start", "end")):
+        if event == "start":
+            if not stack:
+                stack.append([elem, "", {}])
+                continue
+            parent_path, tag_count = stack[-1][1], stack[-1][2]
+            index = tag_count.get(elem.tag, 0) + 1
+            tag_count[elem.tag] = index
+            stack.append([elem, f"{parent_path}/{elem.tag}[{index}]" if parent_path else f"{elem.tag}[{index}]", {}])
+            continue
+
+        _, path, _ = stack.pop()
+        if not stack:
+            break  # 根节点不参与对比
+        yield path, elem.attrib, (elem.text or "").strip()
+        # clear()会换新的attrib字典，已产出的属性字典仍然有效
+        elem.clear()
+        stack[-1][0].remove(elem)
+
+
+class _PendingSide:
+    """一侧已读出、还没在另一侧找到同路径节点的条目，按父路径分组，按读出顺序淘汰"""
+
+    def __init__(self):
+        self.entries = {}  # path -> (属性, 文本)
+        self.children = {}  # 父路径 -> {子路径: None}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, path, attrs, text):
+        self.entries[path] = (attrs, text)
+        self.children.setdefault(path.rpartition("/")[0], {})[path] = None
+
+    def pop(self, path):
+        entry = self.entries.pop(path, None)
+        if entry is not None:
+            parent = path.rpartition("/")[0]
+            siblings = self.children[parent]
+            del siblings[path]
+            if not siblings:
+                del self.children[parent]
+        return entry
+
+    def pop_oldest(self):
+        path = next(iter(self.entries))
+        self.pop(path)
+        return path
+
+    def pop_subtree(self, path):
+        """取出path下面（不含path本身）的全部未匹配路径"""
+        removed = []
+        todo = [path]
+        while todo:
+            for child in self.children.pop(todo.pop(), ()):
+                del self.entries[child]
+                removed.append(child)
+                todo.append(child)
+        return removed
+
+
+def iter_stream_diff(file_a, file_b, window=DEFAULT_STREAM_WINDOW, stats=None):
+    """
+    两个文件同步iterparse，边读边产出DiffRecord，结果集合与compare_xml一致。
+    - 两侧读到同一路径时立即比较；对不上的节点暂存，以后在另一侧出现时再比较（同级错位时重新对齐）
+    - 节点按后序产出：一个路径在两侧都结束后，其子树下仍未匹配的条目即为新增/删除，直接输出并释放
+    - 总是先读暂存较少的一侧，让落后的一侧追上；暂存总数超过window时按读出顺序淘汰最早的条目
+      （直接记为新增/删除，之后同路径节点会在另一侧被记为相反的一条），内存只与深度和window有关
+    stats: 可选dict，写入 peak_pending（暂存峰值）、evicted（淘汰条数）、nodes_a / nodes_b（读出节点数）
+    """
+    file_a_name = os.path.basename(file_a)
+    file_b_name = os.path.basename(file_b)
+    streams = [iter_stream_nodes(file_a), iter_stream_nodes(file_b)]
+    pending = [_PendingSide(), _PendingSide()]
+    unmatched = [
+        lambda path: deleted_record(path, file_a_name, file_b_name),
+        lambda path: added_record(path, file_a_name, file_b_name),
+    ]
+    counts = [0, 0]
+    peak_pending = 0
+    evicted = 0
+    turn = 0
+
+    while streams[0] is not None or streams[1] is not None:
+        # 选择读取的一侧：只剩一侧时读该侧；否则读暂存较少的一侧，相同时轮流
+        if streams[0] is None or streams[1] is None:
+            side = 0 if streams[0] is not None else 1
+        elif len(pending[0]) != len(pending[1]):
+            side = 0 if len(pending[0]) < len(pending[1]) else 1
+        else:
+            side = turn
+            turn = 1 - turn
+
+        node = next(streams[side], None)
+        if node is None:
+            streams[side] = None
+            continue
+        counts[side] += 1
+        path, attrs, text = node
+        other = 1 - side
+
+        entry = pending[other].pop(path)
+        if entry is None:
+            pending[side].add(path, attrs, text)
+            total = len(pending[0]) + len(pending[1])
+            peak_pending = max(peak_pending, total)
+            if total > window:
+                victim = 0 if len(pending[0]) >= len(pending[1]) else 1
+                yield unmatched[victim](pending[victim].pop_oldest())
+                evicted += 1
+            continue
+
+        # 两侧都已读到（即都已结束）该路径：比较节点本身，并输出其子树下剩余的未匹配条目
+        if side == 0:
+            yield from iter_node_diffs(path, attrs, text, entry[0], entry[1], file_a_name, file_b_name)
+        else:
+            yield from iter_node_diffs(path, entry[0], entry[1], attrs, text, file_a_name, file_b_name)
+        for index in (0, 1):
+            for leftover in pending[index].pop_subtree(path):
+                yield unmatched[index](leftover)
+
+    # 顶层节点（根节点的子节点）中未匹配的条目
+    for index in (0, 1):
+        for leftover in list(pending[index].entries):
+            yield unmatched[index](leftover)
+
+    if stats is not None:
+        stats.update(peak_pending=peak_pending, evicted=evicted, nodes_a=counts[0], nodes_b=counts[1])
+
+
+def xmldiff_records(file_a, file_b):
+    """xmldiff引擎：把编辑动作转换为与fast引擎相同结构的DiffRecord"""
+    file_a_name = os.path.basename(file_a)
+    file_b_name = os.path.basename(file_b)
+    records = []
+    for action in xmldiff_main.diff_files(file_a, file_b):
+        fields = action._asdict()
+        path = fields.pop("node", "")
+        detail = "，".join(f"{key}={value}" for key, value in fields.items())
+        records.append(DiffRecord(file_a_name, path, type(action).__name__, file_a_name, "", file_b_name, detail))
+    return records
+
+
+def diff_files_with_engine(file_a, file_b, engine="fast", window=DEFAULT_STREAM_WINDOW):
+    """按引擎对比两个文件，返回DiffRecord列表；解析失败抛出异常"""
+    if engine == "xmldiff":
+        return xmldiff_records(file_a, file_b)
+    if engine == "stream":
+        try:
+            return list(iter_stream_diff(file_a, file_b, window))
+        except ET.ParseError as e:
+            raise ValueError(f"解析失败: {e}")
+    result = compare_xml(file_a, file_b)
+    if isinstance(result, dict):
+        raise ValueError(result["error"])
+    return result
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """文件原始字节的哈希"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def canonical_digest(path):
+    """C14N规范化（去掉文本首尾空白、统一属性顺序和引号）后的哈希，只有空白/格式差异的文件哈希相同"""
+    canonical = ET.canonicalize(from_file=path, strip_text=True)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+# 子进程内的只读缓存连接，按缓存路径复用
+_cache_readers = {}
+
+
+def _cache_reader(cache_path):
+    reader = _cache_readers.get(cache_path)
+    if reader is None:
+        reader = _cache_readers[cache_path] = DiffCache(cache_path, readonly=True)
+    return reader
+
+
+def compare_pair(task):
+    """
+    对比一对同名文件，可在子进程中运行：先比原始字节哈希，再查差异缓存，再（可选）比规范化哈希，都不同才调用差异引擎
+    Returns: (状态, DiffRecord列表或错误信息, 两个文件总字节数, 缓存信息)
+        状态为 identical / canonical_identical / diffed / error；
+        缓存信息为None（未启用或无需缓存）或 (缓存键, 是否命中, 待写入的压缩记录)
+    """
+    file_a, file_b, options = task
+    try:
+        total_bytes = os.path.getsize(file_a) + os.path.getsize(file_b)
+        hash_a = file_digest(file_a)
+        hash_b = file_digest(file_b)
+        if hash_a == hash_b:
+            return "identical", None, total_bytes, None
+
+        key = None
+        engine = options["engine"]
+        if options["cache_path"]:
+            key_options = {"canonical": options["canonical"]}
+            if engine == "stream":
+                # window只影响stream引擎的结果，其他引擎改window不应使缓存失效
+                key_options["window"] = options["window"]
+            key = cache_key(hash_a, hash_b, engine, key_options)
+            entry = _cache_reader(options["cache_path"]).get(key)
+            if entry is not None:
+                status, payload = entry
+                records = None
+                if payload is not None:
+                    records = unpack_records(payload, DiffRecord, os.path.basename(file_a), os.path.basename(file_b))
+                return status, records, total_bytes, (key, True, None)
+
+        if options["canonical"] and canonical_digest(file_a) == canonical_digest(file_b):
+            status, records = "canonical_identical", None
+        else:
+            status, records = "diffed", diff_files_with_engine(file_a, file_b, engine, options["window"])
+        cache_info = None
+        if key is not None:
+            cache_info = (key, False, pack_records(records) if records is not None else None)
+        return status, records, total_bytes, cache_info
+    except Exception as e:
+        return "error", str(e), 0, None
+
+
+def iter_task_results(func, tasks, workers):
+    """按提交顺序返回每个任务的结果；workers>1时分散到进程池"""
+    if workers <= 1:
+        for task in tasks:
+            yield func(task)
+        return
+    chunksize = max(1, len(tasks) // (workers * 16))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(func, tasks, chunksize=chunksize)
+
+
+def iter_pair_results(tasks, workers):
+    """按提交顺序返回每对文件的对比结果；workers>1时分散到进程池"""
+    return iter_task_results(compare_pair, tasks, workers)
+
+
+def print_run_stats(stats, elapsed, total_bytes, cache=None):
+    compared = stats["identical"] + stats["canonical_identical"] + stats["diffed"] + stats["error"]
+    print(f"\n📊 对比统计：同名文件{compared}对，字节一致{stats['identical']}对，"
+          f"仅空白/格式差异{stats['canonical_identical']}对（均跳过diff），"
+          f"执行diff {stats['diffed']}对，解析错误{stats['error']}对；"
+          f"仅存在于A {stats['only_a']}个，仅存在于B {stats['only_b']}个")
+    if elapsed > 0:
+        print(f"⏱  耗时{elapsed:.2f}秒，{compared / elapsed:.1f}对/秒，{total_bytes / 1024 / 1024 / elapsed:.2f}MB/秒")
+    if cache is not None:
+        print(f"📦 差异缓存：命中{cache.hits}对，未命中{cache.misses}对，命中率{cache.hit_rate():.1%}，"
+              f"缓存占用{cache.total_bytes() / 1024 / 1024:.2f}MB")
+
+
+# 汇总表：每个文件一行，按差异类型计数（xmldiff引擎的动作类型计入「其他」）
+FAST_DIFF_TYPES = ("节点新增", "节点删除", "属性差异", "文本差异")
+SUMMARY_COLUMNS = ["文件名", "状态", "差异条数", *FAST_DIFF_TYPES, "其他"]
+PAIR_STATUS_LABELS = {
+    "identical": "字节一致",
+    "canonical_identical": "仅空白/格式差异",
+    "diffed": "有差异",
+    "error": "解析错误",
+}
+
+
+def summary_row(name, status_label, records=()):
+    counts = dict.fromkeys(FAST_DIFF_TYPES, 0)
+    other = 0
+    for record in records:
+        if record.diff_type in counts:
+            counts[record.diff_type] += 1
+        else:
+            other += 1
+    return [name, status_label, len(records), *counts.values(), other]
+
+
+def main1(folder_a, folder_b, output_excel="xml_diff_result.xlsx", workers=1, canonical=False, engine="fast",
+          window=DEFAULT_STREAM_WINDOW, cache_path=DEFAULT_CACHE_PATH, cache_max_mb=DEFAULT_MAX_MB,
+          export_formats=("xlsx",)):
+    """
+    差异明细边对比边分块写出（不在内存中累积全部行），xlsx超过行数上限自动分表；
+    每个文件的汇总行在对比过程中生成，最后写入「汇总」工作表
+    """
+    start = time.perf_counter()
     files_a = get_all_xml_files(folder_a)
     files_b = get_all_xml_files(folder_b)
 
-    all_diffs = []
     all_names = sorted(set(files_a.keys()) | set(files_b.keys()))
+    stats = dict.fromkeys(["identical", "canonical_identical", "diffed", "error", "only_a", "only_b"], 0)
+    summary_rows = []
 
-    # ✅ 用 tqdm 包裹循环，显示进度条
-    for name in tqdm(all_names, desc="对比进度", unit="文件",ncols=120):
-        # sleep(0.1)
-        if name not in files_a:
-            all_diffs.append([name, "(无匹配文件)", "", folder_a, "", folder_b, "仅存在于B"])
+    pair_names = [name for name in all_names if name in files_a and name in files_b]
+    options = {"canonical": canonical, "engine": engine, "window": window, "cache_path": cache_path}
+    tasks = [(files_a[name], files_b[name], options) for name in pair_names]
+    writer = RecordStreamWriter(output_excel, DIFF_COLUMNS, export_formats, sheet_name="差异明细")
+    # 缓存只由主进程写入，子进程只读查询
+    cache = DiffCache(cache_path, max_mb=cache_max_mb) if cache_path else None
+    # 同名文件对的结果按文件名顺序返回，与单侧文件一起按all_names顺序写出，报告顺序与原实现一致
+    results = iter_pair_results(tasks, workers)
+    try:
+        total_bytes = 0
+        # ✅ 用 tqdm 显示进度条
+        progress = tqdm(total=len(tasks), desc="对比进度", unit="文件", ncols=120)
+        for name in all_names:
+            if name not in files_a:
+                writer.write_row([name, "(无匹配文件)", "", folder_a, "", folder_b, "仅存在于B"])
+                summary_rows.append(summary_row(name, "仅存在于B"))
+                stats["only_b"] += 1
+                continue
+            if name not in files_b:
+                writer.write_row([name, "(无匹配文件)", "", folder_a, "仅存在于A", folder_b, ""])
+                summary_rows.append(summary_row(name, "仅存在于A"))
+                stats["only_a"] += 1
+                continue
+
+            status, diff, pair_bytes, cache_info = next(results)
+            progress.update(1)
+            stats[status] += 1
+            total_bytes += pair_bytes
+            if cache_info is not None:
+                key, hit, payload = cache_info
+                if hit:
+                    cache.hits += 1
+                    cache.touch(key)
+                else:
+                    cache.misses += 1
+                    cache.put(key, status, payload)
+            if status == "error":
+                print(f"❌ 对比失败「{name}」：{diff}")
+                writer.write_row([name, "(解析错误)", diff, folder_a, "", folder_b, ""])
+                summary_rows.append(summary_row(name, PAIR_STATUS_LABELS[status]))
+                continue
+
+            if diff:
+                writer.write_rows(diff)
+                summary_rows.append(summary_row(name, PAIR_STATUS_LABELS[status], diff))
+            else:
+                writer.write_row([name, "(一致)", "", folder_a, "", folder_b, ""])
+                label = PAIR_STATUS_LABELS[status] if status != "diffed" else "一致"
+                summary_rows.append(summary_row(name, label))
+        progress.close()
+
+        summary_rows.sort(key=lambda row: row[0])
+        writer.write_summary(SUMMARY_COLUMNS, summary_rows)
+        if cache is not None:
+            cache.flush()
+        print_run_stats(stats, time.perf_counter() - start, total_bytes, cache)
+    finally:
+        results.close()  # 关闭进程池
+        # 中断时也关闭输出，已写出的部分保留
+        writer.close()
+        if cache is not None:
+            cache.prune()  # 按--cache-max-mb淘汰
+            cache.close()
+
+    print(f"\n✅ 对比完成（引擎：{engine}），差异明细{writer.rows_written}行，"
+          f"结果已保存至：{'、'.join(writer.path(fmt) for fmt in writer.formats)}")
+
+
+# -------------------------- 多版本基线矩阵 --------------------------
+MATRIX_MODES = ("chain", "reference")
+
+
+def version_pairs(version_count, mode="chain", reference=0):
+    """chain：相邻版本依次对比；reference：每个版本都与参考版本对比。返回 [(旧版本序号, 新版本序号)]"""
+    if mode == "chain":
+        return [(index - 1, index) for index in range(1, version_count)]
+    return [(reference, index) for index in range(version_count) if index != reference]
+
+
+def flatten_file_map(xml_file):
+    """解析并展平一个文件为 {xpath: (属性, 文本)}"""
+    root = ET.parse(xml_file).getroot()
+    return {path: (attrs, text) for path, attrs, text in iter_flatten_xml(root)}
+
+
+def compare_versions(task):
+    """
+    同一文件名在各版本中的对比，可在子进程中运行；每个版本的文件只解析、展平一次，
+    内容完全相同的版本共用同一份展平结果
+    task: (各版本文件路径列表（缺失为None）, 版本对列表)
+    Returns: ({版本对: 状态}, {版本对: DiffRecord列表}, 解析次数, 逐对对比需要的解析次数, 读取字节数)
+        状态为 None（两版本都没有该文件）/ 新增 / 删除 / 一致 / 变更 / 解析错误
+    """
+    paths, pairs = task
+    digests = {}
+    total_bytes = 0
+    for index, path in enumerate(paths):
+        if path is not None:
+            try:
+                digests[index] = file_digest(path)
+                total_bytes += os.path.getsize(path)
+            except OSError as e:
+                digests[index] = e
+
+    maps = {}
+    maps_by_digest = {}
+    parsed = 0
+
+    def node_map(index):
+        if index not in maps:
+            digest = digests[index]
+            if isinstance(digest, Exception):
+                maps[index] = digest
+            elif digest in maps_by_digest:
+                maps[index] = maps_by_digest[digest]
+            else:
+                nonlocal parsed
+                parsed += 1
+                try:
+                    maps[index] = maps_by_digest[digest] = flatten_file_map(paths[index])
+                except Exception as e:
+                    maps[index] = maps_by_digest[digest] = e
+        return maps[index]
+
+    statuses = {}
+    records = {}
+    pairwise_parses = 0
+    for old, new in pairs:
+        if paths[old] is None:
+            statuses[(old, new)] = None if paths[new] is None else "新增"
+            continue
+        if paths[new] is None:
+            statuses[(old, new)] = "删除"
+            continue
+        if digests[old] == digests[new] and not isinstance(digests[old], Exception):
+            statuses[(old, new)] = "一致"
             continue
-        if name not in files_b:
-            all_diffs.append([name, "(无匹配文件)", "", folder_a, "仅存在于A", folder_b, ""])
+        pairwise_parses += 2
+        map_old = node_map(old)
+        map_new = node_map(new)
+        failed = map_old if isinstance(map_old, Exception) else map_new
+        if isinstance(failed, Exception):
+            statuses[(old, new)] = "解析错误"
+            records[(old, new)] = f"解析失败: {failed}"
             continue
+        pair_records = list(iter_compare_node_maps(
+            map_old, map_new, os.path.basename(paths[old]), os.path.basename(paths[new])
+        ))
+        statuses[(old, new)] = "变更" if pair_records else "一致"
+        if pair_records:
+            records[(old, new)] = pair_records
+    return statuses, records, parsed, pairwise_parses, total_bytes
+
+
+def version_labels(folders):
+    """版本名取文件夹名，重名时加序号"""
+    labels = []
+    for index, folder in enumerate(folders):
+        label = os.path.basename(os.path.normpath(folder)) or folder
+        labels.append(f"{label}#{index + 1}" if label in labels else label)
+    return labels
+
+
+def main_matrix(folders, output_excel="xml_version_matrix.xlsx", mode="chain", reference=0, workers=1,
+                export_formats=("xlsx",)):
+    """
+    多个基线文件夹的版本矩阵：每个文件每个版本只解析一次，按版本链或参考版本对比，
+    输出「差异明细」和「版本矩阵」（文件 × 版本的变化情况）两个工作表；
+    差异明细在每个文件对比完成后即分块写出，内存中只保留矩阵行（每个文件一行）
+    """
+    start = time.perf_counter()
+    labels = version_labels(folders)
+    files_by_version = [get_all_xml_files(folder) for folder in folders]
+    all_names = sorted(set().union(*files_by_version))
+    pairs = version_pairs(len(folders), mode, reference)
+    # 矩阵中每个版本列对应的版本对
+    column_pairs = {new: (old, new) for old, new in pairs}
+    first_label = "基线" if mode == "chain" else "参考"
+    first_column = 0 if mode == "chain" else reference
+
+    tasks = [([files.get(name) for files in files_by_version], pairs) for name in all_names]
+    matrix_rows = []
+    parsed_total = 0
+    pairwise_total = 0
+    total_bytes = 0
+    status_counts = {}
+    writer = RecordStreamWriter(output_excel, ["对比版本", *DIFF_COLUMNS], export_formats, sheet_name="差异明细",
+                                summary_sheet_name="版本矩阵")
+    results = iter_task_results(compare_versions, tasks, workers)
+    try:
+        for name, (paths, _), (statuses, records, parsed, pairwise_parses, file_bytes) in tqdm(
+                zip(all_names, tasks, results), total=len(tasks), desc="版本对比进度", unit="文件", ncols=120):
+            parsed_total += parsed
+            pairwise_total += pairwise_parses
+            total_bytes += file_bytes
+            row = [name]
+            for index in range(len(folders)):
+                if index == first_column:
+                    row.append(first_label if paths[index] is not None else "—")
+                    continue
+                pair = column_pairs[index]
+                status = statuses[pair]
+                status_counts[status] = status_counts.get(status, 0) + 1
+                if status is None:
+                    row.append("—")
+                elif status == "变更":
+                    row.append(f"变更({len(records[pair])})")
+                else:
+                    row.append(status)
+                pair_label = f"{labels[pair[0]]} → {labels[pair[1]]}"
+                if status == "变更":
+                    writer.write_rows([pair_label, *record] for record in records[pair])
+                elif status == "解析错误":
+                    writer.write_row([pair_label, name, "(解析错误)", records[pair], folders[pair[0]], "",
+                                      folders[pair[1]], ""])
+            matrix_rows.append(row)
 
-        diff = conpare_xml2(files_a[name], files_b[name])
-        
-        # if isinstance(diff, dict) and "error" in diff:
-        #     all_diffs.append([name, "(解析错误)", diff["error"], folder_a, "", folder_b, ""])
-        #     continue
+        elapsed = time.perf_counter() - start
+        print(f"\n📊 版本矩阵：{len(folders)}个版本，{len(all_names)}个文件，{len(pairs)}组版本对比（{mode}）；"
+              + "，".join(f"{status or '两版本均无'}{count}" for status, count in status_counts.items()))
+        print(f"⏱  耗时{elapsed:.2f}秒，读取{total_bytes / 1024 / 1024:.2f}MB；"
+              f"实际解析{parsed_total}次（逐对运行main1需解析{pairwise_total}次）")
+        writer.write_summary(["文件名", *labels], matrix_rows)
+    finally:
+        results.close()  # 关闭进程池
+        # 中断时也关闭输出，已写出的部分保留
+        writer.close()
+    print(f"\n✅ 版本矩阵对比完成，差异明细{writer.rows_written}行，"
+          f"结果已保存至：{'、'.join(writer.path(fmt) for fmt in writer.formats)}")
 
-        # if diff:
-        #     all_diffs.extend(diff)
-        # else:
-        #     all_diffs.append([name, "(一致)", "", folder_a, "", folder_b, ""])
 
-    # 输出 Excel
-    # df = pd.DataFrame(all_diffs, columns=[
-    #     "文件名", "节点路径/属性", "差异类型",
-    #     "源文件", "源文件值", "对比文件", "对比文件值"
-    # ])
-    # df.to_excel(output_excel, index=False)
-    # print(f"\n✅ 对比完成，结果已保存至：{output_excel}")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="按同名文件对比两个ICD基线文件夹中的XML")
+    parser.add_argument("--folder-a", default=r"D:\ahmu\文件\[公开] ICD CXF AS2.0_CFG1.1 B版\CXF ICD CXF AS2.0_CFG1.1 B版\Model System Elements",
+                        help="基线A文件夹")
+    parser.add_argument("--folder-b", default=r"D:\ahmu\文件\[公开] ICD CXF AS2.0_CFG1.3\CXF ICD CXF AS2.0_CFG1.3\Model System Elements",
+                        help="基线B文件夹")
+    parser.add_argument("--baselines", nargs="+", metavar="FOLDER",
+                        help="按版本顺序给出多个基线文件夹，生成版本矩阵（忽略--folder-a/--folder-b）")
+    parser.add_argument("--mode", choices=MATRIX_MODES, default="chain",
+                        help="版本矩阵对比方式：chain相邻版本依次对比（默认），reference都与参考版本对比")
+    parser.add_argument("--reference", type=int, default=0, help="reference模式下参考版本的序号（从0开始，默认：0）")
+    parser.add_argument("--workers", type=int, default=1, help="对比进程数（默认1；0表示使用全部CPU核数）")
+    parser.add_argument("--canonical", action="store_true",
+                        help="字节不同时再比较C14N规范化哈希，只有空白/格式差异的文件也跳过diff")
+    parser.add_argument("--engine", choices=ENGINES, default="fast",
+                        help="差异引擎：fast为按路径展平的线性对比（默认），stream为两文件同步流式对比（超大文件，内存有界），"
+                             "xmldiff为树编辑距离对比（慢）")
+    parser.add_argument("--window", type=int, default=DEFAULT_STREAM_WINDOW,
+                        help=f"stream引擎暂存的未匹配节点上限（默认：{DEFAULT_STREAM_WINDOW}）")
+    parser.add_argument("--output", help="结果输出路径（默认：xml_diff_result.xlsx；版本矩阵为xml_version_matrix.xlsx）")
+    parser.add_argument("--export-formats", nargs="+", choices=EXPORT_FORMATS, default=["xlsx"],
+                        help="差异明细导出格式，可多选（默认：xlsx；csv每块写完即落盘，中断后已写部分仍可用）")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="差异结果缓存路径（维护见 diff_cache.py）")
+    parser.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_MB,
+                        help=f"差异缓存大小上限，超出后按最近使用时间淘汰（默认：{DEFAULT_MAX_MB}MB）")
+    parser.add_argument("--no-cache", action="store_true", help="不查询、不写入差异结果缓存")
+    args = parser.parse_args(argv)
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    if args.baselines:
+        if len(args.baselines) < 2 or not 0 <= args.reference < len(args.baselines):
+            parser.error("--baselines至少需要两个文件夹，且--reference必须是其中一个版本的序号")
+        main_matrix(args.baselines, args.output or "xml_version_matrix.xlsx", args.mode, args.reference, workers,
+                    export_formats=args.export_formats)
+    else:
+        main1(args.folder_a, args.folder_b, args.output or "xml_diff_result.xlsx",
+              workers=workers,
+              canonical=args.canonical, engine=args.engine, window=args.window,
+              cache_path=None if args.no_cache else args.cache, cache_max_mb=args.cache_max_mb,
+              export_formats=args.export_formats)
 
 
 if __name__ == "__main__":
-    folder_a = r"D:\ahmu\文件\[公开] ICD CXF AS2.0_CFG1.1 B版\CXF ICD CXF AS2.0_CFG1.1 B版\Model System Elements"
-    folder_b = r"D:\ahmu\文件\[公开] ICD CXF AS2.0_CFG1.3\CXF ICD CXF AS2.0_CFG1.3\Model System Elements"
-    main1(folder_a, folder_b)
+    main()
@@ -0,0 +1,206 @@
+#  _*_ coding:utf-8 _*_
+"""
+XML基线差异结果的本地持久缓存（SQLite）：
+按 (A文件内容哈希, B文件内容哈希, 引擎, 选项) 保存对比结果，之前对比过的文件对直接返回结果；
+总大小超过上限时按最近使用时间淘汰（LRU）。
+差异记录不保存文件名，取出时按本次的文件名还原，内容相同但改了名的文件也能命中。
+
+命令行维护：
+    python diff_cache.py stats
+    python diff_cache.py prune [--max-mb 512] [--older-than-days 30]
+    python diff_cache.py clear
+"""
+import argparse
+import json
+import os
+import pickle
+import sqlite3
+import time
+import zlib
+
+DEFAULT_CACHE_PATH = os.environ.get(
+    "DIFF_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".diff_cache", "diff_cache.db")
+)
+DEFAULT_MAX_MB = 512
+
+
+def cache_key(hash_a, hash_b, engine, options):
+    """选项按键排序后序列化，保证同样的选项得到同样的键"""
+    return f"{hash_a}|{hash_b}|{engine}|{json.dumps(options, sort_keys=True)}"
+
+
+def pack_records(records):
+    """DiffRecord去掉三个文件名字段后压缩保存"""
+    rows = [(r.path, r.diff_type, r.source_value, r.target_value) for r in records]
+    return zlib.compress(pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def unpack_records(payload, record_type, file_a_name, file_b_name):
+    return [
+        record_type(file_a_name, path, diff_type, file_a_name, source_value, file_b_name, target_value)
+        for path, diff_type, source_value, target_value in pickle.loads(zlib.decompress(payload))
+    ]
+
+
+class DiffCache:
+    """
+    用法：
+        cache = DiffCache(path)
+        entry = cache.get(key)          # 命中返回 (状态, 压缩后的记录)，未命中返回None
+        cache.put(key, status, payload)
+        cache.prune()                   # 按max_mb淘汰，只由对比运行和prune命令显式调用
+        cache.close()
+    readonly=True 供子进程查询和stats命令使用，不建表、不写入；写入统一由主进程完成
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_mb=DEFAULT_MAX_MB, readonly=False):
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.readonly = readonly
+        self.hits = 0
+        self.misses = 0
+        self._touched = []
+        if readonly:
+            self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True) if os.path.exists(path) else None
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute('''
+        CREATE TABLE IF NOT EXISTS diff_cache (
+            cache_key TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            payload BLOB,
+            payload_size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_used REAL NOT NULL
+        )
+        ''')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_diff_cache_last_used ON diff_cache(last_used)")
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get(self, key):
+        if self.conn is None:
+            self.misses += 1
+            return None
+        try:
+            row = self.conn.execute("SELECT status, payload FROM diff_cache WHERE cache_key = ?", (key,)).fetchone()
+        except sqlite3.OperationalError:
+            row = None  # 只读打开时表可能还没建
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.touch(key)
+        return row
+
+    def touch(self, key):
+        """记录命中，最近使用时间在flush时批量更新"""
+        if not self.readonly:
+            self._touched.append((time.time(), key))
+
+    def put(self, key, status, payload):
+        now = time.time()
+        self.conn.execute('''
+        INSERT OR REPLACE INTO diff_cache (cache_key, status, payload, payload_size, created_at, last_used)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ''', (key, status, payload, len(payload or b""), now, now))
+
+    def flush(self):
+        if self.readonly or self.conn is None:
+            return
+        if self._touched:
+            self.conn.executemany("UPDATE diff_cache SET last_used = ? WHERE cache_key = ?", self._touched)
+            self._touched = []
+        self.conn.commit()
+
+    def total_bytes(self):
+        return self.conn.execute("SELECT COALESCE(SUM(payload_size), 0) FROM diff_cache").fetchone()[0]
+
+    def prune(self, max_bytes=None, older_than_seconds=None):
+        """先删除超过时限未使用的条目，再按最近使用时间从旧到新删除，直到总大小不超过上限；返回删除条数"""
+        self.flush()
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        removed = 0
+        if older_than_seconds is not None:
+            removed += self.conn.execute(
+                "DELETE FROM diff_cache WHERE last_used < ?", (time.time() - older_than_seconds,)
+            ).rowcount
+        excess = self.total_bytes() - max_bytes
+        if excess > 0:
+            victims = []
+            for key, size in self.conn.execute("SELECT cache_key, payload_size FROM diff_cache ORDER BY last_used"):
+                victims.append((key,))
+                excess -= size
+                if excess <= 0:
+                    break
+            self.conn.executemany("DELETE FROM diff_cache WHERE cache_key = ?", victims)
+            removed += len(victims)
+        self.conn.commit()
+        return removed
+
+    def clear(self):
+        self.conn.execute("DELETE FROM diff_cache")
+        self.conn.commit()
+        self.conn.execute("VACUUM")
+
+    def close(self):
+        if self.conn is None:
+            return
+        self.flush()
+        self.conn.close()
+        self.conn = None
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM diff_cache").fetchone()[0]
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="XML差异结果缓存维护")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="缓存数据库路径")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("stats", help="显示条目数和占用大小")
+    prune_parser = subparsers.add_parser("prune", help="按大小上限/未使用时长淘汰条目")
+    prune_parser.add_argument("--max-mb", type=float, default=DEFAULT_MAX_MB, help=f"大小上限（默认：{DEFAULT_MAX_MB}MB）")
+    prune_parser.add_argument("--older-than-days", type=float, help="删除超过这么多天未使用的条目")
+    subparsers.add_parser("clear", help="清空缓存")
+    args = parser.parse_args(argv)
+
+    if args.command == "stats":
+        # 只读打开：查看统计不应按默认上限淘汰条目
+        if not os.path.exists(args.cache):
+            print(f"📦 缓存「{args.cache}」不存在")
+            return
+        with DiffCache(args.cache, readonly=True) as cache:
+            try:
+                count, total_bytes = cache.count(), cache.total_bytes()
+            except sqlite3.OperationalError:
+                count, total_bytes = 0, 0  # 库文件存在但还没建表
+            print(f"📦 缓存「{args.cache}」：{count}条，{total_bytes / 1024 / 1024:.2f}MB")
+        return
+
+    with DiffCache(args.cache) as cache:
+        if args.command == "prune":
+            older = args.older_than_days * 86400 if args.older_than_days is not None else None
+            removed = cache.prune(int(args.max_mb * 1024 * 1024), older)
+            print(f"🧹 已淘汰{removed}条缓存")
+        else:
+            cache.clear()
+            print("🧹 缓存已清空")
+        print(f"📦 缓存「{args.cache}」：{cache.count()}条，{cache.total_bytes() / 1024 / 1024:.2f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#  _*_ coding:utf-8 _*_
+"""
+消息名规范化与模糊匹配：
+- normalize_name：按配置的规则规范化（大小写、空白、分隔符、后缀）
+- TrigramIndex：三元组倒排索引，查询时按前缀过滤只对可能达到最低相似度的候选计算相似度（Dice系数），
+  避免 N×M 两两比较
+用法：
+    index = TrigramIndex(target_names, normalizer)
+    match, score = index.best_match("Msg_Foo ")
+"""
+import math
+import re
+from collections import Counter
+
+# 规范化规则（可组合）：casefold 忽略大小写；space 去掉首尾空白并合并内部空白；
+# separators 把空白/下划线/连字符/点统一为下划线；suffix 去掉 suffix_pattern 匹配的后缀
+NORMALIZE_RULES = ("casefold", "space", "separators", "suffix")
+DEFAULT_NORMALIZE_RULES = ("casefold", "space", "separators")
+DEFAULT_SUFFIX_PATTERN = r"(_(msg|message|v\d+|rev[a-z0-9]*))+$"
+
+_SPACE_RE = re.compile(r"\s+")
+_SEPARATOR_RE = re.compile(r"[\s_\-.]+")
+
+
+def build_normalizer(rules=DEFAULT_NORMALIZE_RULES, suffix_pattern=DEFAULT_SUFFIX_PATTERN):
+    """返回 name -> 规范化名称 的函数；规则按 NORMALIZE_RULES 的顺序执行"""
+    unknown = set(rules) - set(NORMALIZE_RULES)
+    if unknown:
+        raise ValueError(f"未知的规范化规则：{'/'.join(sorted(unknown))}（支持：{'/'.join(NORMALIZE_RULES)}）")
+    rules = set(rules)
+    suffix_re = re.compile(suffix_pattern, re.IGNORECASE) if "suffix" in rules else None
+
+    def normalize_name(name):
+        name = str(name)
+        if "casefold" in rules:
+            name = name.casefold()
+        if "space" in rules:
+            name = _SPACE_RE.sub(" ", name.strip())
+        if "separators" in rules:
+            name = _SEPARATOR_RE.sub("_", name).strip("_")
+        if suffix_re is not None:
+            name = suffix_re.sub("", name)
+        return name
+
+    return normalize_name
+
+
+def trigrams(text):
+    """首尾补空格后的三元组集合，短名称也至少有一个三元组"""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def dice(grams_a, grams_b):
+    if not grams_a or not grams_b:
+        return 0.0
+    return 2 * len(grams_a & grams_b) / (len(grams_a) + len(grams_b))
+
+
+class TrigramIndex:
+    """
+    三元组倒排索引（三元组 -> 名称序号列表）。
+    查询按前缀过滤生成候选：Dice ≥ min_score 的名称与查询至少共享 ⌈min_score·|A|/(2-min_score)⌉ 个三元组，
+    因此必然出现在查询最稀有的 |A| - 该值 + 1 个三元组的倒排表中；所有名称共有的高频三元组（如公共前缀）
+    排在最后，通常不会展开。候选再按共享次数和三元组个数过滤，剩下的计算精确的Dice系数。
+    相似度不低于min_score的最佳匹配与两两比较结果一致；低于min_score时返回候选中最好的一个（可能不是全局最佳）。
+    """
+
+    PREFIX_EXTRA = 1
+
+    def __init__(self, names, normalizer=None, min_score=0.85):
+        if not 0 < min_score <= 1:
+            raise ValueError(f"min_score必须在(0, 1]之间：{min_score}")
+        self.normalizer = normalizer or build_normalizer()
+        self.min_score = min_score
+        self.names = []
+        self.keys = []
+        self.grams = []
+        self.exact = {}
+        self.postings = {}
+        self.candidates_scanned = 0
+        for name in names:
+            key = self.normalizer(name)
+            if key in self.exact:
+                continue  # 规范化后相同的名称只保留第一个
+            name_id = len(self.names)
+            self.exact[key] = name_id
+            self.names.append(name)
+            self.keys.append(key)
+            grams = trigrams(key)
+            self.grams.append(grams)
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(name_id)
+
+    def __len__(self):
+        return len(self.names)
+
+    def best_match(self, name):
+        """返回 (最相似的原始名称, 相似度)；规范化后完全相同为1.0，没有任何候选时返回 (None, 0.0)"""
+        key = self.normalizer(name)
+        name_id = self.exact.get(key)
+        if name_id is not None:
+            return self.names[name_id], 1.0
+
+        query_grams = trigrams(key)
+        size = len(query_grams)
+        ratio = self.min_score / (2 - self.min_score)
+        min_overlap = math.ceil(size * ratio - 1e-9)
+        ordered = sorted(
+            (self.postings.get(gram, ()) for gram in query_grams),
+            key=len
+        )[:size - min_overlap + 1 + self.PREFIX_EXTRA]
+        # 多展开PREFIX_EXTRA个倒排表后，候选在已展开的倒排表中至少要出现
+        # min_overlap - (未展开的三元组数) 次，用计数先筛掉大部分候选，再计算精确相似度
+        shared = Counter()
+        for posting in ordered:
+            shared.update(posting)
+        min_shared = min_overlap - (size - len(ordered))
+        candidates = [candidate for candidate, count in shared.items() if count >= min_shared]
+        self.candidates_scanned += len(candidates)
+
+        # 长度过滤：Dice ≥ t 要求 t/(2-t) ≤ |B|/|A| ≤ (2-t)/t
+        min_size = size * ratio - 1e-9
+        max_size = size / ratio + 1e-9
+        best_name = None
+        best_score = 0.0
+        for candidate in candidates:
+            candidate_grams = self.grams[candidate]
+            if not min_size <= len(candidate_grams) <= max_size:
+                continue
+            score = dice(query_grams, candidate_grams)
+            if score > best_score:
+                best_name, best_score = self.names[candidate], score
+        return best_name, best_score
@@ -1,12 +1,143 @@
-import pandas as pd
-
-# === 1. 读取原始 Excel 文件 ===
-input_file = r"D:\01_PROJECT\OHMS\[公开] 机载健康管理系统C版模型技术要求及仿真模型校验要求\ECMto631\附件2-CXF飞机机载健康管理系统C版蓝标模型接口表（MoICD）.xlsx"   # 修改为你的 Excel 文件路径
-df = pd.read_excel(input_file,sheet_name="BUS")
-# === 2. 去重操作 ===
-# 根据 io、port、messagename 三个字段去重，只保留唯一的组合
-df_unique = df.drop_duplicates(subset=["I/O", "PhysicalPort", "Word_Name/Message_Name"])
-# === 3. 输出到新的 Excel 文件 ===
-output_file = r"output_unique.xlsx"  # 输出路径
-df_unique.to_excel(output_file, index=False)
-print(f"✅ 已输出去重后的结果到: {output_file}")
\ No newline at end of file
+#  _*_ coding:utf-8 _*_
+"""
+按键列对多个工作簿/工作表的行去重（默认按 I/O + PhysicalPort + Word_Name/Message_Name 对 MoICD 的 BUS 表去重）：
+- 经列式缓存（workbook_cache）只读取键列和输出列
+- 逐行把键元组放进哈希集合，第一次出现的行流式写出，不在内存中保留整张去重结果
+- 记录每个键合并掉了哪些源行（工作簿/工作表/Excel行号），写到「合并明细」工作表
+- 报告每个工作表和整体的读取行数、唯一键数与吞吐量
+用法：
+    python get_port_message_name.py
+    python get_port_message_name.py --input MoICD.xlsx EoICD.xlsx --sheets BUS A429 --columns I/O PhysicalPort Word_Name/Message_Name Guid
+"""
+import argparse
+import os
+import sys
+import time
+
+from result_export import EXPORT_FORMATS, RecordStreamWriter
+from workbook_cache import load_sheet
+
+DEFAULT_INPUT = r"D:\01_PROJECT\OHMS\[公开] 机载健康管理系统C版模型技术要求及仿真模型校验要求\ECMto631\附件2-CXF飞机机载健康管理系统C版蓝标模型接口表（MoICD）.xlsx"
+DEFAULT_SHEETS = ["BUS"]
+DEFAULT_KEYS = ["I/O", "PhysicalPort", "Word_Name/Message_Name"]
+DEFAULT_OUTPUT = "output_unique.xlsx"
+MERGE_COLUMNS = ["保留行", "重复次数", "被合并的行"]
+
+
+def column_values(series):
+    # 空值统一为None，与drop_duplicates一样把所有空值视为相同（NaN != NaN，直接放进元组会被当成不同的键）；
+    # 整列一次转成Python列表，比逐行itertuples（尤其是pyarrow字符串列）快得多
+    series = series.astype(object)
+    return series.where(series.notna(), None).tolist()
+
+
+def row_location(sources, location):
+    source_index, row_number = location
+    xlsx_path, sheet_name = sources[source_index]
+    return f"{os.path.basename(xlsx_path)}/{sheet_name}:{row_number}"
+
+
+def dedup_workbooks(inputs, sheets, keys, columns, output_path, formats=("xlsx",), use_cache=True):
+    """
+    columns为None时输出第一个成功读取的工作表的全部列，之后的工作表按这些列对齐（缺列留空）
+    返回 (读取行数, 唯一键数, 各格式的输出路径)；所有工作表都被跳过、没有写出任何结果时抛出ValueError
+    """
+    sources = [(xlsx_path, sheet_name) for xlsx_path in inputs for sheet_name in sheets]
+    # 键 -> [保留行位置, 被合并的行位置列表]；位置为 (sources序号, Excel行号)，格式化推迟到写合并明细时
+    seen = {}
+    writer = None
+    out_columns = list(columns) if columns is not None else None
+    total_rows = 0
+    start = time.perf_counter()
+
+    try:
+        for source_index, (xlsx_path, sheet_name) in enumerate(sources):
+            label = f"{os.path.basename(xlsx_path)}/{sheet_name}"
+            load_start = time.perf_counter()
+            needed = None if out_columns is None else list(dict.fromkeys(keys + out_columns))
+            try:
+                df = load_sheet(xlsx_path, sheet_name=sheet_name, columns=needed, use_cache=use_cache, report=None)
+            except (FileNotFoundError, ValueError) as e:
+                print(f"⚠️ 跳过「{label}」：{e}")
+                continue
+            load_seconds = time.perf_counter() - load_start
+
+            missing_keys = [col for col in keys if col not in df.columns]
+            if missing_keys:
+                print(f"⚠️ 跳过「{label}」：缺少键列 {'、'.join(missing_keys)}")
+                continue
+            if out_columns is None:
+                out_columns = [str(col) for col in df.columns]
+            missing_columns = [col for col in out_columns if col not in df.columns]
+            if missing_columns:
+                print(f"⚠️ 「{label}」缺少输出列 {'、'.join(missing_columns)}，这些列留空")
+            if writer is None:
+                writer = RecordStreamWriter(output_path, out_columns, formats, sheet_name="Sheet1",
+                                            summary_sheet_name="合并明细")
+
+            # 输出列在前，不输出的键列附在后面；缺少的输出列由reindex补为空值
+            frame_columns = out_columns + [col for col in keys if col not in out_columns]
+            frame = df.reindex(columns=frame_columns)
+            values = {col: column_values(frame[col]) for col in frame_columns}
+            rows = zip(*(values[col] for col in out_columns))
+            row_keys = zip(*(values[col] for col in keys))
+
+            new_keys = 0
+            # Excel行号：表头占第1行，数据从第2行开始
+            for row_number, (key, row) in enumerate(zip(row_keys, rows), start=2):
+                entry = seen.get(key)
+                if entry is None:
+                    seen[key] = [(source_index, row_number), None]
+                    writer.write_row(row)
+                    new_keys += 1
+                elif entry[1] is None:
+                    entry[1] = [(source_index, row_number)]
+                else:
+                    entry[1].append((source_index, row_number))
+            total_rows += len(frame)
+            print(f"📄 「{label}」：{len(frame)}行，新增唯一键{new_keys}个（读取{load_seconds:.2f}秒）")
+
+        if writer is None:
+            raise ValueError("没有可去重的工作表，未生成输出文件")
+
+        merge_rows = [
+            list(key) + [row_location(sources, kept), len(collapsed) + 1,
+                         "、".join(row_location(sources, location) for location in collapsed)]
+            for key, (kept, collapsed) in seen.items()
+            if collapsed is not None
+        ]
+        writer.write_summary(keys + MERGE_COLUMNS, merge_rows)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"⏱  共读取{total_rows}行，唯一键{len(seen)}个，合并重复行{total_rows - len(seen)}行（{len(merge_rows)}个键有重复）；"
+          f"耗时{elapsed:.2f}秒，{total_rows / max(elapsed, 1e-9):.0f}行/秒")
+    return total_rows, len(seen), [writer.path(fmt) for fmt in writer.formats]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="按键列对多个工作簿/工作表去重，并记录被合并的源行")
+    parser.add_argument("--input", nargs="+", default=[DEFAULT_INPUT], help="工作簿路径，可多个（默认：MoICD接口表）")
+    parser.add_argument("--sheets", nargs="+", default=DEFAULT_SHEETS, help="每个工作簿要读取的工作表（默认：BUS）")
+    parser.add_argument("--keys", nargs="+", default=DEFAULT_KEYS, help=f"去重键列（默认：{' '.join(DEFAULT_KEYS)}）")
+    parser.add_argument("--columns", nargs="+",
+                        help="输出列（默认：第一个工作表的全部列）；只读取键列和输出列")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help=f"输出路径（默认：{DEFAULT_OUTPUT}）")
+    parser.add_argument("--export-formats", nargs="+", choices=EXPORT_FORMATS, default=["xlsx"],
+                        help="导出格式，可多选（默认：xlsx）")
+    parser.add_argument("--no-cache", action="store_true", help="不使用工作簿列式缓存")
+    args = parser.parse_args(argv)
+
+    try:
+        _, _, outputs = dedup_workbooks(args.input, args.sheets, args.keys, args.columns, args.output,
+                                        args.export_formats, use_cache=not args.no_cache)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ 已输出去重后的结果到: {'、'.join(outputs)}")
+
+
+if __name__ == "__main__":
+    main()
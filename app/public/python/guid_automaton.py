@@ -0,0 +1,132 @@
+#  _*_ coding:utf-8 _*_
+"""
+多模式GUID查找（--substring-match）：对全部GUID只建一次自动机，
+在属性值和节点文本中一遍扫描找出所有内嵌的GUID（如 ref="a;b;c"、{GUID}、ID_GUID、正文中的GUID）。
+- GUID全部是标准8-4-4-4-12形状时，用一个正则找出满足边界的GUID形状片段再查集合（线性扫描，实测比pyahocorasick略快）
+- 其余形状的关键字：安装了pyahocorasick时使用其C实现的Aho-Corasick自动机，否则使用纯Python的Aho-Corasick自动机
+边界规则：GUID前后紧邻的字符不能是ASCII字母或数字，避免命中更长的十六进制串中的一段；区分大小写，与整值匹配一致。
+用法：
+    automaton = GuidAutomaton(guid_info.keys())
+    automaton.find("GUID_A;GUID_B")  # ["GUID_A", "GUID_B"]
+"""
+import re
+
+try:
+    import ahocorasick
+    HAS_PYAHOCORASICK = True
+except ImportError:
+    HAS_PYAHOCORASICK = False
+
+from guid_prefilter import GUID_KEY_RE
+
+# 匹配位置类型，序号即数据库match_types表的id
+MATCH_ATTRIBUTE = "attribute"                      # 属性值整体等于GUID（原整值匹配）
+MATCH_ATTRIBUTE_SUBSTRING = "attribute_substring"  # GUID内嵌在属性值中
+MATCH_TEXT = "text"                                # GUID出现在节点文本中
+MATCH_TYPES = (MATCH_ATTRIBUTE, MATCH_ATTRIBUTE_SUBSTRING, MATCH_TEXT)
+MATCH_TYPE_IDS = {match_type: i for i, match_type in enumerate(MATCH_TYPES)}
+# 文本匹配在映射表中的属性名（真实属性名不可能以#开头）
+TEXT_ATTRIBUTE = "#text"
+
+BACKENDS = ("pyahocorasick", "regex", "python")
+WORD_CHARS = frozenset("0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz")
+GUID_TOKEN_RE = re.compile(r"(?<![0-9A-Za-z])" + GUID_KEY_RE.pattern + r"(?![0-9A-Za-z])")
+
+
+def choose_backend(keys):
+    if all(GUID_KEY_RE.fullmatch(key) for key in keys if key):
+        return "regex"
+    return "pyahocorasick" if HAS_PYAHOCORASICK else "python"
+
+
+def at_boundary(text, start, end):
+    return (start == 0 or text[start - 1] not in WORD_CHARS) and (end == len(text) or text[end] not in WORD_CHARS)
+
+
+class PythonAhoCorasick:
+    """纯Python的Aho-Corasick自动机：goto为每个状态一个字典，output_link指向后缀中最近的输出状态"""
+
+    def __init__(self, keys):
+        self.goto = [{}]
+        self.output = [None]
+        for key in keys:
+            state = 0
+            for ch in key:
+                next_state = self.goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][ch] = next_state
+                    self.goto.append({})
+                    self.output.append(None)
+                state = next_state
+            self.output[state] = key
+
+        # 按层（BFS）计算失败链接
+        self.fail = [0] * len(self.goto)
+        self.output_link = [0] * len(self.goto)
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for ch, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(ch, 0)
+                self.fail[next_state] = target
+                self.output_link[next_state] = target if self.output[target] is not None else self.output_link[target]
+
+    def iter(self, text):
+        """逐个产出 (结束位置, 关键字)，包括相互重叠的命中"""
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        output_link = self.output_link
+        state = 0
+        for end, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            hit = state if output[state] is not None else output_link[state]
+            while hit:
+                yield end, output[hit]
+                hit = output_link[hit]
+
+
+class GuidAutomaton:
+
+    def __init__(self, guid_keys, backend=None):
+        keys = [key for key in dict.fromkeys(guid_keys) if key]
+        self.keys = frozenset(keys)
+        if backend is None:
+            backend = choose_backend(keys)
+        if backend not in BACKENDS:
+            raise ValueError(f"未知的自动机实现：{backend}")
+        self.backend = backend
+
+        if backend == "pyahocorasick":
+            if not HAS_PYAHOCORASICK:
+                raise ValueError("未安装pyahocorasick")
+            self._automaton = ahocorasick.Automaton()
+            for key in keys:
+                self._automaton.add_word(key, key)
+            if keys:
+                self._automaton.make_automaton()
+        elif backend == "regex":
+            if not all(GUID_KEY_RE.fullmatch(key) for key in keys):
+                raise ValueError("regex实现要求全部GUID为8-4-4-4-12形状")
+            self._automaton = None
+        else:
+            self._automaton = PythonAhoCorasick(keys)
+
+    def find(self, text):
+        """返回text中满足边界规则的GUID（去重，按首次出现顺序）"""
+        if not text or not self.keys:
+            return []
+        if self.backend == "regex":
+            keys = self.keys
+            return list(dict.fromkeys(token for token in GUID_TOKEN_RE.findall(text) if token in keys))
+        found = {}
+        for end, key in self._automaton.iter(text):
+            if key not in found and at_boundary(text, end - len(key) + 1, end + 1):
+                found[key] = None
+        return list(found)
@@ -0,0 +1,545 @@
+#  _*_ coding:utf-8 _*_
+"""
+xml_guid_mapping.db 批量写入层：
+整个运行期间只打开一次连接（WAL + 调优pragma），缓存多个XML文件的行，
+按大事务批量提交；批量导入期间删除索引，导入完成后统一重建，并统计各表写入速率。
+
+映射表为规范化结构：guid_file_match 只保存 (文件id, guid, 节点路径id, 属性id, 匹配位置类型)，
+文件id即xml_metadata.id，节点路径和属性名分别驻留在node_paths/match_attributes表中，
+匹配位置类型（整值/属性值内嵌/节点文本，见guid_automaton.MATCH_TYPES）对应match_types表；
+主键即「文件→GUID」的覆盖索引，idx_match_guid为「GUID→文件」的覆盖索引（WITHOUT ROWID表的二级索引自带主键列）。
+旧版按整行保存路径字符串的guid_xml_mapping表在init_database时自动迁移，并保留同名视图兼容旧查询。
+
+命令行迁移旧库并对比迁移前后的大小与查询耗时：
+    python guid_mapping_db.py migrate --db xml_guid_mapping.db
+"""
+import argparse
+import os
+import random
+import sqlite3
+import logging
+import time
+from datetime import datetime
+
+from guid_automaton import MATCH_ATTRIBUTE, MATCH_TYPE_IDS, MATCH_TYPES
+
+logger = logging.getLogger("ExcelToXMLChecker")
+
+# 索引定义（init_database与批量导入共用，导入期间先删除、导入完成后重建）
+INDEX_DDL = {
+    "idx_match_guid": "CREATE INDEX IF NOT EXISTS idx_match_guid ON guid_file_match(guid, file_id)",
+    "idx_xml_name": "CREATE INDEX IF NOT EXISTS idx_xml_name ON xml_metadata(xml_file_name)",
+    "idx_excel_guid": "CREATE INDEX IF NOT EXISTS idx_excel_guid ON excel_metadata(guid)",
+}
+
+# 增量扫描所需的文件状态列（旧库通过ALTER TABLE补齐）
+XML_STATE_COLUMNS = {
+    "file_size": "INTEGER",
+    "file_mtime_ns": "INTEGER",
+    "content_hash": "TEXT",
+}
+
+BULK_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",  # 64MB页缓存
+    "PRAGMA mmap_size=268435456",
+)
+
+
+MAPPING_DDL = (
+    '''
+    CREATE TABLE IF NOT EXISTS node_paths (
+        id INTEGER PRIMARY KEY,
+        node_path TEXT NOT NULL UNIQUE
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS match_attributes (
+        id INTEGER PRIMARY KEY,
+        attribute TEXT NOT NULL UNIQUE
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS match_types (
+        id INTEGER PRIMARY KEY,
+        match_type TEXT NOT NULL UNIQUE
+    )
+    ''',
+    # 同一GUID在同一文件的同一节点路径/属性上只记一行；按文件id聚簇，批量导入时文件id递增，只在B树末尾追加
+    '''
+    CREATE TABLE IF NOT EXISTS guid_file_match (
+        file_id INTEGER NOT NULL REFERENCES xml_metadata(id),
+        guid TEXT NOT NULL,
+        node_path_id INTEGER NOT NULL REFERENCES node_paths(id),
+        attribute_id INTEGER NOT NULL REFERENCES match_attributes(id),
+        match_type INTEGER NOT NULL DEFAULT 0 REFERENCES match_types(id),
+        PRIMARY KEY (file_id, guid, node_path_id, attribute_id)
+    ) WITHOUT ROWID
+    ''',
+)
+
+# 兼容旧查询的视图（列与旧版guid_xml_mapping表一致，不含自增id，末尾增加match_type）
+MAPPING_VIEW_DDL = '''
+CREATE VIEW IF NOT EXISTS guid_xml_mapping AS
+SELECT m.guid AS guid,
+       f.xml_file_path AS xml_file_path,
+       p.node_path AS match_node_path,
+       a.attribute AS match_attribute,
+       t.match_type AS match_type
+FROM guid_file_match m
+JOIN xml_metadata f ON f.id = m.file_id
+JOIN node_paths p ON p.id = m.node_path_id
+JOIN match_attributes a ON a.id = m.attribute_id
+JOIN match_types t ON t.id = m.match_type
+'''
+
+# 清空数据库时按依赖顺序删除的表（旧库可能仍是旧版guid_xml_mapping表）；
+# GUID快照也一并清空，避免全量重建后的增量运行拿旧快照计算GUID增减
+DATA_TABLES = ("guid_xml_mapping", "guid_file_match", "node_paths", "match_attributes", "xml_metadata", "excel_metadata",
+               "excel_guid_snapshot")
+
+
+def object_type(conn, name):
+    """返回 'table' / 'view' / None"""
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+
+def clear_tables(conn):
+    """删除全部映射数据，保留表结构（调用方负责提交）"""
+    for table in DATA_TABLES:
+        if object_type(conn, table) == "table":
+            conn.execute(f"DELETE FROM {table}")
+
+
+def ensure_mapping_schema(conn):
+    """
+    创建规范化映射表和兼容视图；旧库存在guid_xml_mapping表时先迁移数据。
+    需在xml_metadata建表之后调用。返回迁移统计（无需迁移时为None）
+    """
+    migration = None
+    if object_type(conn, "guid_xml_mapping") == "table":
+        migration = migrate_legacy_mapping(conn)
+    for ddl in MAPPING_DDL:
+        conn.execute(ddl)
+    conn.executemany("INSERT OR IGNORE INTO match_types (id, match_type) VALUES (?, ?)", enumerate(MATCH_TYPES))
+    # 没有匹配位置类型的规范化库：补列（已有行都是整值匹配），并重建视图
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(guid_file_match)")}
+    if "match_type" not in columns:
+        conn.execute("ALTER TABLE guid_file_match ADD COLUMN match_type INTEGER NOT NULL DEFAULT "
+                     f"{MATCH_TYPE_IDS[MATCH_ATTRIBUTE]} REFERENCES match_types(id)")
+        conn.execute("DROP VIEW IF EXISTS guid_xml_mapping")
+    conn.execute(MAPPING_VIEW_DDL)
+    conn.commit()
+    return migration
+
+
+def migrate_legacy_mapping(conn):
+    """
+    把旧版guid_xml_mapping表（每行保存完整文件路径和节点路径字符串、无唯一约束）迁移到规范化结构，
+    完全重复的行合并为一行；迁移后删除旧表，由同名视图代替。返回 {"legacy_rows", "rows", "seconds"}
+    """
+    start = time.perf_counter()
+    for ddl in MAPPING_DDL:
+        conn.execute(ddl)
+    legacy_rows = conn.execute("SELECT COUNT(*) FROM guid_xml_mapping").fetchone()[0]
+
+    # 映射行引用的文件正常都已在xml_metadata中，缺失的补一条只有路径和文件名的记录
+    orphan_paths = [row[0] for row in conn.execute('''
+    SELECT DISTINCT m.xml_file_path FROM guid_xml_mapping m
+    WHERE NOT EXISTS (SELECT 1 FROM xml_metadata f WHERE f.xml_file_path = m.xml_file_path)
+    ''')]
+    parse_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    conn.executemany(
+        "INSERT INTO xml_metadata (xml_file_path, xml_file_name, parse_time) VALUES (?, ?, ?)",
+        [(path, os.path.basename(path), parse_time) for path in orphan_paths]
+    )
+
+    conn.execute("INSERT OR IGNORE INTO node_paths (node_path) SELECT DISTINCT match_node_path FROM guid_xml_mapping")
+    conn.execute("INSERT OR IGNORE INTO match_attributes (attribute) SELECT DISTINCT match_attribute FROM guid_xml_mapping")
+    conn.execute('''
+    INSERT OR IGNORE INTO guid_file_match (file_id, guid, node_path_id, attribute_id)
+    SELECT f.id, m.guid, p.id, a.id
+    FROM guid_xml_mapping m
+    JOIN xml_metadata f ON f.xml_file_path = m.xml_file_path
+    JOIN node_paths p ON p.node_path = m.match_node_path
+    JOIN match_attributes a ON a.attribute = m.match_attribute
+    ORDER BY f.id
+    ''')
+    rows = conn.execute("SELECT COUNT(*) FROM guid_file_match").fetchone()[0]
+    # 旧表的idx_guid/idx_xml_path随表一起删除；视图由ensure_mapping_schema在补齐match_types后创建
+    conn.execute("DROP TABLE guid_xml_mapping")
+    conn.commit()
+    seconds = time.perf_counter() - start
+    logger.info(f"映射表已迁移为规范化结构：旧表{legacy_rows}行 → {rows}行（合并重复{legacy_rows - rows}行，"
+                f"补录文件{len(orphan_paths)}个），耗时{seconds:.2f}秒")
+    return {"legacy_rows": legacy_rows, "rows": rows, "seconds": seconds}
+
+
+def create_indexes(conn):
+    for ddl in INDEX_DDL.values():
+        conn.execute(ddl)
+    conn.commit()
+
+
+def drop_indexes(conn):
+    for name in INDEX_DDL:
+        conn.execute(f"DROP INDEX IF EXISTS {name}")
+    conn.commit()
+
+
+def ensure_incremental_schema(conn):
+    """补齐xml_metadata的文件状态列，并创建上次运行的Excel GUID快照表"""
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(xml_metadata)")}
+    for column, column_type in XML_STATE_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE xml_metadata ADD COLUMN {column} {column_type}")
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS excel_guid_snapshot (
+        guid TEXT PRIMARY KEY
+    )
+    ''')
+    conn.commit()
+
+
+# -------------------------- 增量扫描辅助 --------------------------
+def load_file_states(conn):
+    """返回 {xml_file_path: (file_size, file_mtime_ns, content_hash)}"""
+    return {
+        row[0]: (row[1], row[2], row[3])
+        for row in conn.execute("SELECT xml_file_path, file_size, file_mtime_ns, content_hash FROM xml_metadata")
+    }
+
+
+def purge_files(conn, xml_file_paths):
+    """删除指定XML文件的映射行和元数据行（调用方负责提交）"""
+    rows = [(path,) for path in xml_file_paths]
+    conn.executemany(
+        "DELETE FROM guid_file_match WHERE file_id IN (SELECT id FROM xml_metadata WHERE xml_file_path = ?)", rows
+    )
+    conn.executemany("DELETE FROM xml_metadata WHERE xml_file_path = ?", rows)
+
+
+def purge_guids(conn, guids):
+    """删除已从Excel中移除的GUID的映射行（调用方负责提交）"""
+    rows = [(guid,) for guid in guids]
+    conn.executemany("DELETE FROM guid_file_match WHERE guid = ?", rows)
+
+
+def update_file_mtimes(conn, file_states):
+    """内容未变但mtime变化的文件只刷新状态，下次可直接按size+mtime跳过"""
+    conn.executemany(
+        "UPDATE xml_metadata SET file_size = ?, file_mtime_ns = ? WHERE xml_file_path = ?",
+        [(state["file_size"], state["file_mtime_ns"], path) for path, state in file_states.items()]
+    )
+
+
+def load_guid_snapshot(conn):
+    return {row[0] for row in conn.execute("SELECT guid FROM excel_guid_snapshot")}
+
+
+def save_guid_snapshot(conn, guids):
+    conn.execute("DELETE FROM excel_guid_snapshot")
+    conn.executemany("INSERT INTO excel_guid_snapshot (guid) VALUES (?)", [(guid,) for guid in guids])
+
+
+def load_guid_file_mappings(conn):
+    """按文件id顺序返回全部 (guid, xml_file_path)；同一文件内的先后顺序不影响结果"""
+    return conn.execute('''
+    SELECT m.guid, f.xml_file_path
+    FROM guid_file_match m
+    JOIN xml_metadata f ON f.id = m.file_id
+    ORDER BY m.file_id
+    ''').fetchall()
+
+
+def excel_metadata_row(guid_info, guid):
+    """guid_info为main.read_excel_data返回的GuidMatchTable"""
+    meta = guid_info.metadata_of(guid)
+    return (
+        guid, meta["physical_port"], meta["message_name"],
+        meta["dp_name"], meta["full_name"], guid_info.first_row(guid)
+    )
+
+
+def rebuild_excel_metadata(conn, guid_info, guids):
+    """按当前Excel内容重写已匹配GUID的excel_metadata（调用方负责提交）"""
+    conn.execute("DELETE FROM excel_metadata")
+    rows = [excel_metadata_row(guid_info, guid) for guid in guids]
+    conn.executemany('''
+    INSERT OR IGNORE INTO excel_metadata
+    (guid, physical_port, message_name, dp_name, full_name, source_row)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ''', rows)
+
+
+class MappingDBWriter:
+    """
+    单连接批量写入器，用法：
+        with MappingDBWriter(db_path) as writer:
+            writer.add_result(result, guid_info)
+    result 为 main.match_xml_file 的返回值
+    """
+
+    def __init__(self, db_path, batch_files=1000, batch_rows=50000, defer_indexes=True):
+        self.db_path = db_path
+        self.batch_files = batch_files
+        self.batch_rows = batch_rows
+        self.defer_indexes = defer_indexes
+        self.conn = None
+        self._xml_rows = []
+        self._mapping_rows = []
+        self._excel_rows = []
+        self._excel_guids = set()
+        self._pending_files = 0
+        # 文件路径/节点路径/属性名 -> id，运行期间只向数据库查询一次
+        self._file_ids = {}
+        self._node_path_ids = {}
+        self._attribute_ids = {}
+        # 表名 -> [写入行数, 耗时秒]
+        self.stats = {
+            "xml_metadata": [0, 0.0],
+            "guid_file_match": [0, 0.0],
+            "excel_metadata": [0, 0.0],
+        }
+        self.commits = 0
+        self.commit_seconds = 0.0
+        self.index_seconds = 0.0
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def open(self):
+        self.conn = sqlite3.connect(self.db_path)
+        for pragma in BULK_PRAGMAS:
+            self.conn.execute(pragma)
+        if self.defer_indexes:
+            drop_indexes(self.conn)
+        return self
+
+    def add_result(self, result, guid_info):
+        """
+        缓存单个XML的匹配结果；无匹配的文件不落库（与原逻辑一致），
+        但带有content_hash的文件（全量运行和增量模式）也要记录状态，以便下次增量运行跳过
+        """
+        matches = result["matches"]
+        if not matches and result.get("content_hash") is None:
+            return
+        xml_metadata = result["metadata"]
+        xml_file_path = result["xml_file_path"]
+
+        self._xml_rows.append((
+            xml_file_path,
+            result["xml_file_name"],
+            xml_metadata["physical_port"],
+            xml_metadata["message_name"],
+            xml_metadata["dp_name"],
+            xml_metadata["full_name"],
+            datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            result.get("file_size"),
+            result.get("file_mtime_ns"),
+            result.get("content_hash")
+        ))
+        self._mapping_rows.extend(
+            (m["guid"], xml_file_path, m["node_path"], m["attribute"], MATCH_TYPE_IDS[m["match_type"]])
+            for m in matches
+        )
+        for m in matches:
+            guid = m["guid"]
+            if guid in self._excel_guids:
+                continue
+            self._excel_guids.add(guid)
+            self._excel_rows.append(excel_metadata_row(guid_info, guid))
+
+        self._pending_files += 1
+        if self._pending_files >= self.batch_files or len(self._mapping_rows) >= self.batch_rows:
+            self.flush()
+
+    def _timed_executemany(self, table, sql, rows):
+        if not rows:
+            return
+        start = time.perf_counter()
+        self.conn.executemany(sql, rows)
+        stat = self.stats[table]
+        stat[0] += len(rows)
+        stat[1] += time.perf_counter() - start
+
+    def _intern(self, table, column, values, cache, insert=True):
+        """把values中尚未缓存的值写入驻留表（insert=False表示行已写入），再批量查回id"""
+        missing = [value for value in dict.fromkeys(values) if value not in cache]
+        if not missing:
+            return
+        if insert:
+            self.conn.executemany(f"INSERT OR IGNORE INTO {table} ({column}) VALUES (?)", [(v,) for v in missing])
+        # SQLite单条语句的参数个数有上限，分块查询
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            cache.update(self.conn.execute(
+                f"SELECT {column}, id FROM {table} WHERE {column} IN ({placeholders})", chunk
+            ))
+
+    def _mapping_id_rows(self):
+        self._intern("xml_metadata", "xml_file_path", (row[1] for row in self._mapping_rows), self._file_ids,
+                     insert=False)
+        self._intern("node_paths", "node_path", (row[2] for row in self._mapping_rows), self._node_path_ids)
+        self._intern("match_attributes", "attribute", (row[3] for row in self._mapping_rows), self._attribute_ids)
+        file_ids = self._file_ids
+        node_path_ids = self._node_path_ids
+        attribute_ids = self._attribute_ids
+        return [
+            (file_ids[path], guid, node_path_ids[node_path], attribute_ids[attribute], match_type)
+            for guid, path, node_path, attribute, match_type in self._mapping_rows
+        ]
+
+    def flush(self):
+        """一个事务写入当前缓存的全部行"""
+        if not self._pending_files:
+            return
+        files = self._pending_files
+        try:
+            self._timed_executemany("xml_metadata", '''
+            INSERT OR IGNORE INTO xml_metadata
+            (xml_file_path, xml_file_name, physical_port, message_name, dp_name, full_name, parse_time,
+             file_size, file_mtime_ns, content_hash)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', self._xml_rows)
+            self._timed_executemany("guid_file_match", '''
+            INSERT OR IGNORE INTO guid_file_match
+            (file_id, guid, node_path_id, attribute_id, match_type)
+            VALUES (?, ?, ?, ?, ?)
+            ''', self._mapping_id_rows())
+            self._timed_executemany("excel_metadata", '''
+            INSERT OR IGNORE INTO excel_metadata
+            (guid, physical_port, message_name, dp_name, full_name, source_row)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ''', self._excel_rows)
+            start = time.perf_counter()
+            self.conn.commit()
+            self.commit_seconds += time.perf_counter() - start
+            self.commits += 1
+        except Exception as e:
+            logger.error(f"数据库批量写入失败（{files}个文件）：{str(e)}")
+            self.conn.rollback()
+            # 回滚后本批新驻留的id失效
+            self._file_ids.clear()
+            self._node_path_ids.clear()
+            self._attribute_ids.clear()
+        finally:
+            self._xml_rows = []
+            self._mapping_rows = []
+            self._excel_rows = []
+            self._pending_files = 0
+
+    def close(self):
+        if self.conn is None:
+            return
+        try:
+            self.flush()
+            if self.defer_indexes:
+                start = time.perf_counter()
+                create_indexes(self.conn)
+                self.index_seconds = time.perf_counter() - start
+        finally:
+            self.conn.close()
+            self.conn = None
+        self.report()
+
+    def report(self):
+        for table, (rows, seconds) in self.stats.items():
+            rate = rows / seconds if seconds > 0 else 0
+            logger.info(f"数据库写入统计「{table}」：{rows}行，耗时{seconds:.3f}秒，{rate:.0f}行/秒")
+        logger.info(f"数据库事务提交：{self.commits}次，耗时{self.commit_seconds:.3f}秒")
+        if self.defer_indexes:
+            logger.info(f"批量导入后重建索引耗时：{self.index_seconds:.3f}秒")
+
+
+# -------------------------- 迁移与对比 --------------------------
+LOOKUP_QUERIES = {
+    "GUID→文件": "SELECT xml_file_path FROM guid_xml_mapping WHERE guid = ?",
+    "文件→GUID": "SELECT guid FROM guid_xml_mapping WHERE xml_file_path = ?",
+    "GUID→文件元数据": '''
+    SELECT f.xml_file_name, f.message_name FROM guid_xml_mapping m
+    JOIN xml_metadata f ON f.xml_file_path = m.xml_file_path WHERE m.guid = ?
+    ''',
+}
+
+
+def database_size(conn):
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return page_count * page_size
+
+
+def sample_lookup_keys(conn, samples, seed=0):
+    """随机抽取GUID和文件路径，迁移前后用同一批键测查询耗时"""
+    rng = random.Random(seed)
+    guids = [row[0] for row in conn.execute("SELECT DISTINCT guid FROM guid_xml_mapping")]
+    paths = [row[0] for row in conn.execute("SELECT DISTINCT xml_file_path FROM guid_xml_mapping")]
+    return rng.sample(guids, min(samples, len(guids))), rng.sample(paths, min(samples, len(paths)))
+
+
+def measure_lookups(conn, guids, paths):
+    """各常用查询（经guid_xml_mapping表/视图，迁移前后SQL相同）的平均耗时（毫秒）"""
+    timings = {}
+    for label, sql in LOOKUP_QUERIES.items():
+        keys = paths if label == "文件→GUID" else guids
+        start = time.perf_counter()
+        for key in keys:
+            conn.execute(sql, (key,)).fetchall()
+        timings[label] = (time.perf_counter() - start) / max(len(keys), 1) * 1000
+    return timings
+
+
+def migrate_database(db_path, samples=200, vacuum=True, report=print):
+    """迁移旧版映射表，报告迁移前后的数据库大小和常用查询耗时；返回 (迁移前, 迁移后) 两组 (字节数, {查询: 毫秒})"""
+    conn = sqlite3.connect(db_path)
+    try:
+        if object_type(conn, "guid_xml_mapping") != "table":
+            report(f"「{db_path}」已是规范化结构，无需迁移")
+            return None
+        guids, paths = sample_lookup_keys(conn, samples)
+        before = (database_size(conn), measure_lookups(conn, guids, paths))
+
+        migration = ensure_mapping_schema(conn)
+        create_indexes(conn)
+        if vacuum:
+            # 删除旧表后的空闲页要VACUUM才能归还给文件系统
+            conn.execute("VACUUM")
+        after = (database_size(conn), measure_lookups(conn, guids, paths))
+    finally:
+        conn.close()
+
+    if report:
+        report(f"映射行：{migration['legacy_rows']} → {migration['rows']}，迁移耗时{migration['seconds']:.2f}秒")
+        report(f"{'':<16}{'迁移前':>12}{'迁移后':>12}")
+        report(f"{'数据库大小(MB)':<16}{before[0] / 1024 / 1024:>12.2f}{after[0] / 1024 / 1024:>12.2f}")
+        for label in LOOKUP_QUERIES:
+            report(f"{label + '(ms)':<16}{before[1][label]:>12.3f}{after[1][label]:>12.3f}")
+    return before, after
+
+
+def main():
+    parser = argparse.ArgumentParser(description="xml_guid_mapping.db 维护")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = subparsers.add_parser("migrate", help="把旧版guid_xml_mapping表迁移为规范化结构，并对比前后大小与查询耗时")
+    migrate_parser.add_argument("--db", default="xml_guid_mapping.db", help="数据库路径（默认：xml_guid_mapping.db）")
+    migrate_parser.add_argument("--samples", type=int, default=200, help="每种查询抽样的键数（默认：200）")
+    migrate_parser.add_argument("--no-vacuum", action="store_true", help="迁移后不执行VACUUM")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        if not os.path.exists(args.db):
+            parser.error(f"数据库不存在：{args.db}")
+        migrate_database(args.db, args.samples, vacuum=not args.no_vacuum)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#  _*_ coding:utf-8 _*_
+"""
+GUID匹配结果的紧凑存储（替代原来每个GUID一个 {"metadata", "indices", "xml_files"} 字典的guid_info）：
+- GUID按Excel中首次出现的顺序编号，元数据按字段各存一个列表，首行行号存在array中
+- XML文件名驻留为整数id
+- 匹配记录是两个并列的int32数组 (GUID id, 文件id)，按文件处理顺序追加，同一文件内的重复匹配只记一次
+- file_lists 按GUID分组、按首次匹配顺序去重得到文件名列表，与原来 dict.fromkeys(xml_files) 的结果一致
+- 可pickle（不含可重建的反查字典）：并行匹配时每个子进程为一块文件建表，主进程按块顺序merge（见main.run_parallel_matching）
+用法：
+    table = GuidMatchTable(guids, {"physical_port": [...], ...}, first_rows)
+    table.add_file_matches("a.xml", ["guid-1", "guid-2"])
+    table.file_lists()  # {"guid-1": ["a.xml"], ...}
+"""
+from array import array
+
+import numpy as np
+
+
+class GuidMatchTable:
+
+    def __init__(self, guids=(), metadata=None, first_rows=()):
+        self.guids = list(guids)
+        self.metadata = {field: list(values) for field, values in (metadata or {}).items()}
+        self.first_rows = array("q", first_rows)
+        self.file_names = []
+        self.match_guids = array("i")
+        self.match_files = array("i")
+        self._build_lookups()
+
+    def _build_lookups(self):
+        self.guid_ids = {guid: guid_id for guid_id, guid in enumerate(self.guids)}
+        self.file_ids = {name: file_id for file_id, name in enumerate(self.file_names)}
+
+    def __getstate__(self):
+        # 反查字典可由列表重建，不随进程间传递
+        state = self.__dict__.copy()
+        del state["guid_ids"], state["file_ids"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._build_lookups()
+
+    # GUID集合接口：供 `in` 判断、frozenset(table.keys()) 和字节预筛使用
+    def __len__(self):
+        return len(self.guids)
+
+    def __contains__(self, guid):
+        return guid in self.guid_ids
+
+    def __iter__(self):
+        return iter(self.guids)
+
+    def keys(self):
+        return self.guids
+
+    def metadata_of(self, guid):
+        guid_id = self.guid_ids[guid]
+        return {field: values[guid_id] for field, values in self.metadata.items()}
+
+    def first_row(self, guid):
+        return self.first_rows[self.guid_ids[guid]]
+
+    # -------------------------- 匹配记录 --------------------------
+    def file_id(self, xml_file_name):
+        file_id = self.file_ids.get(xml_file_name)
+        if file_id is None:
+            file_id = len(self.file_names)
+            self.file_ids[xml_file_name] = file_id
+            self.file_names.append(xml_file_name)
+        return file_id
+
+    def guid_id(self, guid):
+        """已知GUID返回其id；未知GUID（如子进程中不带Excel信息建的表）追加为无元数据的新GUID"""
+        guid_id = self.guid_ids.get(guid)
+        if guid_id is None:
+            guid_id = len(self.guids)
+            self.guid_ids[guid] = guid_id
+            self.guids.append(guid)
+            for values in self.metadata.values():
+                values.append(None)
+            self.first_rows.append(-1)
+        return guid_id
+
+    def add_file_matches(self, xml_file_name, guids):
+        """记录一个文件匹配到的GUID（可含重复），返回去重后的GUID集合"""
+        matched = set(guids)
+        if matched:
+            self.match_guids.extend(self.guid_id(guid) for guid in matched)
+            self.match_files.extend([self.file_id(xml_file_name)] * len(matched))
+        return matched
+
+    def add_match(self, guid, xml_file_name):
+        self.match_guids.append(self.guid_id(guid))
+        self.match_files.append(self.file_id(xml_file_name))
+
+    def clear_matches(self):
+        self.file_names = []
+        self.file_ids = {}
+        self.match_guids = array("i")
+        self.match_files = array("i")
+
+    def merge(self, other):
+        """把other的匹配记录按原顺序追加到本表之后（GUID和文件名按字符串重新映射id）"""
+        guid_map = np.array([self.guid_id(guid) for guid in other.guids], dtype=np.int32)
+        file_map = np.array([self.file_id(name) for name in other.file_names], dtype=np.int32)
+        other_guids = np.frombuffer(other.match_guids, dtype=np.int32)
+        other_files = np.frombuffer(other.match_files, dtype=np.int32)
+        self.match_guids.frombytes(guid_map[other_guids].tobytes())
+        self.match_files.frombytes(file_map[other_files].tobytes())
+        return self
+
+    def file_lists(self):
+        """返回 {GUID: [文件名, ...]}，只含有匹配的GUID；文件名按首次匹配顺序去重"""
+        guid_ids = np.frombuffer(self.match_guids, dtype=np.int32)
+        file_ids = np.frombuffer(self.match_files, dtype=np.int32)
+        if not len(guid_ids):
+            return {}
+        # 去掉重复的 (GUID, 文件) 对，只保留第一次出现的位置，再恢复追加顺序
+        pairs = guid_ids.astype(np.int64) * len(self.file_names) + file_ids
+        first = np.sort(np.unique(pairs, return_index=True)[1])
+        guid_ids = guid_ids[first]
+        file_ids = file_ids[first]
+        # 稳定排序按GUID分组，组内保持匹配顺序
+        order = np.argsort(guid_ids, kind="stable")
+        guid_ids = guid_ids[order]
+        file_ids = file_ids[order]
+        bounds = np.flatnonzero(np.diff(guid_ids)) + 1
+        starts = np.concatenate(([0], bounds))
+        names = self.file_names
+        return {
+            self.guids[guid_id]: [names[file_id] for file_id in group.tolist()]
+            for guid_id, group in zip(guid_ids[starts].tolist(), np.split(file_ids, bounds))
+        }
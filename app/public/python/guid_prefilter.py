@@ -0,0 +1,101 @@
+#  _*_ coding:utf-8 _*_
+"""
+GUID字节级预筛：mmap读取XML原始字节，用预编译正则找出候选属性值，
+只有至少命中一个GUID的文件才需要交给ElementTree完整解析。
+匹配语义与parse_xml_and_match_guids一致（属性值整体等于GUID），预筛只会多放行、不会漏掉。
+子串模式（substring=True，见guid_automaton）下改为查找原始字节中任意位置、满足边界规则的GUID形状片段。
+"""
+import mmap
+import re
+from html import unescape
+
+# 标准GUID（8-4-4-4-12），引号包裹即为完整的属性值
+GUID_TOKEN_RE = re.compile(
+    rb"[\"']([0-9A-Fa-f]{8}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{12})[\"']"
+)
+# 子串模式：前后不是ASCII字母/数字的GUID形状片段
+GUID_SUBSTRING_RE = re.compile(
+    rb"(?<![0-9A-Za-z])[0-9A-Fa-f]{8}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{12}(?![0-9A-Za-z])"
+)
+GUID_KEY_RE = re.compile(r"[0-9A-Fa-f]{8}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{4}-[0-9A-Fa-f]{12}")
+GUID_SUBSTRING_TEXT_RE = re.compile(r"(?<![0-9A-Za-z])" + GUID_KEY_RE.pattern + r"(?![0-9A-Za-z])")
+# 通用属性值：="..." 或 ='...'；值内不跨越标签，避免正文中的孤立引号导致错位
+ATTR_VALUE_RE = re.compile(rb"=\s*(?:\"([^\"<>]*)\"|'([^'<>]*)')")
+XML_ENCODING_RE = re.compile(rb"<\?xml[^>]*encoding\s*=\s*[\"']([A-Za-z0-9._-]+)[\"']")
+# 属性值规范化会改写这些字符，包含它们的GUID无法按原始字节判断
+UNSAFE_KEY_CHARS = set("&<>\"' \t\r\n")
+
+
+class GuidPrefilter:
+    """
+    用法：
+        prefilter = GuidPrefilter(guid_info.keys())
+        if prefilter.may_match(xml_file): ...
+    """
+
+    def __init__(self, guid_keys, substring=False):
+        keys = [key for key in guid_keys if key]
+        self.keys = frozenset(keys)
+        self.key_bytes = frozenset(key.encode("utf-8") for key in keys)
+        self.enabled = bool(keys) and not any(UNSAFE_KEY_CHARS.intersection(key) for key in keys)
+        self.ascii_keys = all(key.isascii() for key in keys)
+        # 全部是标准GUID时只需扫描GUID形状的片段，比逐个属性值检查快得多
+        self.guid_shaped = bool(keys) and all(GUID_KEY_RE.fullmatch(key) for key in keys)
+        self.substring = substring
+        if substring and not self.guid_shaped:
+            self.enabled = False  # 任意形状的关键字可能出现在实体编码的文本中，不做预筛
+
+    def _scan(self, data):
+        # 含实体/字符引用（如 &#45;）时GUID在原始字节中可能不是GUID形状，快速路径会漏掉
+        has_reference = b"&" in data
+        if self.substring:
+            key_bytes = self.key_bytes
+            for m in GUID_SUBSTRING_RE.finditer(data):
+                if m.group(0) in key_bytes:
+                    return True
+            if has_reference:
+                keys = self.keys
+                text = unescape(data[:].decode("utf-8", "replace"))
+                return any(token in keys for token in GUID_SUBSTRING_TEXT_RE.findall(text))
+            return False
+
+        if self.guid_shaped and not has_reference:
+            key_bytes = self.key_bytes
+            for m in GUID_TOKEN_RE.finditer(data):
+                if m.group(1) in key_bytes:
+                    return True
+            return False
+
+        key_bytes = self.key_bytes
+        for m in ATTR_VALUE_RE.finditer(data):
+            value = m.group(1)
+            if value is None:
+                value = m.group(2)
+            if value in key_bytes:
+                return True
+            # 含实体/字符引用的值按解码后比较
+            if b"&" in value and unescape(value.decode("utf-8", "replace")).encode("utf-8") in key_bytes:
+                return True
+        return False
+
+    def may_match(self, xml_file):
+        """文件可能包含GUID时返回True；无法按字节判断（UTF-16、非UTF-8的非ASCII GUID等）时保守放行"""
+        if not self.enabled:
+            return True
+        try:
+            with open(xml_file, "rb") as f:
+                try:
+                    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    return True  # 空文件交给解析器报告
+                with data:
+                    head = data[:1024]
+                    if head.startswith((b"\xff\xfe", b"\xfe\xff")) or b"\x00" in head:
+                        return True
+                    if not self.ascii_keys:
+                        declared = XML_ENCODING_RE.search(head)
+                        if declared and declared.group(1).lower().replace(b"_", b"-") not in (b"utf-8", b"utf8"):
+                            return True
+                    return self._scan(data)
+        except OSError:
+            return True  # 交给解析器报告错误
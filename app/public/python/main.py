@@ -1,17 +1,30 @@
 #  _*_ coding:utf-8 _*_
 import os
+import re
+import argparse
+import hashlib
+import time
 import xml.etree.ElementTree as ET
 import logging
 from logging.handlers import RotatingFileHandler
 from tqdm import tqdm
-import pandas as pd
 import sqlite3
-from datetime import datetime
-from collections import defaultdict
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from guid_prefilter import GuidPrefilter
+from guid_automaton import GuidAutomaton, choose_backend, MATCH_ATTRIBUTE, MATCH_ATTRIBUTE_SUBSTRING, MATCH_TEXT, TEXT_ATTRIBUTE
+from guid_match_table import GuidMatchTable
+from workbook_cache import load_sheet
+from result_export import EXPORT_FORMATS, export_dataframe_formats
+from guid_mapping_db import (
+    INDEX_DDL, MappingDBWriter, clear_tables, ensure_mapping_schema, ensure_incremental_schema, load_file_states,
+    purge_files, purge_guids, update_file_mtimes, load_guid_snapshot, save_guid_snapshot, load_guid_file_mappings,
+    rebuild_excel_metadata
+)
 
 
 # -------------------------- 清空文件内容（保留文件） --------------------------
-def clear_file_contents(log_path="excel_xml_check.log", db_path="xml_guid_mapping.db"):
+def clear_file_contents(log_path="excel_xml_check.log", db_path="xml_guid_mapping.db", clear_db=True):
     if os.path.exists(log_path):
         try:
             with open(log_path, "w", encoding="utf-8") as f:
@@ -20,13 +33,10 @@ def clear_file_contents(log_path="excel_xml_check.log", db_path="xml_guid_mappin
         except Exception as e:
             logger.warning(f"清空日志失败：{str(e)}")
 
-    if os.path.exists(db_path):
+    if clear_db and os.path.exists(db_path):
         try:
             conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM guid_xml_mapping")
-            cursor.execute("DELETE FROM xml_metadata")
-            cursor.execute("DELETE FROM excel_metadata")
+            clear_tables(conn)  # 兼容旧版与规范化两种映射表结构
             conn.commit()
             conn.close()
             logger.debug(f"已清空数据库表数据：{db_path}")
@@ -46,18 +56,35 @@ def setup_logging():
     log_format = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     formatter = logging.Formatter(log_format, datefmt="%Y-%m-%d %H:%M:%S")
 
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-
-    file_handler = RotatingFileHandler(
-        filename="excel_xml_check.log",
-        maxBytes=10 * 1024 * 1024,
-        backupCount=5,
-        encoding="utf-8"
-    )
-    file_handler.setFormatter(formatter)
-    logger.addHandler(file_handler)
+    # 常驻进程（tool_worker.py）中每个请求都会调用main，且logger上可能已有其他处理器（如进度转发）：
+    # 只按类型查找本函数添加的处理器，控制台处理器只加一次，日志文件跟随本次的工作目录
+    log_path = os.path.abspath("excel_xml_check.log")
+    has_console = False
+    has_file = False
+    for handler in list(logger.handlers):
+        if isinstance(handler, RotatingFileHandler):
+            if handler.baseFilename == log_path:
+                has_file = True
+            else:
+                logger.removeHandler(handler)
+                handler.close()
+        elif type(handler) is logging.StreamHandler:
+            has_console = True
+
+    if not has_console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+        logger.addHandler(console_handler)
+
+    if not has_file:
+        file_handler = RotatingFileHandler(
+            filename=log_path,
+            maxBytes=10 * 1024 * 1024,
+            backupCount=5,
+            encoding="utf-8"
+        )
+        file_handler.setFormatter(formatter)
+        logger.addHandler(file_handler)
 
     return logger
 
@@ -67,18 +94,7 @@ def init_database(db_path="xml_guid_mapping.db"):
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
-    # 1. GUID-XML映射表
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS guid_xml_mapping (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        guid TEXT NOT NULL,
-        xml_file_path TEXT NOT NULL,  -- 关联xml_metadata的完整路径
-        match_node_path TEXT NOT NULL,
-        match_attribute TEXT NOT NULL
-    )
-    ''')
-
-    # 2. XML元数据表（新增xml_file_name字段存储纯文件名）
+    # 1. XML元数据表（新增xml_file_name字段存储纯文件名；id即映射表中的文件id）
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS xml_metadata (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -88,11 +104,14 @@ def init_database(db_path="xml_guid_mapping.db"):
         message_name TEXT,
         dp_name TEXT,
         full_name TEXT,
-        parse_time TIMESTAMP NOT NULL
+        parse_time TIMESTAMP NOT NULL,
+        file_size INTEGER,                   -- 增量扫描用：文件大小
+        file_mtime_ns INTEGER,               -- 增量扫描用：修改时间（纳秒）
+        content_hash TEXT                    -- 增量扫描用：内容哈希
     )
     ''')
 
-    # 3. Excel元数据表
+    # 2. Excel元数据表
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS excel_metadata (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -105,67 +124,113 @@ def init_database(db_path="xml_guid_mapping.db"):
     )
     ''')
 
-    # 索引（新增xml_file_name索引，加速按文件名查询）
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_guid ON guid_xml_mapping(guid)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_xml_path ON guid_xml_mapping(xml_file_path)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_xml_name ON xml_metadata(xml_file_name)")
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_excel_guid ON excel_metadata(guid)")
+    # 3. GUID-XML映射表（整数文件id + 驻留的节点路径/属性名，旧版整行存路径字符串的表自动迁移）
+    conn.commit()
+    ensure_mapping_schema(conn)
+
+    # 索引（新增xml_file_name索引，加速按文件名查询）；批量导入期间由MappingDBWriter先删除、导入完成后重建
+    for ddl in INDEX_DDL.values():
+        cursor.execute(ddl)
 
     conn.commit()
+    # 旧库补齐增量扫描所需的列和表
+    ensure_incremental_schema(conn)
     conn.close()
     logger.info(f"数据库初始化完成：{db_path}（含xml_file_name字段）")
     return db_path
 
 
 # -------------------------- 3. XML元数据提取 --------------------------
-def extract_xml_metadata(root):
-    metadata = {
+KEYWORD_MAPPING = {
+    "physical_port": ["physicalport", "physical_port", "port", "phyport"],
+    "message_name": ["message", "msg", "word_name", "messagename"],
+    "dp_name": ["dpname", "dp_name", "DP_Name"],
+    "full_name": ["fullname", "full_name", "全名"]
+}
+
+
+def new_xml_metadata():
+    return {
         "physical_port": None,
         "message_name": None,
         "dp_name": None,
         "full_name": None
     }
-    keyword_mapping = {
-        "physical_port": ["physicalport", "physical_port", "port", "phyport"],
-        "message_name": ["message", "msg", "word_name", "messagename"],
-        "dp_name": ["dpname", "dp_name", "DP_Name"],
-        "full_name": ["fullname", "full_name", "全名"]
-    }
 
-    def traverse_nodes(node):
+
+# 预编译关键字：一个合并正则快速排除不含任何关键字的字符串，命中后再按字段正则区分。
+# 原逻辑用关键字直接与小写后的字符串比较，含大写字母的关键字（如DP_Name）永远不会命中，这里同样忽略
+_FIELD_KEYWORD_RES = {
+    field: re.compile("|".join(re.escape(kw) for kw in keywords if kw == kw.lower()))
+    for field, keywords in KEYWORD_MAPPING.items()
+}
+_ANY_KEYWORD_RE = re.compile("|".join(pattern.pattern for pattern in _FIELD_KEYWORD_RES.values()))
+
+
+def match_keyword_fields(lowered):
+    """返回已小写字符串中包含关键字的字段（按KEYWORD_MAPPING顺序）"""
+    if not _ANY_KEYWORD_RE.search(lowered):
+        return ()
+    return tuple(field for field, pattern in _FIELD_KEYWORD_RES.items() if pattern.search(lowered))
+
+
+@lru_cache(maxsize=4096)
+def name_keyword_fields(attr_name):
+    # 属性名高度重复，缓存后同一属性名只小写、匹配一次
+    return match_keyword_fields(attr_name.lower())
+
+
+def is_metadata_complete(metadata):
+    return None not in metadata.values()
+
+
+def collect_attr_metadata(metadata, attrib):
+    """检查单个节点的属性，填充尚未找到的元数据字段"""
+    if not attrib:
+        return
+    values = [str(attr_value) for attr_value in attrib.values()]
+    # 绝大多数节点不含关键字：属性名和值拼接后只做一次小写和一次合并正则检查
+    if not _ANY_KEYWORD_RE.search("\x00".join(values).lower()) \
+            and not any(name_keyword_fields(attr_name) for attr_name in attrib):
+        return
+    for (attr_name, attr_value), value in zip(attrib.items(), values):
+        fields = name_keyword_fields(attr_name) + match_keyword_fields(value.lower())
+        for field in fields:
+            if metadata[field] is None:
+                metadata[field] = attr_value
+
+
+def collect_text_metadata(metadata, text):
+    """检查单个节点的文本，填充尚未找到的元数据字段"""
+    node_text = str(text).strip() if text else ""
+    if node_text:
+        for field in match_keyword_fields(node_text.lower()):
+            if metadata[field] is None:
+                metadata[field] = node_text
+
+
+def extract_xml_metadata(root):
+    """先序遍历（属性→文本→子节点）提取元数据，四个字段都找到后立即停止"""
+    metadata = new_xml_metadata()
+    stack = [root]
+    while stack:
+        node = stack.pop()
         # 检查属性
-        for attr_name, attr_value in node.attrib.items():
-            attr_name_lower = attr_name.lower()
-            attr_value_lower = str(attr_value).lower()
-            for field, keywords in keyword_mapping.items():
-                if metadata[field] is not None:
-                    continue
-                for kw in keywords:
-                    if kw in attr_name_lower or kw in attr_value_lower:
-                        metadata[field] = attr_value
-                        break
+        collect_attr_metadata(metadata, node.attrib)
         # 检查文本
-        node_text = str(node.text).strip() if node.text else ""
-        if node_text:
-            for field, keywords in keyword_mapping.items():
-                if metadata[field] is not None:
-                    continue
-                for kw in keywords:
-                    if kw in node_text.lower():
-                        metadata[field] = node_text
-                        break
-        # 递归子节点
-        for child in node:
-            traverse_nodes(child)
-
-    traverse_nodes(root)
+        collect_text_metadata(metadata, node.text)
+        if is_metadata_complete(metadata):
+            break
+        # 子节点逆序入栈，保持先序
+        stack.extend(reversed(node))
     return metadata
 
 
 # -------------------------- 4. 读取Excel数据 --------------------------
-def read_excel_data(excel_path, guid_column, meta_columns, sheet_name="BUS"):
+def read_excel_data(excel_path, guid_column, meta_columns, sheet_name="BUS", use_cache=True):
     try:
-        df = pd.read_excel(excel_path, sheet_name=sheet_name)
+        # 经列式缓存读取，工作簿未修改时不再重复解析xlsx
+        df = load_sheet(excel_path, sheet_name, use_cache=use_cache, report=logger.info)
         required_columns = [guid_column] + list(meta_columns.values())
         missing_cols = [col for col in required_columns if col not in df.columns]
         if missing_cols:
@@ -181,21 +246,16 @@ def read_excel_data(excel_path, guid_column, meta_columns, sheet_name="BUS"):
         df["匹配XML文件数"] = 0
         df["匹配XML文件名"] = ""
 
-        # 构建GUID信息
-        guid_info = defaultdict(lambda: {
-            "metadata": {},
-            "indices": [],
-            "xml_files": []
-        })
-        for idx, row in df.iterrows():
-            guid = row[guid_column]
-            if guid == "":
-                continue
-            guid_info[guid]["metadata"] = {
-                db_field: row[excel_col]
-                for db_field, excel_col in meta_columns.items()
-            }
-            guid_info[guid]["indices"].append(idx)
+        # 构建GUID信息（向量化）：GUID按首次出现顺序编号，首行取第一次出现的行号，
+        # 元数据取该GUID最后一行（与逐行覆盖的结果一致）
+        valid = df[df[guid_column] != ""]
+        first_occurrence = valid[~valid[guid_column].duplicated()]
+        last_rows = valid.groupby(guid_column, sort=False)[list(meta_columns.values())].last()
+        guid_info = GuidMatchTable(
+            first_occurrence[guid_column].tolist(),
+            {field: last_rows[excel_col].tolist() for field, excel_col in meta_columns.items()},
+            first_occurrence.index.tolist()
+        )
 
         logger.info(f"Excel读取完成：{len(df)}行数据，{len(guid_info)}个非重复GUID")
         return df, guid_info
@@ -204,6 +264,25 @@ def read_excel_data(excel_path, guid_column, meta_columns, sheet_name="BUS"):
         raise RuntimeError(f"读取Excel失败：{str(e)}")
 
 
+def write_back_match_results(df, guid_column, guid_info, all_matched_guids):
+    """按GUID汇总匹配结果，一次映射写回三列结果（替代逐行df.at赋值）"""
+    xml_counts = {}
+    xml_names = {}
+    # 按首次匹配顺序去重，保证并行与顺序执行输出一致
+    for guid, unique_xml_files in guid_info.file_lists().items():
+        if guid not in all_matched_guids:
+            continue
+        xml_counts[guid] = len(unique_xml_files)
+        xml_names[guid] = ",".join(unique_xml_files)
+
+    guids = df[guid_column]
+    matched_mask = guids.isin(xml_counts.keys())
+    df["是否存在"] = matched_mask
+    df["匹配XML文件数"] = guids.map(xml_counts).where(matched_mask, 0).astype("int64")
+    df["匹配XML文件名"] = guids.map(xml_names).where(matched_mask, "")
+    return df
+
+
 # -------------------------- 5. 获取所有XML文件 --------------------------
 def get_all_xml_files(folder_path):
     xml_files = []
@@ -216,106 +295,522 @@ def get_all_xml_files(folder_path):
 
 
 # -------------------------- 6. 解析XML并匹配GUID（存储文件名） --------------------------
-def parse_xml_and_match_guids(xml_file, guid_info, db_path):
-    matched_guids = set()
-    # 提取完整路径和纯文件名
-    xml_file_path = xml_file  # 完整路径（如D:/a/b.xml）
-    xml_file_name = os.path.basename(xml_file)  # 纯文件名（如b.xml）
+DEFAULT_MATCH_OPTIONS = {
+    # 不小于该大小（字节）的XML改用iterparse流式匹配，None表示从不流式
+    "stream_threshold": 64 * 1024 * 1024,
+    # 先按原始字节预筛，没有候选GUID的文件不做XML解析
+    "prefilter": True,
+    # 子串模式：用多模式自动机在属性值和节点文本中查找内嵌的GUID（默认只匹配整个属性值）
+    "substring": False,
+    # 在结果中附带文件大小/mtime/内容哈希（全量运行时开启，无匹配的文件也记录，之后的--incremental据此跳过未变化文件）
+    "record_state": False,
+}
+
+
+def new_match_result(xml_file):
+    return {
+        "xml_file_path": xml_file,  # 完整路径（如D:/a/b.xml）
+        "xml_file_name": os.path.basename(xml_file),  # 纯文件名（如b.xml）
+        "metadata": None,
+        "matches": [],
+        "error": None,
+        "prefilter_skipped": False,
+        "bytes": 0,
+        "elapsed": 0.0
+    }
+
 
+def match_xml_file(xml_file, guid_keys, options=None, prefilter=None, automaton=None):
+    """
+    解析单个XML并匹配GUID，不访问数据库也不修改guid_info，可在子进程中运行；
+    传入prefilter时先按原始字节预筛，无候选GUID的文件直接跳过解析；
+    传入automaton（GuidAutomaton）时为子串模式，还会查找属性值和节点文本中内嵌的GUID
+    Returns: {"xml_file_path", "xml_file_name", "metadata", "matches", "error", "prefilter_skipped", ...}
+    """
+    options = options or DEFAULT_MATCH_OPTIONS
+    start = time.perf_counter()
+    try:
+        file_bytes = os.path.getsize(xml_file)
+    except OSError:
+        file_bytes = 0  # 交给ET.parse报告错误
+
+    if prefilter is not None and not prefilter.may_match(xml_file):
+        result = new_match_result(xml_file)
+        result["metadata"] = new_xml_metadata()
+        result["prefilter_skipped"] = True
+    else:
+        stream_threshold = options.get("stream_threshold")
+        if stream_threshold is not None and file_bytes >= stream_threshold:
+            result = stream_match_xml_file(xml_file, guid_keys, automaton)
+        else:
+            result = tree_match_xml_file(xml_file, guid_keys, automaton)
+    result["bytes"] = file_bytes
+    if options.get("record_state") and result["error"] is None:
+        # 哈希在解析进程中计算，不占用主进程
+        result.update(read_file_state(xml_file))
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def match_attribute_values(matches, attrib, guid_keys, tag_stack, automaton=None):
+    """整值匹配；子串模式下再用自动机查找属性值中内嵌的GUID。命中时才按标签栈拼接node_path"""
+    for attr_name, attr_value in attrib.items():
+        if attr_value in guid_keys:
+            matches.append({
+                "guid": attr_value,
+                "node_path": "/".join(tag_stack),
+                "attribute": attr_name,
+                "match_type": MATCH_ATTRIBUTE
+            })
+        elif automaton is not None:
+            for guid in automaton.find(attr_value):
+                matches.append({
+                    "guid": guid,
+                    "node_path": "/".join(tag_stack),
+                    "attribute": attr_name,
+                    "match_type": MATCH_ATTRIBUTE_SUBSTRING
+                })
+
+
+def match_node_text(matches, text, automaton, tag_stack):
+    """子串模式：节点文本中的GUID，tag_stack为文本所属节点（子节点的尾随文本属于父节点）"""
+    for guid in automaton.find(text):
+        matches.append({
+            "guid": guid,
+            "node_path": "/".join(tag_stack),
+            "attribute": TEXT_ATTRIBUTE,
+            "match_type": MATCH_TEXT
+        })
+
+
+def tree_match_xml_file(xml_file, guid_keys, automaton=None):
+    """ElementTree整树解析并匹配GUID"""
+    result = new_match_result(xml_file)
     try:
         tree = ET.parse(xml_file)
         root = tree.getroot()
     except Exception as e:
-        logger.warning(f"解析XML失败「{xml_file_name}」：{str(e)}")
-        return matched_guids
+        result["error"] = str(e)
+        return result
 
     # 1. 提取XML元数据
-    xml_metadata = extract_xml_metadata(root)
-
-    # 2. 遍历节点匹配GUID
+    result["metadata"] = extract_xml_metadata(root)
+
+    # 2. 遍历节点匹配GUID：显式栈先序遍历（不受递归深度限制），
+    #    只维护标签栈，命中GUID时才拼接node_path
+    matches = result["matches"]
+    tag_stack = []
+    stack = [(root, 0)]
+    while stack:
+        node, depth = stack.pop()
+        del tag_stack[depth:]
+        tag_stack.append(node.tag)
+        attrib = node.attrib
+        if attrib:
+            match_attribute_values(matches, attrib, guid_keys, tag_stack, automaton)
+        if automaton is not None:
+            if node.text:
+                match_node_text(matches, node.text, automaton, tag_stack)
+            if node.tail and depth:
+                match_node_text(matches, node.tail, automaton, tag_stack[:-1])
+        if len(node):
+            depth += 1
+            stack.extend((child, depth) for child in reversed(node))
+
+    return result
+
+
+def stream_match_xml_file(xml_file, guid_keys, automaton=None):
+    """
+    iterparse单遍流式匹配：同一遍中完成GUID匹配与元数据提取，
+    用标签栈生成node_path，节点结束即清理，峰值内存取决于树深度而非文件大小。
+    元数据按与extract_xml_metadata相同的先序（属性→文本→子节点）检查，结果一致；
+    子串模式下节点的尾随文本要到下一个事件才完整，因此该节点推迟到下一个事件再清理
+    """
+    result = new_match_result(xml_file)
+    metadata = new_xml_metadata()
     matches = []
+    tag_stack = []
+    elem_stack = []
+    text_pending = []  # 与elem_stack对应：节点文本是否尚未检查
+    tail_pending = None  # 子串模式：尾随文本尚未检查的上一个结束节点
+    metadata_done = False
 
-    def traverse_nodes(node, parent_path=""):
-        current_path = f"{parent_path}/{node.tag}" if parent_path else node.tag
-        for attr_name, attr_value in node.attrib.items():
-            if attr_value in guid_info:
-                matches.append({
-                    "guid": attr_value,
-                    "node_path": current_path,
-                    "attribute": attr_name
-                })
-                matched_guids.add(attr_value)
-                guid_info[attr_value]["xml_files"].append(xml_file_name)
-        for child in node:
-            traverse_nodes(child, current_path)
+    try:
+        for event, elem in ET.iterparse(xml_file, events=("start", "end")):
+            if tail_pending is not None:
+                # 此时标签栈恰好是尾随文本所属的父节点路径
+                if tail_pending.tail:
+                    match_node_text(matches, tail_pending.tail, automaton, tag_stack)
+                tail_pending.clear()
+                tail_pending = None
+            if event == "start":
+                # 父节点的文本在第一个子节点开始前已完整
+                if text_pending and text_pending[-1]:
+                    text_pending[-1] = False
+                    parent_text = elem_stack[-1].text
+                    if not metadata_done:
+                        collect_text_metadata(metadata, parent_text)
+                        metadata_done = is_metadata_complete(metadata)
+                    if automaton is not None and parent_text:
+                        match_node_text(matches, parent_text, automaton, tag_stack)
+                tag_stack.append(elem.tag)
+                elem_stack.append(elem)
+                text_pending.append(True)
+                attrib = elem.attrib
+                if attrib:
+                    if not metadata_done:
+                        collect_attr_metadata(metadata, attrib)
+                        metadata_done = is_metadata_complete(metadata)
+                    match_attribute_values(matches, attrib, guid_keys, tag_stack, automaton)
+            else:
+                if text_pending.pop():
+                    if not metadata_done:
+                        collect_text_metadata(metadata, elem.text)
+                        metadata_done = is_metadata_complete(metadata)
+                    if automaton is not None and elem.text:
+                        match_node_text(matches, elem.text, automaton, tag_stack)
+                tag_stack.pop()
+                elem_stack.pop()
+                if automaton is not None:
+                    tail_pending = elem
+                else:
+                    elem.clear()
+                # 从父节点摘除已处理的子节点，释放内存
+                if elem_stack:
+                    del elem_stack[-1][:]
+    except Exception as e:
+        result["error"] = str(e)
+        return result
+
+    result["metadata"] = metadata
+    result["matches"] = matches
+    return result
+
+
+def merge_match_result(result, guid_info):
+    """将单个XML的匹配结果合并回guid_info（GuidMatchTable），返回该文件匹配到的GUID集合"""
+    return guid_info.add_file_matches(result["xml_file_name"], (m["guid"] for m in result["matches"]))
+
+
+def handle_match_result(result, guid_info, writer, file_state=None, merge=True):
+    """
+    主进程处理单个文件的匹配结果：记录日志、合并guid_info并交给写入端，返回匹配到的GUID集合；
+    merge=False时匹配记录已由子进程累积在分块的GuidMatchTable中，之后整块合并
+    """
+    xml_file_name = result["xml_file_name"]
+    if result["error"] is not None:
+        logger.warning(f"解析XML失败「{xml_file_name}」：{result['error']}")
+        return set()
+    if file_state is not None:
+        result.update(file_state)
+
+    if merge:
+        matched_guids = merge_match_result(result, guid_info)
+    else:
+        matched_guids = {m["guid"] for m in result["matches"]}
+    if writer is not None:
+        writer.add_result(result, guid_info)
+    if matched_guids:
+        logger.info(f"XML处理完成「{xml_file_name}」：匹配{len(matched_guids)}个GUID")
+    return matched_guids
 
-    traverse_nodes(root)
 
-    # 3. 写入数据库（新增xml_file_name字段）
-    if matches:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        try:
-            # 写入XML元数据（含xml_file_name）
-            cursor.execute('''
-            INSERT OR IGNORE INTO xml_metadata 
-            (xml_file_path, xml_file_name, physical_port, message_name, dp_name, full_name, parse_time)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                xml_file_path,
-                xml_file_name,  # 新增：存储纯文件名
-                xml_metadata["physical_port"],
-                xml_metadata["message_name"],
-                xml_metadata["dp_name"],
-                xml_metadata["full_name"],
-                datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            ))
-
-            # 写入GUID-XML映射
-            mapping_data = [
-                (m["guid"], xml_file_path, m["node_path"], m["attribute"])
-                for m in matches
-            ]
-            cursor.executemany('''
-            INSERT OR IGNORE INTO guid_xml_mapping 
-            (guid, xml_file_path, match_node_path, match_attribute)
-            VALUES (?, ?, ?, ?)
-            ''', mapping_data)
-
-            # 写入Excel元数据
-            for guid in matched_guids:
-                info = guid_info[guid]
-                meta = info["metadata"]
-                cursor.execute('''
-                INSERT OR IGNORE INTO excel_metadata 
-                (guid, physical_port, message_name, dp_name, full_name, source_row)
-                VALUES (?, ?, ?, ?, ?, ?)
-                ''', (
-                    guid, meta["physical_port"], meta["message_name"],
-                    meta["dp_name"], meta["full_name"], info["indices"][0]
-                ))
+def parse_xml_and_match_guids(xml_file, guid_info, db_path, writer=None, automaton=None):
+    """解析匹配单个XML；传入writer时行数据进入批量缓存，否则单独开一个连接写入；传入automaton为子串模式"""
+    result = match_xml_file(xml_file, guid_info, automaton=automaton)
+    if writer is None and result["matches"]:
+        with MappingDBWriter(db_path, defer_indexes=False) as single_writer:
+            return handle_match_result(result, guid_info, single_writer)
+    return handle_match_result(result, guid_info, writer)
+
+
+# -------------------------- 6.1 多进程解析 + 单写入进程 --------------------------
+_worker_guid_keys = frozenset()
+_worker_options = None
+_worker_prefilter = None
+_worker_automaton = None
+
+
+def build_prefilter(guid_keys, options):
+    options = options or DEFAULT_MATCH_OPTIONS
+    return GuidPrefilter(guid_keys, substring=options.get("substring", False)) if options.get("prefilter") else None
+
+
+def build_automaton(guid_keys, options):
+    options = options or DEFAULT_MATCH_OPTIONS
+    return GuidAutomaton(guid_keys) if options.get("substring") else None
+
+
+def _init_match_worker(guid_keys, options):
+    # 每个子进程只接收一次GUID集合，避免每个任务重复序列化guid_info；预筛器和自动机在子进程内各建一次
+    global _worker_guid_keys, _worker_options, _worker_prefilter, _worker_automaton
+    _worker_guid_keys = guid_keys
+    _worker_options = options
+    _worker_prefilter = build_prefilter(guid_keys, options)
+    _worker_automaton = build_automaton(guid_keys, options)
+
+
+def _match_chunk_worker(xml_files):
+    """
+    子进程匹配一块文件，返回 (逐文件结果, 本块的GuidMatchTable)；
+    表中GUID和文件名按首次出现驻留（不带Excel元数据），由主进程按块顺序merge进guid_info
+    """
+    results = []
+    table = GuidMatchTable()
+    for xml_file in xml_files:
+        result = match_xml_file(xml_file, _worker_guid_keys, _worker_options, _worker_prefilter, _worker_automaton)
+        # 与handle_match_result一致：解析失败的文件不计入匹配结果
+        if result["error"] is None:
+            merge_match_result(result, table)
+        results.append(result)
+    return results, table
+
+
+class MatchRunStats:
+    """统计预筛跳过率，并按已解析文件的平均解析速度估算节省的时间"""
+
+    def __init__(self):
+        self.files = 0
+        self.skipped = 0
+        self.skipped_bytes = 0
+        self.skipped_seconds = 0.0
+        self.parsed_bytes = 0
+        self.parsed_seconds = 0.0
+
+    def add(self, result):
+        self.files += 1
+        if result["prefilter_skipped"]:
+            self.skipped += 1
+            self.skipped_bytes += result["bytes"]
+            self.skipped_seconds += result["elapsed"]
+        elif result["error"] is None:
+            self.parsed_bytes += result["bytes"]
+            self.parsed_seconds += result["elapsed"]
+
+    def report(self):
+        if not self.files:
+            return
+        skip_rate = self.skipped / self.files * 100
+        logger.info(
+            f"字节预筛：{self.files}个文件中跳过{self.skipped}个（{skip_rate:.1f}%），"
+            f"跳过{self.skipped_bytes / 1024 / 1024:.1f}MB，预筛耗时{self.skipped_seconds:.2f}秒（各进程合计）"
+        )
+        if self.skipped and self.parsed_bytes:
+            estimated = self.skipped_bytes * self.parsed_seconds / self.parsed_bytes - self.skipped_seconds
+            logger.info(f"字节预筛：按平均解析速度估算节省解析时间约{estimated:.2f}秒（各进程合计）")
+
+
+def run_parallel_matching(xml_files, guid_info, writer, workers, guid_keys=None, file_states=None, options=None,
+                          stats=None):
+    """
+    N个子进程按块解析XML并匹配GUID，每块的匹配记录在子进程中累积为GuidMatchTable；
+    主进程作为唯一写入端（writer）批量提交数据库，并按块的原始顺序merge进guid_info，保证结果与顺序执行一致
+    """
+    if guid_keys is None:
+        guid_keys = frozenset(guid_info.keys())
+    all_matched_guids = set()
+    chunksize = max(1, len(xml_files) // (workers * 16))
+    chunks = [xml_files[start:start + chunksize] for start in range(0, len(xml_files), chunksize)]
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_match_worker,
+            initargs=(guid_keys, options)
+    ) as executor, tqdm(total=len(xml_files), desc=f"解析XML并匹配（{workers}进程）", ncols=80) as progress:
+        for results, table in executor.map(_match_chunk_worker, chunks):
+            for result in results:
+                if stats is not None:
+                    stats.add(result)
+                file_state = file_states.get(result["xml_file_path"]) if file_states else None
+                all_matched_guids.update(handle_match_result(result, guid_info, writer, file_state, merge=False))
+            guid_info.merge(table)
+            progress.update(len(results))
+    return all_matched_guids
+
+
+def match_files(xml_files, guid_info, writer, workers, guid_keys=None, file_states=None, options=None):
+    """
+    按进程数选择顺序或并行匹配；guid_keys限定只匹配部分GUID，
+    file_states为增量模式的文件状态，options见DEFAULT_MATCH_OPTIONS
+    """
+    stats = MatchRunStats()
+    if workers > 1:
+        all_matched_guids = run_parallel_matching(
+            xml_files, guid_info, writer, workers, guid_keys, file_states, options, stats
+        )
+    else:
+        if guid_keys is None:
+            guid_keys = guid_info
+        prefilter = build_prefilter(guid_keys, options)
+        automaton = build_automaton(guid_keys, options)
+        all_matched_guids = set()
+        for xml_file in tqdm(xml_files, desc="解析XML并匹配", ncols=80):
+            result = match_xml_file(xml_file, guid_keys, options, prefilter, automaton)
+            stats.add(result)
+            file_state = file_states.get(xml_file) if file_states else None
+            all_matched_guids.update(handle_match_result(result, guid_info, writer, file_state))
+    stats.report()
+    return all_matched_guids
+
+
+def verify_against_sequential(xml_files, guid_info, options=None):
+    """在当前进程中顺序重跑匹配（不写数据库），校验并行结果的GUID→XML文件映射是否一致"""
+    sequential = GuidMatchTable(guid_info.keys())
+    automaton = build_automaton(guid_info.keys(), options)
+    for xml_file in tqdm(xml_files, desc="顺序校验", ncols=80):
+        result = match_xml_file(xml_file, guid_info, options, automaton=automaton)
+        merge_match_result(result, sequential)
+
+    expected = sequential.file_lists()
+    actual = guid_info.file_lists()
+    mismatched = [guid for guid in set(expected) | set(actual) if expected.get(guid) != actual.get(guid)]
+    if mismatched:
+        logger.error(f"并行结果与顺序执行不一致：{len(mismatched)}个GUID，示例：{mismatched[:5]}")
+        return False
+    logger.info(f"并行结果校验通过：{len(expected)}个GUID与顺序执行一致")
+    return True
+
+
+# -------------------------- 6.2 增量扫描 --------------------------
+def file_content_hash(path, chunk_size=1024 * 1024):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_file_state(path):
+    stat = os.stat(path)
+    return {
+        "file_size": stat.st_size,
+        "file_mtime_ns": stat.st_mtime_ns,
+        "content_hash": file_content_hash(path)
+    }
 
-            conn.commit()
-            logger.info(f"XML处理完成「{xml_file_name}」：匹配{len(matched_guids)}个GUID")
-        except Exception as e:
-            logger.error(f"数据库写入失败「{xml_file_name}」：{str(e)}")
-            conn.rollback()
-        finally:
-            conn.close()
 
-    return matched_guids
+def plan_incremental_scan(xml_files, stored_states):
+    """
+    对比本次扫描的文件与库中记录的状态：size+mtime一致直接跳过，否则计算内容哈希
+    Returns: (需重新解析的{path: file_state}, 未变化的文件列表, 内容未变仅mtime变化的{path: file_state})
+    """
+    changed = {}
+    unchanged = []
+    touched = {}
+    for path in xml_files:
+        stat = os.stat(path)
+        stored = stored_states.get(path)
+        if stored and stored[2] and stored[0] == stat.st_size and stored[1] == stat.st_mtime_ns:
+            unchanged.append(path)
+            continue
+        file_state = read_file_state(path)
+        if stored and stored[2] == file_state["content_hash"]:
+            unchanged.append(path)
+            touched[path] = file_state
+        else:
+            changed[path] = file_state
+    return changed, unchanged, touched
+
+
+def run_incremental_matching(xml_files, guid_info, db_path, workers, batch_size, options=None):
+    """
+    增量模式：只重新解析新增/变更的文件，清理已删除文件的行；
+    Excel GUID集合变化时，移除旧GUID的映射，只对未变化文件补充匹配新增GUID。
+    最后从数据库重建guid_info的xml_files（按本次扫描的文件顺序），保证Excel结果与全量运行一致
+    """
+    current_guids = set(guid_info.keys())
+    conn = sqlite3.connect(db_path)
+    try:
+        stored_states = load_file_states(conn)
+        previous_guids = load_guid_snapshot(conn)
+        changed, unchanged, touched = plan_incremental_scan(xml_files, stored_states)
+        deleted = set(stored_states) - set(xml_files)
+        removed_guids = previous_guids - current_guids
+        added_guids = current_guids - previous_guids
+
+        purge_files(conn, list(changed) + list(deleted))
+        purge_guids(conn, removed_guids)
+        update_file_mtimes(conn, touched)
+        conn.commit()
+    finally:
+        conn.close()
+    logger.info(
+        f"增量扫描：新增/变更{len(changed)}个，未变化{len(unchanged)}个，已删除{len(deleted)}个；"
+        f"Excel GUID新增{len(added_guids)}个，移除{len(removed_guids)}个"
+    )
+
+    # 小批量变更不值得删除重建大表索引
+    with MappingDBWriter(db_path, batch_files=batch_size, defer_indexes=False) as writer:
+        if changed:
+            match_files(list(changed), guid_info, writer, workers, file_states=changed, options=options)
+        if added_guids and unchanged:
+            # 未变化文件只需补充匹配新增GUID，强制字节预筛，只解析可能包含新增GUID的文件
+            logger.info(f"新增GUID补充匹配：{len(unchanged)}个未变化文件")
+            rematch_options = dict(options or DEFAULT_MATCH_OPTIONS, prefilter=True)
+            match_files(unchanged, guid_info, writer, workers, guid_keys=frozenset(added_guids),
+                        options=rematch_options)
+
+    # 从数据库重建匹配结果
+    guid_info.clear_matches()
+    file_order = {path: i for i, path in enumerate(xml_files)}
+    conn = sqlite3.connect(db_path)
+    try:
+        mappings = load_guid_file_mappings(conn)
+        mappings.sort(key=lambda m: file_order.get(m[1], len(file_order)))
+        all_matched_guids = set()
+        for guid, xml_file_path in mappings:
+            if guid not in current_guids:
+                continue
+            guid_info.add_match(guid, os.path.basename(xml_file_path))
+            all_matched_guids.add(guid)
+        rebuild_excel_metadata(conn, guid_info, all_matched_guids)
+        save_guid_snapshot(conn, current_guids)
+        conn.commit()
+    finally:
+        conn.close()
+    return all_matched_guids
 
 
 # -------------------------- 7. 主逻辑 --------------------------
-def main():
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Excel中的GUID在XML文件夹中的匹配检查（结果写入SQLite与Excel）")
+    parser.add_argument("--excel", default=r"D:\01_PROJECT\OHMS\[公开] 机载健康管理系统C版模型技术要求及仿真模型校验要求\ECMto631\附件2-CXF飞机机载健康管理系统C版蓝标模型接口表（MoICD）.xlsx",
+                        help="MoICD Excel文件路径")
+    parser.add_argument("--sheet", default="BUS", help="Excel工作表名（默认：BUS）")
+    parser.add_argument("--xml-folder", default=r"D:\01_PROJECT\OHMS\CXF ICD CXF AS2.0_CFG1.3", help="XML文件夹路径")
+    parser.add_argument("--no-workbook-cache", action="store_true", help="不使用工作簿列式缓存，直接读取xlsx")
+    parser.add_argument("--db", default="xml_guid_mapping.db", help="SQLite数据库路径（默认：xml_guid_mapping.db）")
+    parser.add_argument("--output", default="匹配结果汇总.xlsx", help="结果文件路径（扩展名按--export-formats替换）")
+    parser.add_argument("--export-formats", nargs="+", choices=EXPORT_FORMATS, default=["xlsx"],
+                        help="结果导出格式，可多选（默认：xlsx；csv/parquet供不需要Excel的下游工具使用）")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="解析XML的进程数（默认1为顺序执行；0表示使用全部CPU核数）")
+    parser.add_argument("--batch-size", type=int, default=1000, help="每个数据库事务写入的XML文件数（默认：1000）")
+    parser.add_argument("--incremental", action="store_true",
+                        help="增量模式：保留数据库，只重新解析新增/变更的XML并清理已删除文件")
+    parser.add_argument("--stream-threshold-mb", type=float, default=64,
+                        help="不小于该大小（MB）的XML使用iterparse流式匹配（默认64；0表示全部流式，负数表示关闭）")
+    parser.add_argument("--no-prefilter", action="store_true",
+                        help="关闭字节级GUID预筛，所有XML都完整解析")
+    parser.add_argument("--substring-match", action="store_true",
+                        help="子串模式：用多模式自动机在属性值和节点文本中查找内嵌的GUID（如ref=\"a;b\"、{GUID}），"
+                             "映射表记录匹配位置类型；切换模式后请全量运行一次，增量模式不会重扫未变化的文件")
+    parser.add_argument("--verify-sequential", action="store_true",
+                        help="并行执行后在当前进程顺序重跑一次，校验GUID→XML文件映射与顺序执行一致")
+    return parser
+
+
+def main(argv=None):
     global logger
     logger = setup_logging()
     logger.info("=" * 50 + " Excel与XML匹配（含路径+文件名双字段） " + "=" * 50)
 
+    args = build_arg_parser().parse_args(argv)
+
     # 配置参数
     LOG_PATH = "excel_xml_check.log"
-    DB_PATH = "xml_guid_mapping.db"
-    EXCEL_PATH = r"D:\01_PROJECT\OHMS\[公开] 机载健康管理系统C版模型技术要求及仿真模型校验要求\ECMto631\附件2-CXF飞机机载健康管理系统C版蓝标模型接口表（MoICD）.xlsx"
+    DB_PATH = args.db
+    EXCEL_PATH = args.excel
     GUID_COLUMN = "Guid"
     META_COLUMNS = {
         "physical_port": "PhysicalPort",
@@ -323,51 +818,71 @@ def main():
         "dp_name": "DP_Name",
         "full_name": "Fullname"
     }
-    XML_FOLDER = r"D:\01_PROJECT\OHMS\CXF ICD CXF AS2.0_CFG1.3"
-    SHEET_NAME = "BUS"
+    XML_FOLDER = args.xml_folder
+    SHEET_NAME = args.sheet
+    OUTPUT_PATH = args.output
+    EXPORT_FORMATS_SELECTED = args.export_formats
+    WORKERS = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    MATCH_OPTIONS = dict(DEFAULT_MATCH_OPTIONS)
+    MATCH_OPTIONS["stream_threshold"] = (
+        int(args.stream_threshold_mb * 1024 * 1024) if args.stream_threshold_mb >= 0 else None
+    )
+    MATCH_OPTIONS["prefilter"] = not args.no_prefilter
+    MATCH_OPTIONS["substring"] = args.substring_match
 
-    # 清空旧内容
-    clear_file_contents(log_path=LOG_PATH, db_path=DB_PATH)
+    # 清空旧内容（增量模式保留数据库）
+    clear_file_contents(log_path=LOG_PATH, db_path=DB_PATH, clear_db=not args.incremental)
 
     # 初始化数据库（含xml_file_name字段）
     init_database(DB_PATH)
 
     # 读取Excel
-    df, guid_info = read_excel_data(EXCEL_PATH, GUID_COLUMN, META_COLUMNS, SHEET_NAME)
+    df, guid_info = read_excel_data(EXCEL_PATH, GUID_COLUMN, META_COLUMNS, SHEET_NAME,
+                                    use_cache=not args.no_workbook_cache)
     if not guid_info:
         logger.warning("无有效GUID，任务终止")
-        df.to_excel("匹配结果汇总.xlsx", index=False)
+        export_dataframe_formats(df, OUTPUT_PATH, EXPORT_FORMATS_SELECTED, report=logger.info)
         return
 
     # 获取XML文件
     xml_files = get_all_xml_files(XML_FOLDER)
     if not xml_files:
         logger.warning("无XML文件，任务终止")
-        df.to_excel("匹配结果汇总.xlsx", index=False)
+        export_dataframe_formats(df, OUTPUT_PATH, EXPORT_FORMATS_SELECTED, report=logger.info)
         return
 
-    # 解析XML并匹配
-    all_matched_guids = set()
-    for xml_file in tqdm(xml_files, desc="解析XML并匹配", ncols=80):
-        matched = parse_xml_and_match_guids(xml_file, guid_info, DB_PATH)
-        all_matched_guids.update(matched)
+    if MATCH_OPTIONS["substring"]:
+        logger.info(f"子串匹配模式：GUID自动机实现为{choose_backend(guid_info.keys())}")
+
+    # 解析XML并匹配（单连接批量写入，每batch_size个文件提交一次）
+    if WORKERS > 1:
+        logger.info(f"并行模式：{WORKERS}个解析进程，单写入端每{args.batch_size}个文件提交一次")
+    if args.incremental:
+        all_matched_guids = run_incremental_matching(
+            xml_files, guid_info, DB_PATH, WORKERS, args.batch_size, MATCH_OPTIONS
+        )
+    else:
+        # 全量运行记录每个文件（含无匹配的文件）的大小/mtime/哈希和本次的Excel GUID集合，
+        # 之后的--incremental运行据此只重新解析变化的文件、计算GUID增减
+        full_options = dict(MATCH_OPTIONS, record_state=True)
+        with MappingDBWriter(DB_PATH, batch_files=args.batch_size) as writer:
+            all_matched_guids = match_files(xml_files, guid_info, writer, WORKERS, options=full_options)
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            save_guid_snapshot(conn, guid_info.keys())
+            conn.commit()
+        finally:
+            conn.close()
+        if WORKERS > 1 and args.verify_sequential:
+            verify_against_sequential(xml_files, guid_info, MATCH_OPTIONS)
 
     # 更新Excel
     logger.info(f"\n更新Excel：{len(all_matched_guids)}个GUID匹配成功")
-    for guid in tqdm(all_matched_guids, desc="更新Excel进度", ncols=80):
-        info = guid_info[guid]
-        unique_xml_files = list(set(info["xml_files"]))
-        xml_count = len(unique_xml_files)
-        xml_names = ",".join(unique_xml_files)
-        for idx in info["indices"]:
-            df.at[idx, "是否存在"] = True
-            df.at[idx, "匹配XML文件数"] = xml_count
-            df.at[idx, "匹配XML文件名"] = xml_names
+    write_back_match_results(df, GUID_COLUMN, guid_info, all_matched_guids)
 
     # 保存结果
-    output_excel = "匹配结果汇总.xlsx"
-    df.to_excel(output_excel, index=False)
-    logger.info(f"结果已保存：{output_excel}")
+    outputs = export_dataframe_formats(df, OUTPUT_PATH, EXPORT_FORMATS_SELECTED, report=logger.info)
+    logger.info(f"结果已保存：{'、'.join(outputs)}")
 
     # 验证：查询文件名字段
     conn = sqlite3.connect(DB_PATH)
@@ -0,0 +1,333 @@
+#  _*_ coding:utf-8 _*_
+"""
+结果导出层：
+- xlsx：流式写入，内存占用与行数无关（有xlsxwriter时用constant_memory模式，否则用openpyxl write_only模式）
+- csv：utf-8-sig编码，Excel可直接打开
+- parquet：需要pyarrow，供不需要Excel的下游工具使用
+每次导出都会报告写入耗时和文件大小。
+结果行数不确定（可能上百万行）时用RecordStreamWriter边产生边分块写出，xlsx超过Excel行数上限自动续写到新工作表。
+"""
+import csv
+import datetime
+import math
+import os
+import time
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+
+try:
+    import xlsxwriter
+    XLSX_ENGINE = "xlsxwriter"
+except ImportError:
+    xlsxwriter = None
+    XLSX_ENGINE = "openpyxl"
+
+XLSX_ENGINES = ("xlsxwriter", "openpyxl")
+EXPORT_FORMATS = ("xlsx", "csv", "parquet")
+DATETIME_FORMAT = "yyyy-mm-dd hh:mm:ss"
+# 结果中的字符串原样保存：以=开头的不当作公式，URL不转成超链接（xlsxwriter单表超链接数量也有上限）
+XLSXWRITER_OPTIONS = {
+    "constant_memory": True,
+    "strings_to_formulas": False,
+    "strings_to_urls": False,
+    "default_date_format": DATETIME_FORMAT,
+}
+CHUNK_ROWS = 10000
+# Excel单个工作表的行数上限（含表头）
+EXCEL_MAX_ROWS = 1048576
+
+
+def _clean_value(value):
+    # 空值写成空单元格（与DataFrame.to_excel一致），numpy标量转成Python原生类型
+    if value is None:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if hasattr(value, "item") and not isinstance(value, (str, bytes)):
+        value = value.item()
+        if isinstance(value, float) and math.isnan(value):
+            return None
+    return value
+
+
+def _clean_row(row):
+    return [_clean_value(value) for value in row]
+
+
+def iter_dataframe_rows(df):
+    """分块把DataFrame转换为Python行，避免一次性生成整表的对象副本"""
+    for start in range(0, len(df), CHUNK_ROWS):
+        chunk = df.iloc[start:start + CHUNK_ROWS]
+        chunk = chunk.astype(object).where(chunk.notna(), None)
+        yield from chunk.itertuples(index=False, name=None)
+
+
+class StreamingXlsxWriter:
+    """
+    常量内存xlsx写入器，用法：
+        with StreamingXlsxWriter(path) as writer:
+            sheet = writer.add_sheet("详细结果", ["列1", "列2"])
+            sheet.write_row([1, 2])
+    工作表必须按顺序逐个写完（xlsxwriter constant_memory模式的限制）；
+    单个工作表写满max_rows行后自动续写到「原名_2」「原名_3」…，新工作表重复表头；
+    两种引擎写出的内容一致：字符串不转成公式/超链接，日期时间格式为DATETIME_FORMAT
+    """
+
+    def __init__(self, output_path, max_rows=EXCEL_MAX_ROWS, engine=None):
+        engine = engine or XLSX_ENGINE
+        if engine not in XLSX_ENGINES:
+            raise ValueError(f"不支持的xlsx引擎：{engine}（支持：{'/'.join(XLSX_ENGINES)}）")
+        if engine == "xlsxwriter" and xlsxwriter is None:
+            raise ValueError("未安装xlsxwriter")
+        self.output_path = output_path
+        self.max_rows = max_rows
+        self.engine = engine
+        self.rows_written = 0
+        if engine == "xlsxwriter":
+            self._workbook = xlsxwriter.Workbook(output_path, XLSXWRITER_OPTIONS)
+        else:
+            self._workbook = Workbook(write_only=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add_sheet(self, sheet_name, columns):
+        return _XlsxSheet(self, sheet_name, columns)
+
+    def close(self):
+        if self._workbook is None:
+            return
+        if self.engine == "xlsxwriter":
+            self._workbook.close()
+        else:
+            self._workbook.save(self.output_path)
+        self._workbook = None
+
+
+class _XlsxSheet:
+    def __init__(self, writer, sheet_name, columns):
+        self._writer = writer
+        self.sheet_name = sheet_name
+        self.sheet_names = []
+        self._columns = list(columns)
+        self._new_worksheet()
+
+    def _new_worksheet(self):
+        part = len(self.sheet_names) + 1
+        # 工作表名最长31个字符
+        name = self.sheet_name if part == 1 else f"{self.sheet_name[:31 - len(str(part)) - 1]}_{part}"
+        if self._writer.engine == "xlsxwriter":
+            self._sheet = self._writer._workbook.add_worksheet(name)
+        else:
+            self._sheet = self._writer._workbook.create_sheet(name)
+        self.sheet_names.append(name)
+        self._row_index = 0
+        self._append(self._columns)
+
+    def _append(self, row):
+        if self._writer.engine == "xlsxwriter":
+            self._sheet.write_row(self._row_index, 0, row)
+        else:
+            self._sheet.append([self._openpyxl_cell(value) for value in row])
+        self._row_index += 1
+
+    def _openpyxl_cell(self, value):
+        # 与XLSXWRITER_OPTIONS保持一致：openpyxl默认把=开头的字符串写成公式
+        if isinstance(value, str) and value.startswith("="):
+            cell = WriteOnlyCell(self._sheet, value)
+            cell.data_type = "s"
+            return cell
+        if isinstance(value, (datetime.datetime, datetime.date)):
+            cell = WriteOnlyCell(self._sheet, value)
+            cell.number_format = DATETIME_FORMAT
+            return cell
+        return value
+
+    def write_row(self, row, clean=True):
+        if self._row_index >= self._writer.max_rows:
+            self._new_worksheet()
+        self._append(_clean_row(row) if clean else row)
+        self._writer.rows_written += 1
+
+    def write_rows(self, rows, clean=True):
+        for row in rows:
+            self.write_row(row, clean)
+
+
+class RecordStreamWriter:
+    """
+    边产生边写出结果行，内存只保留一个分块：
+        with RecordStreamWriter("结果.xlsx", columns, ["xlsx", "csv"]) as writer:
+            writer.write_rows(rows)
+            writer.write_summary(summary_columns, summary_rows)
+    - 各格式文件名取output_path去掉扩展名后加 .xlsx/.csv/.parquet
+    - 缓存满chunk_rows行或距上次写出超过flush_seconds秒时写出一块；CSV每块写完即刷新到磁盘，
+      运行中断时已写出的部分仍可使用（xlsx/parquet要在关闭时才能成为完整文件，异常退出时也会在with结束时关闭）
+    - xlsx明细超过Excel行数上限时自动续写到新工作表
+    - write_summary在xlsx中追加汇总工作表，csv/parquet写到「原名_汇总」文件
+    """
+
+    def __init__(self, output_path, columns, formats=("xlsx",), sheet_name="Sheet1", summary_sheet_name="汇总",
+                 chunk_rows=CHUNK_ROWS, flush_seconds=5.0, max_rows=EXCEL_MAX_ROWS):
+        unknown = [fmt for fmt in formats if fmt not in EXPORT_FORMATS]
+        if unknown:
+            raise ValueError(f"不支持的导出格式：{'/'.join(unknown)}（支持：{'/'.join(EXPORT_FORMATS)}）")
+        self.base = os.path.splitext(output_path)[0]
+        self.columns = [str(col) for col in columns]
+        self.formats = list(dict.fromkeys(formats))
+        self.summary_sheet_name = summary_sheet_name
+        self.chunk_rows = chunk_rows
+        self.flush_seconds = flush_seconds
+        self.rows_written = 0
+        self.flushes = 0
+        self._buffer = []
+        self._last_flush = time.perf_counter()
+        self._start = time.perf_counter()
+        self._closed = False
+
+        self._xlsx = None
+        self._xlsx_sheet = None
+        self._csv_file = None
+        self._csv = None
+        self._parquet = None
+        if "xlsx" in self.formats:
+            self._xlsx = StreamingXlsxWriter(self.path("xlsx"), max_rows=max_rows)
+            self._xlsx_sheet = self._xlsx.add_sheet(sheet_name, self.columns)
+        if "csv" in self.formats:
+            self._csv_file = open(self.path("csv"), "w", encoding="utf-8-sig", newline="")
+            self._csv = csv.writer(self._csv_file)
+            self._csv.writerow(self.columns)
+        if "parquet" in self.formats:
+            self._parquet = _ParquetChunkWriter(self.path("parquet"), self.columns)
+
+    def path(self, fmt):
+        return f"{self.base}.{fmt}"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write_row(self, row):
+        self._buffer.append(row)
+        if len(self._buffer) >= self.chunk_rows or time.perf_counter() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.write_row(row)
+
+    def flush(self):
+        self._last_flush = time.perf_counter()
+        if not self._buffer:
+            return
+        rows = [_clean_row(row) for row in self._buffer]
+        self._buffer = []
+        if self._xlsx_sheet is not None:
+            self._xlsx_sheet.write_rows(rows, clean=False)
+        if self._csv is not None:
+            self._csv.writerows(rows)
+            self._csv_file.flush()
+        if self._parquet is not None:
+            self._parquet.write_rows(rows)
+        self.rows_written += len(rows)
+        self.flushes += 1
+
+    def write_summary(self, columns, rows):
+        """明细写完后调用；汇总行数很少，一次写出"""
+        self.flush()
+        columns = [str(col) for col in columns]
+        rows = [_clean_row(row) for row in rows]
+        if self._xlsx is not None:
+            self._xlsx.add_sheet(self.summary_sheet_name, columns).write_rows(rows)
+        if self._csv is not None:
+            with open(f"{self.base}_{self.summary_sheet_name}.csv", "w", encoding="utf-8-sig", newline="") as f:
+                summary_csv = csv.writer(f)
+                summary_csv.writerow(columns)
+                summary_csv.writerows(rows)
+        if self._parquet is not None:
+            summary_parquet = _ParquetChunkWriter(f"{self.base}_{self.summary_sheet_name}.parquet", columns)
+            summary_parquet.write_rows(rows)
+            summary_parquet.close()
+
+    def close(self, report=print):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self.flush()
+        finally:
+            if self._xlsx is not None:
+                self._xlsx.close()
+            if self._csv_file is not None:
+                self._csv_file.close()
+            if self._parquet is not None:
+                self._parquet.close()
+        seconds = time.perf_counter() - self._start
+        for fmt in self.formats:
+            report_export(self.path(fmt), seconds, report)
+        if report and self._xlsx_sheet is not None and len(self._xlsx_sheet.sheet_names) > 1:
+            report(f"明细超过Excel行数上限，已分{len(self._xlsx_sheet.sheet_names)}个工作表："
+                   f"{'、'.join(self._xlsx_sheet.sheet_names)}")
+
+
+class _ParquetChunkWriter:
+    """每个分块写成一个row group；所有列按字符串保存（空值保留为null）"""
+
+    def __init__(self, path, columns):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self._pa = pa
+        self.columns = columns
+        self._schema = pa.schema([(col, pa.string()) for col in columns])
+        self._writer = pq.ParquetWriter(path, self._schema)
+
+    def write_rows(self, rows):
+        if not rows:
+            return
+        arrays = [
+            self._pa.array([None if row[i] is None else str(row[i]) for row in rows], type=self._pa.string())
+            for i in range(len(self.columns))
+        ]
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def report_export(output_path, seconds, report=print):
+    if report:
+        size_mb = os.path.getsize(output_path) / 1024 / 1024
+        report(f"已导出「{output_path}」：耗时{seconds:.2f}秒，{size_mb:.2f}MB")
+
+
+def export_dataframe(df, output_path, sheet_name="Sheet1", report=print):
+    """按扩展名（.xlsx/.csv/.parquet）导出DataFrame（不含索引），返回输出路径"""
+    start = time.perf_counter()
+    extension = os.path.splitext(output_path)[1].lower().lstrip(".")
+    if extension == "xlsx":
+        with StreamingXlsxWriter(output_path) as writer:
+            sheet = writer.add_sheet(sheet_name, [str(col) for col in df.columns])
+            sheet.write_rows(iter_dataframe_rows(df))
+    elif extension == "csv":
+        df.to_csv(output_path, index=False, encoding="utf-8-sig")
+    elif extension == "parquet":
+        df.to_parquet(output_path, index=False)
+    else:
+        raise ValueError(f"不支持的导出格式：{output_path}（支持：{'/'.join(EXPORT_FORMATS)}）")
+    report_export(output_path, time.perf_counter() - start, report)
+    return output_path
+
+
+def export_dataframe_formats(df, output_path, formats, sheet_name="Sheet1", report=print):
+    """按同一文件名导出多种格式，如 结果.xlsx → 结果.csv / 结果.parquet"""
+    base = os.path.splitext(output_path)[0]
+    return [
+        export_dataframe(df, f"{base}.{fmt}", sheet_name=sheet_name, report=report)
+        for fmt in formats
+    ]
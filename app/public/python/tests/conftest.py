@@ -0,0 +1,11 @@
+#  _*_ coding:utf-8 _*_
+import os
+import sys
+import tempfile
+
+# 脚本都是平铺在上级目录的模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 工作簿旁路缓存和差异缓存写到临时目录，不污染脚本目录（须在导入脚本模块前设置）
+_cache_root = tempfile.mkdtemp(prefix="icd_tool_tests_")
+os.environ.setdefault("WORKBOOK_CACHE_DIR", os.path.join(_cache_root, "workbook_cache"))
+os.environ.setdefault("DIFF_CACHE_PATH", os.path.join(_cache_root, "diff_cache", "diff_cache.db"))
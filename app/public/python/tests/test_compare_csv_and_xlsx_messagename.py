@@ -0,0 +1,117 @@
+#  _*_ coding:utf-8 _*_
+from collections import Counter
+
+import pandas as pd
+import pytest
+
+import compare_csv_and_xlsx_messagename as membership
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    xlsx_path = tmp_path / "eoicd.xlsx"
+    pd.DataFrame({"Word_Name/Message_Name": ["MSG_A", "MSG_B", "MSG_C", "MSG_A"]}).to_excel(
+        xlsx_path, sheet_name="BUS", index=False)
+    csv_paths = []
+    for index, names in enumerate([["MSG_A", "MSG_B"], ["MSG_A"], ["MSG_A", "MSG_C", "OTHER"]]):
+        csv_path = tmp_path / f"t{index + 1}.csv"
+        pd.DataFrame({"Name": names}).to_csv(csv_path, index=False)
+        csv_paths.append(csv_path)
+    return xlsx_path, csv_paths
+
+
+def run(tmp_path, xlsx_path, csv_paths, *extra):
+    args = ["--xlsx", str(xlsx_path), "--txt-output", str(tmp_path / "report.txt"),
+            "--xlsx-output", str(tmp_path / "report.xlsx")]
+    for csv_path in csv_paths:
+        args += ["--csv", str(csv_path), "Name"]
+    membership.main(args + list(extra))
+
+
+def test_final_message_names_generated_formats(tmp_path, inputs, capsys):
+    xlsx_path, csv_paths = inputs
+    run(tmp_path, xlsx_path, csv_paths, "--export-formats", "csv")
+    assert not (tmp_path / "report.xlsx").exists()
+    assert (tmp_path / "report.csv").exists()
+    assert "🎉 对比完成！已生成TXT、CSV格式报告" in capsys.readouterr().out
+
+
+def test_three_targets_record_membership_masks():
+    source = {"MSG_A", "MSG_B", "MSG_C", "MSG_D"}
+    targets = [{"MSG_A", "MSG_B"}, {"MSG_A"}, {"MSG_A", "MSG_C", "OTHER"}]
+    results, mask_counts = membership.compare_data(source, targets, ["t1.csv", "t2.csv", "t3.csv"])
+    assert mask_counts == {0b111: 1, 0b001: 1, 0b100: 1, 0b000: 1}
+    assert [(item["Word_Name/Message_Name"], item["存在状态"], item["查找来源（CSV文件）"]) for item in results] == [
+        ("MSG_A", "全部3个CSV都存在", "t1.csv、t2.csv、t3.csv"),
+        ("MSG_B", "只在第一个CSV存在", "t1.csv"),
+        ("MSG_C", "只在第三个CSV存在", "t3.csv"),
+        ("MSG_D", "全部3个CSV都不存在", "无"),
+    ]
+    assert membership.status_label(0b011, 3) == "部分CSV存在（2/3）"
+
+
+def test_two_targets_keep_original_status_labels():
+    results, mask_counts = membership.compare_data({"A", "B", "C", "D"}, [{"A", "B"}, {"A", "C"}], ["x.csv", "y.csv"])
+    assert [item["存在状态"] for item in results] == ["两个CSV都存在", "只在第一个CSV存在", "只在第二个CSV存在",
+                                                    "两个CSV都不存在"]
+    assert [count for _, _, count in membership.summary_items(mask_counts, ["x.csv", "y.csv"])] == [1, 1, 1, 1]
+
+
+def test_xlsx_report_lists_status_per_name(tmp_path, inputs):
+    xlsx_path, csv_paths = inputs
+    run(tmp_path, xlsx_path, csv_paths)
+    report = pd.read_excel(tmp_path / "report.xlsx", sheet_name=0)
+    assert report["Word_Name/Message_Name"].tolist() == ["MSG_A", "MSG_B", "MSG_C"]
+    assert report["查找来源（CSV文件）"].tolist() == ["t1.csv、t2.csv、t3.csv", "t1.csv", "t3.csv"]
+
+
+def txt_items(count):
+    for index in range(count):
+        yield {"Word_Name/Message_Name": f"MSG_{index:02d}", "存在状态": "两个CSV都存在", "查找来源（CSV文件）": "x.csv、y.csv"}
+
+
+def test_txt_report_streams_pages(tmp_path):
+    output = str(tmp_path / "report.txt")
+    membership.generate_txt_report(txt_items(5), 5, Counter({3: 5}), ["Name", "Name"], ["x.csv", "y.csv"], output,
+                                   page_size=2)
+    pages = [membership.txt_page_path(output, page) for page in (1, 2, 3)]
+    assert pages[1:] == [str(tmp_path / "report_002.txt"), str(tmp_path / "report_003.txt")]
+    texts = [open(path, encoding="utf-8").read() for path in pages]
+    assert not (tmp_path / "report_004.txt").exists()
+    assert "源数据总不重复值：5 个" in texts[0]
+    assert "明细续见：report_002.txt" in texts[0]
+    assert [text.count("名称：MSG_") for text in texts] == [2, 2, 1]
+    assert "第3页，自第5条起" in texts[2]
+    assert "📝 说明" in texts[2] and "📝 说明" not in texts[0]
+
+
+def test_txt_report_limits_details(tmp_path):
+    output = str(tmp_path / "report.txt")
+    membership.generate_txt_report(txt_items(5), 5, Counter({3: 5}), ["Name", "Name"], ["x.csv", "y.csv"], output,
+                                   max_detail=3)
+    text = open(output, encoding="utf-8").read()
+    assert text.count("名称：MSG_") == 3
+    assert "MSG_03" not in text
+    assert "其余 2 条明细已省略（--max-detail 3）" in text
+
+
+def test_normalized_and_fuzzy_modes_report_best_match():
+    normalizer = membership.build_normalizer()
+    source = {"eng-oil-press", "ENG_OIL_TEMPX", "FUEL_FLOW"}
+    targets = [{"ENG_OIL_PRESS"}, {"ENG_OIL_TEMP"}]
+    results, _ = membership.compare_data(source, targets, ["x.csv", "y.csv"], "normalized", normalizer)
+    assert [(item["存在状态"], item["最佳匹配"], item["匹配方式"]) for item in results] == [
+        ("两个CSV都不存在", "", ""),
+        ("两个CSV都不存在", "", ""),
+        ("只在第一个CSV存在", "ENG_OIL_PRESS", "规范化"),
+    ]
+
+    results, mask_counts = membership.compare_data(source, targets, ["x.csv", "y.csv"], "fuzzy", normalizer, 0.8)
+    by_name = {item["Word_Name/Message_Name"]: item for item in results}
+    assert by_name["ENG_OIL_TEMPX"]["存在状态"] == "只在第二个CSV存在"
+    assert by_name["ENG_OIL_TEMPX"]["最佳匹配"] == "ENG_OIL_TEMP"
+    assert by_name["ENG_OIL_TEMPX"]["匹配方式"] == "模糊"
+    assert 0.8 <= by_name["ENG_OIL_TEMPX"]["相似度"] < 1
+    assert by_name["eng-oil-press"]["相似度"] == 1.0
+    assert by_name["FUEL_FLOW"]["存在状态"] == "两个CSV都不存在"
+    assert mask_counts == {1: 1, 2: 1, 0: 1}
@@ -0,0 +1,202 @@
+#  _*_ coding:utf-8 _*_
+import random
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+import pytest
+
+import compare_xml_by_folder2
+from diff_cache import DiffCache
+
+
+def test_report_rows_follow_file_name_order(tmp_path):
+    folder_a = tmp_path / "a"
+    folder_b = tmp_path / "b"
+    folder_a.mkdir()
+    folder_b.mkdir()
+    (folder_a / "a_only.xml").write_text('<Root/>', encoding="utf-8")
+    (folder_a / "b_pair.xml").write_text('<Root><Item v="1"/></Root>', encoding="utf-8")
+    (folder_b / "b_pair.xml").write_text('<Root><Item v="2"/></Root>', encoding="utf-8")
+    (folder_b / "c_only.xml").write_text('<Root/>', encoding="utf-8")
+    (folder_a / "d_pair.xml").write_text('<Root/>', encoding="utf-8")
+    (folder_b / "d_pair.xml").write_text('<Root/>', encoding="utf-8")
+
+    output = tmp_path / "diff.xlsx"
+    compare_xml_by_folder2.main1(str(folder_a), str(folder_b), str(output), cache_path=None,
+                                 export_formats=("csv",))
+    names = pd.read_csv(tmp_path / "diff.csv").iloc[:, 0].tolist()
+    assert names == ["a_only.xml", "b_pair.xml", "c_only.xml", "d_pair.xml"]
+
+
+def test_version_matrix_streams_details_before_matrix(tmp_path):
+    folders = []
+    for version, value in enumerate(["1", "2", "3"]):
+        folder = tmp_path / f"v{version}"
+        folder.mkdir()
+        (folder / "a.xml").write_text(f'<Root><Item v="{value}"/></Root>', encoding="utf-8")
+        folders.append(str(folder))
+
+    output = tmp_path / "matrix.xlsx"
+    compare_xml_by_folder2.main_matrix(folders, str(output))
+    sheets = pd.read_excel(output, sheet_name=None)
+    assert list(sheets) == ["差异明细", "版本矩阵"]
+    assert sheets["差异明细"]["对比版本"].tolist() == ["v0 → v1", "v1 → v2"]
+    assert sheets["版本矩阵"].iloc[0].tolist() == ["a.xml", "基线", "变更(1)", "变更(1)"]
+
+
+def test_cache_key_ignores_window_except_for_stream_engine(tmp_path):
+    file_a = tmp_path / "a.xml"
+    file_b = tmp_path / "b.xml"
+    file_a.write_text('<Root><Item v="1"/></Root>', encoding="utf-8")
+    file_b.write_text('<Root><Item v="2"/></Root>', encoding="utf-8")
+    cache_path = str(tmp_path / "cache.db")
+    DiffCache(cache_path).close()
+
+    def key(engine, window):
+        options = {"canonical": False, "engine": engine, "window": window, "cache_path": cache_path}
+        status, _, _, cache_info = compare_xml_by_folder2.compare_pair((str(file_a), str(file_b), options))
+        assert status == "diffed"
+        return cache_info[0]
+
+    assert key("fast", 10) == key("fast", 20)
+    assert key("stream", 10) != key("stream", 20)
+
+
+def test_pair_results_are_closed_when_comparison_fails(tmp_path, monkeypatch):
+    folder_a = tmp_path / "a"
+    folder_b = tmp_path / "b"
+    folder_a.mkdir()
+    folder_b.mkdir()
+    (folder_a / "a.xml").write_text('<Root v="1"/>', encoding="utf-8")
+    (folder_b / "a.xml").write_text('<Root v="2"/>', encoding="utf-8")
+    closed = []
+
+    def fake_results(tasks, workers):
+        try:
+            for _ in tasks:
+                yield "diffed", [], 0, None
+        finally:
+            closed.append(True)
+
+    def fail(*args):
+        raise RuntimeError("写出失败")
+
+    monkeypatch.setattr(compare_xml_by_folder2, "iter_pair_results", fake_results)
+    monkeypatch.setattr(compare_xml_by_folder2, "summary_row", fail)
+    with pytest.raises(RuntimeError):
+        try:
+            compare_xml_by_folder2.main1(str(folder_a), str(folder_b), str(tmp_path / "diff.xlsx"), cache_path=None,
+                                         export_formats=("csv",))
+        finally:
+            # 异常传出main1时进程池应已关闭，而不是等到结果生成器被回收
+            assert closed == [True]
+
+
+def reference_diffs(nodes_a, nodes_b, file_a_name, file_b_name):
+    """改造前的对比：两份字典，按排序后的全部路径逐个比较"""
+    dict_a = {n[0]: (n[1], n[2]) for n in nodes_a}
+    dict_b = {n[0]: (n[1], n[2]) for n in nodes_b}
+    diffs = []
+    for path in sorted(dict_a.keys() | dict_b.keys()):
+        if path not in dict_a:
+            diffs.append((file_a_name, path, "节点新增", file_a_name, "", file_b_name, "新增节点"))
+            continue
+        if path not in dict_b:
+            diffs.append((file_a_name, path, "节点删除", file_a_name, "存在", file_b_name, "已删除"))
+            continue
+        (attrs_a, text_a), (attrs_b, text_b) = dict_a[path], dict_b[path]
+        for key in sorted(attrs_a.keys() | attrs_b.keys()):
+            if attrs_a.get(key) != attrs_b.get(key):
+                diffs.append((file_a_name, f"{path}/@{key}", "属性差异", file_a_name, attrs_a.get(key),
+                              file_b_name, attrs_b.get(key)))
+        if text_a != text_b:
+            diffs.append((file_a_name, path, "文本差异", file_a_name, text_a, file_b_name, text_b))
+    return diffs
+
+
+def random_tree(rng, depth=0):
+    node = ET.Element(rng.choice(["A", "B", "C"]))
+    for name in rng.sample(["x", "y", "z"], rng.randint(0, 3)):
+        node.set(name, rng.choice(["1", "2"]))
+    node.text = rng.choice([None, "t", " t ", "u"])
+    if depth < 4:
+        node.extend(random_tree(rng, depth + 1) for _ in range(rng.randint(0, 3)))
+    return node
+
+
+def test_fast_engine_matches_reference_diff(tmp_path):
+    rng = random.Random(0)
+    for index in range(30):
+        file_a = tmp_path / f"a{index}.xml"
+        file_b = tmp_path / f"b{index}.xml"
+        ET.ElementTree(random_tree(rng)).write(file_a, encoding="utf-8")
+        ET.ElementTree(random_tree(rng)).write(file_b, encoding="utf-8")
+        expected = reference_diffs(compare_xml_by_folder2.flatten_xml(ET.parse(file_a).getroot()),
+                                   compare_xml_by_folder2.flatten_xml(ET.parse(file_b).getroot()),
+                                   file_a.name, file_b.name)
+        records = compare_xml_by_folder2.diff_files_with_engine(str(file_a), str(file_b), "fast")
+        assert sorted(map(tuple, records), key=repr) == sorted(expected, key=repr)
+
+
+def test_fast_engine_reports_each_diff_type(tmp_path):
+    (tmp_path / "a.xml").write_text('<Root><Item v="1" w="k">old</Item><Gone/></Root>', encoding="utf-8")
+    (tmp_path / "b.xml").write_text('<Root><Item v="2" w="k">new</Item><New/></Root>', encoding="utf-8")
+    records = compare_xml_by_folder2.diff_files_with_engine(str(tmp_path / "a.xml"), str(tmp_path / "b.xml"))
+    assert [(r.path, r.diff_type, r.source_value, r.target_value) for r in records] == [
+        ("Item[1]/@v", "属性差异", "1", "2"),
+        ("Item[1]", "文本差异", "old", "new"),
+        ("New[1]", "节点新增", "", "新增节点"),
+        ("Gone[1]", "节点删除", "存在", "已删除"),
+    ]
+
+
+def test_fast_engine_raises_on_broken_file(tmp_path):
+    (tmp_path / "a.xml").write_text('<Root>', encoding="utf-8")
+    (tmp_path / "b.xml").write_text('<Root/>', encoding="utf-8")
+    with pytest.raises(ValueError, match="解析失败"):
+        compare_xml_by_folder2.diff_files_with_engine(str(tmp_path / "a.xml"), str(tmp_path / "b.xml"))
+
+
+def test_xmldiff_engine_reports_edit_actions(tmp_path):
+    (tmp_path / "a.xml").write_text('<Root><Item v="1"/></Root>', encoding="utf-8")
+    (tmp_path / "b.xml").write_text('<Root><Item v="2"/></Root>', encoding="utf-8")
+    records = compare_xml_by_folder2.diff_files_with_engine(str(tmp_path / "a.xml"), str(tmp_path / "b.xml"),
+                                                            "xmldiff")
+    assert [(record.path, record.diff_type) for record in records] == [("/Root/Item[1]", "UpdateAttrib")]
+    assert "value=2" in records[0].target_value
+
+
+def test_stream_engine_matches_fast_engine(tmp_path):
+    rng = random.Random(1)
+    for index in range(30):
+        file_a = tmp_path / f"a{index}.xml"
+        file_b = tmp_path / f"b{index}.xml"
+        root_a = random_tree(rng)
+        ET.ElementTree(root_a).write(file_a, encoding="utf-8")
+        # 一半样例由A修改一个节点得到，另一半两侧独立生成
+        if index % 2:
+            nodes = list(root_a.iter())
+            rng.choice(nodes).set("x", "changed")
+            rng.choice(nodes).append(ET.Element("Extra"))
+        ET.ElementTree(root_a if index % 2 else random_tree(rng)).write(file_b, encoding="utf-8")
+        fast = compare_xml_by_folder2.diff_files_with_engine(str(file_a), str(file_b), "fast")
+        for window in (compare_xml_by_folder2.DEFAULT_STREAM_WINDOW, 2):
+            stream = compare_xml_by_folder2.diff_files_with_engine(str(file_a), str(file_b), "stream", window)
+            if window > 2:
+                # 暂存不受限时结果集合与fast引擎完全一致
+                assert sorted(stream, key=repr) == sorted(fast, key=repr)
+            else:
+                # 淘汰只会把同一路径拆成一条删除加一条新增，不会漏报差异
+                changed = {r.path.split("/@")[0] for r in fast}
+                assert changed <= {r.path.split("/@")[0] for r in stream}
+
+
+def test_stream_engine_memory_is_bounded_by_window(tmp_path):
+    (tmp_path / "a.xml").write_text("<Root>" + "".join(f"<A{i}/>" for i in range(500)) + "</Root>", encoding="utf-8")
+    (tmp_path / "b.xml").write_text("<Root>" + "".join(f"<B{i}/>" for i in range(500)) + "</Root>", encoding="utf-8")
+    stats = {}
+    records = list(compare_xml_by_folder2.iter_stream_diff(str(tmp_path / "a.xml"), str(tmp_path / "b.xml"),
+                                                          window=50, stats=stats))
+    assert stats["peak_pending"] <= 51
+    assert stats["nodes_a"] == stats["nodes_b"] == 500
+    assert sorted(r.diff_type for r in records) == ["节点删除"] * 500 + ["节点新增"] * 500
@@ -0,0 +1,35 @@
+#  _*_ coding:utf-8 _*_
+import diff_cache
+from diff_cache import DiffCache
+
+
+def fill(path, entries=3):
+    cache = DiffCache(str(path), max_mb=1024)
+    for index in range(entries):
+        cache.put(f"key{index}", "diffed", b"x" * 1000)
+    cache.close()
+
+
+def count(path):
+    with DiffCache(str(path), readonly=True) as cache:
+        return cache.count()
+
+
+def test_stats_and_close_do_not_prune(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "cache.db"
+    fill(path)
+    # 上限远小于缓存大小：只读的stats和普通close都不能按它淘汰
+    monkeypatch.setattr(diff_cache, "DEFAULT_MAX_MB", 0.001)
+    diff_cache.main(["--cache", str(path), "stats"])
+    assert "3条" in capsys.readouterr().out
+    DiffCache(str(path), max_mb=0.001).close()
+    assert count(path) == 3
+
+    diff_cache.main(["--cache", str(path), "prune", "--max-mb", "0.002"])
+    assert count(path) == 2
+
+
+def test_stats_on_missing_cache(tmp_path, capsys):
+    diff_cache.main(["--cache", str(tmp_path / "missing.db"), "stats"])
+    assert "不存在" in capsys.readouterr().out
+    assert not (tmp_path / "missing.db").exists()
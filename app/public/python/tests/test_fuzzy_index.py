@@ -0,0 +1,47 @@
+#  _*_ coding:utf-8 _*_
+import random
+
+import pytest
+
+from fuzzy_index import NORMALIZE_RULES, TrigramIndex, build_normalizer, dice, trigrams
+
+
+def brute_force_best(index, name):
+    grams = trigrams(index.normalizer(name))
+    best = (None, 0.0)
+    for target_name, target_grams in zip(index.names, index.grams):
+        score = dice(grams, target_grams)
+        if score > best[1]:
+            best = (target_name, score)
+    return best
+
+
+def test_normalizer_rules():
+    assert build_normalizer()("  Eng-Oil.Press  Msg ") == "eng_oil_press_msg"
+    assert build_normalizer(NORMALIZE_RULES)("ENG_OIL_PRESS_Msg_V2") == "eng_oil_press"
+    assert build_normalizer(["space"])(" A  b ") == "A b"
+    with pytest.raises(ValueError, match="未知的规范化规则"):
+        build_normalizer(["upper"])
+
+
+def test_best_match_agrees_with_brute_force():
+    rng = random.Random(0)
+    words = ["ENG", "OIL", "PRESS", "TEMP", "FUEL", "FLOW", "LEFT", "RIGHT", "CMD", "STATUS"]
+    targets = ["_".join(rng.sample(words, rng.randint(2, 4))) + f"_{i}" for i in range(500)]
+    sources = [name.replace("_", "-").lower() for name in targets[:100]]
+    sources += [name[:-1] + "9" for name in targets[100:200]]
+    sources += ["_".join(rng.sample(words, 3)) for _ in range(100)]
+    index = TrigramIndex(targets, build_normalizer(), 0.8)
+    matched = 0
+    for name in sources:
+        expected = brute_force_best(index, name)
+        if expected[1] >= 0.8:
+            matched += 1
+            assert index.best_match(name)[1] == pytest.approx(expected[1])
+    assert matched > 100
+    assert index.best_match(sources[0]) == (targets[0], 1.0)
+
+
+def test_min_score_must_be_in_range():
+    with pytest.raises(ValueError, match="min_score"):
+        TrigramIndex([], min_score=0)
@@ -0,0 +1,31 @@
+#  _*_ coding:utf-8 _*_
+import pandas as pd
+import pytest
+
+import get_port_message_name
+
+
+def test_all_sheets_skipped_is_an_error(tmp_path, capsys):
+    xlsx_path = tmp_path / "moicd.xlsx"
+    pd.DataFrame({"I/O": ["I"], "PhysicalPort": ["P"], "Word_Name/Message_Name": ["M"]}).to_excel(
+        xlsx_path, sheet_name="BUS", index=False)
+    output = tmp_path / "out.xlsx"
+    with pytest.raises(SystemExit) as exc:
+        get_port_message_name.main(["--input", str(xlsx_path), "--sheets", "NOPE", "--output", str(output),
+                                    "--no-cache"])
+    assert exc.value.code == 1
+    assert not output.exists()
+    assert "✅" not in capsys.readouterr().out
+
+
+def test_success_message_lists_written_formats(tmp_path, capsys):
+    xlsx_path = tmp_path / "moicd.xlsx"
+    pd.DataFrame({"I/O": ["I", "I"], "PhysicalPort": ["P", "P"], "Word_Name/Message_Name": ["M", "M"]}).to_excel(
+        xlsx_path, sheet_name="BUS", index=False)
+    output = tmp_path / "out.xlsx"
+    get_port_message_name.main(["--input", str(xlsx_path), "--output", str(output), "--export-formats", "csv",
+                                "--no-cache"])
+    assert not output.exists()
+    assert pd.read_csv(tmp_path / "out.csv").shape == (1, 3)
+    success = [line for line in capsys.readouterr().out.splitlines() if line.startswith("✅")]
+    assert success == [f"✅ 已输出去重后的结果到: {tmp_path / 'out.csv'}"]
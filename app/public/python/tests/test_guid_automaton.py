@@ -0,0 +1,46 @@
+#  _*_ coding:utf-8 _*_
+import random
+
+import pytest
+
+from guid_automaton import HAS_PYAHOCORASICK, GuidAutomaton, choose_backend
+
+GUID_A = "0a1b2c3d-0000-4000-8000-00000000000a"
+GUID_B = "0a1b2c3d-0000-4000-8000-00000000000b"
+
+
+@pytest.mark.parametrize("backend", ["regex", "python"] + (["pyahocorasick"] if HAS_PYAHOCORASICK else []))
+def test_embedded_guids_and_boundaries(backend):
+    automaton = GuidAutomaton([GUID_A, GUID_B], backend)
+    assert automaton.find(f"{GUID_B};{GUID_A};{GUID_B}") == [GUID_B, GUID_A]
+    assert automaton.find(f"{{{GUID_A}}}") == [GUID_A]
+    assert automaton.find(f"ID_{GUID_A} ref") == [GUID_A]
+    # 前后紧邻字母或数字时不算命中
+    assert automaton.find(f"x{GUID_A}") == []
+    assert automaton.find(f"{GUID_A}0") == []
+    # 区分大小写，与整值匹配一致
+    assert automaton.find(GUID_A.upper()) == []
+    assert automaton.find("") == []
+
+
+def test_backend_selection():
+    assert choose_backend([GUID_A]) == "regex"
+    assert choose_backend(["PORT_1"]) == ("pyahocorasick" if HAS_PYAHOCORASICK else "python")
+    with pytest.raises(ValueError):
+        GuidAutomaton(["PORT_1"], "regex")
+
+
+def test_backends_agree_on_random_text():
+    rng = random.Random(0)
+    keys = [f"{rng.getrandbits(32):08x}-0000-4000-8000-{rng.getrandbits(48):012x}" for _ in range(50)]
+    # 含相互重叠的非GUID形状关键字，只比较自动机实现
+    short_keys = ["ab", "abc", "bc", "c_d", "d"]
+    backends = ["python"] + (["pyahocorasick"] if HAS_PYAHOCORASICK else [])
+    guid_automata = [GuidAutomaton(keys, backend) for backend in ["regex"] + backends]
+    short_automata = [GuidAutomaton(short_keys, backend) for backend in backends]
+    pieces = keys + short_keys + [";", "{", "}", " ", "x", "_", "0", "-"]
+    for _ in range(300):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+        for automata in (guid_automata, short_automata):
+            found = [automaton.find(text) for automaton in automata]
+            assert all(result == found[0] for result in found)
@@ -0,0 +1,139 @@
+#  _*_ coding:utf-8 _*_
+import logging
+import sqlite3
+
+import pytest
+
+import main
+from guid_mapping_db import MappingDBWriter
+from guid_match_table import GuidMatchTable
+
+FIELDS = ("physical_port", "message_name", "dp_name", "full_name")
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    # logger由main()中的setup_logging创建
+    monkeypatch.setattr(main, "logger", logging.getLogger("ExcelToXMLChecker"), raising=False)
+    path = str(tmp_path / "mapping.db")
+    main.init_database(path)
+    return path
+
+
+def match_result(path, guids, **state):
+    result = main.new_match_result(path)
+    result["metadata"] = dict.fromkeys(FIELDS, "meta")
+    result["matches"] = [
+        {"guid": guid, "node_path": "Root/Port", "attribute": "Guid", "match_type": "attribute"} for guid in guids
+    ]
+    result.update(state)
+    return result
+
+
+def index_names(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    finally:
+        conn.close()
+
+
+def test_writer_commits_in_batches_and_rebuilds_indexes(db_path):
+    guid_info = GuidMatchTable(["g1", "g2"], {field: ["x", "y"] for field in FIELDS}, [2, 3])
+    with MappingDBWriter(db_path, batch_files=2) as writer:
+        assert "idx_match_guid" not in index_names(db_path)
+        for index in range(5):
+            writer.add_result(match_result(f"/data/f{index}.xml", ["g1", "g2", "g1"][:index % 3 + 1]), guid_info)
+        # 无匹配且没有文件状态的文件不落库
+        writer.add_result(match_result("/data/empty.xml", []), guid_info)
+        # 增量模式带内容哈希的无匹配文件要记录状态
+        writer.add_result(match_result("/data/hashed.xml", [], file_size=1, file_mtime_ns=2, content_hash="h"),
+                          guid_info)
+    assert writer.commits == 3  # 6个落库文件，每2个一个事务
+    assert {"idx_match_guid", "idx_xml_name", "idx_excel_guid"} <= index_names(db_path)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        files = dict(conn.execute("SELECT xml_file_name, content_hash FROM xml_metadata"))
+        mappings = conn.execute("SELECT guid, xml_file_path FROM guid_xml_mapping ORDER BY xml_file_path, guid")
+        excel_rows = conn.execute("SELECT guid, physical_port, source_row FROM excel_metadata ORDER BY guid")
+        assert files == {**{f"f{index}.xml": None for index in range(5)}, "hashed.xml": "h"}
+        # 同一文件同一节点上的重复匹配只记一行
+        assert mappings.fetchall() == [
+            ("g1", "/data/f0.xml"), ("g1", "/data/f1.xml"), ("g2", "/data/f1.xml"), ("g1", "/data/f2.xml"),
+            ("g2", "/data/f2.xml"), ("g1", "/data/f3.xml"), ("g1", "/data/f4.xml"), ("g2", "/data/f4.xml"),
+        ]
+        assert excel_rows.fetchall() == [("g1", "x", 2), ("g2", "y", 3)]
+    finally:
+        conn.close()
+
+
+def write_legacy_db(path):
+    """改造前的库结构：guid_xml_mapping为普通表，可有重复行，也可引用xml_metadata中没有的文件"""
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+    CREATE TABLE guid_xml_mapping (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        guid TEXT NOT NULL,
+        xml_file_path TEXT NOT NULL,
+        match_node_path TEXT NOT NULL,
+        match_attribute TEXT NOT NULL
+    );
+    CREATE TABLE xml_metadata (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        xml_file_path TEXT NOT NULL UNIQUE,
+        xml_file_name TEXT NOT NULL,
+        physical_port TEXT,
+        message_name TEXT,
+        dp_name TEXT,
+        full_name TEXT,
+        parse_time TIMESTAMP NOT NULL
+    );
+    CREATE INDEX idx_guid ON guid_xml_mapping(guid);
+    CREATE INDEX idx_xml_path ON guid_xml_mapping(xml_file_path);
+    ''')
+    conn.executemany("INSERT INTO xml_metadata (xml_file_path, xml_file_name, message_name, parse_time) "
+                     "VALUES (?, ?, 'MSG', '2024-01-01 00:00:00')", [("/x/a.xml", "a.xml"), ("/x/b.xml", "b.xml")])
+    legacy_rows = [
+        ("g1", "/x/a.xml", "Root/Port", "Guid"),
+        ("g1", "/x/a.xml", "Root/Port", "Guid"),
+        ("g2", "/x/a.xml", "Root/Port", "Ref"),
+        ("g1", "/x/b.xml", "Root/Msg/Port", "Guid"),
+        ("g3", "/y/orphan.xml", "Root/Port", "Guid"),
+    ]
+    conn.executemany("INSERT INTO guid_xml_mapping (guid, xml_file_path, match_node_path, match_attribute) "
+                     "VALUES (?, ?, ?, ?)", legacy_rows)
+    conn.commit()
+    conn.close()
+    return sorted(set(legacy_rows))
+
+
+def view_rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return sorted(conn.execute("SELECT guid, xml_file_path, match_node_path, match_attribute, match_type "
+                                   "FROM guid_xml_mapping"))
+    finally:
+        conn.close()
+
+
+def test_legacy_mapping_is_migrated_into_compat_view(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "logger", logging.getLogger("ExcelToXMLChecker"), raising=False)
+    path = str(tmp_path / "legacy.db")
+    expected = [row + ("attribute",) for row in write_legacy_db(path)]
+
+    main.init_database(path)
+    assert view_rows(path) == expected
+    conn = sqlite3.connect(path)
+    try:
+        assert conn.execute("SELECT type FROM sqlite_master WHERE name = 'guid_xml_mapping'").fetchone() == ("view",)
+        assert conn.execute("SELECT xml_file_name FROM xml_metadata WHERE xml_file_path = '/y/orphan.xml'"
+                            ).fetchone() == ("orphan.xml",)
+        assert conn.execute("SELECT message_name FROM xml_metadata WHERE xml_file_path = '/x/a.xml'"
+                            ).fetchone() == ("MSG",)
+    finally:
+        conn.close()
+
+    # 再次初始化（已是规范化结构）不改变数据
+    main.init_database(path)
+    assert view_rows(path) == expected
@@ -0,0 +1,49 @@
+#  _*_ coding:utf-8 _*_
+import logging
+import pickle
+
+import main
+from guid_match_table import GuidMatchTable
+
+GUIDS = ["g1", "g2", "g3"]
+
+
+def test_merge_of_pickled_parts_equals_single_table():
+    matches = [("a.xml", ["g2", "g1"]), ("b.xml", ["g1"]), ("c.xml", ["g3", "g3"]), ("a.xml", ["g2"]),
+               ("d.xml", ["g2"])]
+    single = GuidMatchTable(GUIDS, {"message_name": ["m1", "m2", "m3"]}, [2, 3, 4])
+    for name, guids in matches:
+        single.add_file_matches(name, guids)
+
+    merged = GuidMatchTable(GUIDS, {"message_name": ["m1", "m2", "m3"]}, [2, 3, 4])
+    for part_matches in (matches[:2], matches[2:]):
+        # 子进程中的表不带Excel信息，GUID按首次出现驻留；经pickle传回主进程
+        part = GuidMatchTable()
+        for name, guids in part_matches:
+            part.add_file_matches(name, guids)
+        merged.merge(pickle.loads(pickle.dumps(part)))
+
+    assert merged.file_lists() == single.file_lists() == {
+        "g1": ["a.xml", "b.xml"], "g2": ["a.xml", "d.xml"], "g3": ["c.xml"]}
+    # 合并不改变主表的GUID编号和元数据
+    assert merged.guids == GUIDS
+    assert merged.metadata_of("g2") == {"message_name": "m2"}
+
+
+def test_parallel_matching_merges_worker_tables_in_file_order(tmp_path, monkeypatch):
+    # logger由main()中的setup_logging创建
+    monkeypatch.setattr(main, "logger", logging.getLogger("ExcelToXMLChecker"), raising=False)
+    guids = [f"0a1b2c3d-0000-4000-8000-{i:012d}" for i in range(20)]
+    xml_files = []
+    for index in range(40):
+        path = tmp_path / f"f{index:02d}.xml"
+        refs = "".join(f'<M Guid="{guids[(index * 7 + k) % 20]}"/>' for k in range(index % 4))
+        path.write_text(f"<Root>{refs}</Root>", encoding="utf-8")
+        xml_files.append(str(path))
+
+    sequential = GuidMatchTable(guids)
+    parallel = GuidMatchTable(guids)
+    expected = main.match_files(xml_files, sequential, None, 1)
+    actual = main.match_files(xml_files, parallel, None, 3)
+    assert actual == expected
+    assert parallel.file_lists() == sequential.file_lists()
@@ -0,0 +1,20 @@
+#  _*_ coding:utf-8 _*_
+import pytest
+
+from guid_prefilter import GuidPrefilter
+
+GUID = "0a1b2c3d-0000-4000-8000-00000000abcd"
+
+
+@pytest.mark.parametrize("substring", [False, True])
+def test_entity_encoded_guid_is_not_filtered_out(tmp_path, substring):
+    xml_file = tmp_path / "a.xml"
+    encoded = GUID.replace("-", "&#45;", 1)
+    xml_file.write_text(f'<?xml version="1.0" encoding="UTF-8"?>\n<root><node id="{encoded}"/></root>',
+                        encoding="utf-8")
+    other_file = tmp_path / "b.xml"
+    other_file.write_text('<root><node id="0a1b2c3d&#45;0000-4000-8000-ffffffffffff"/></root>', encoding="utf-8")
+
+    prefilter = GuidPrefilter([GUID], substring=substring)
+    assert prefilter.may_match(xml_file)
+    assert not prefilter.may_match(other_file)
@@ -0,0 +1,147 @@
+#  _*_ coding:utf-8 _*_
+import logging
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import main
+
+GUID = "0a1b2c3d-0000-4000-8000-000000000001"
+CORPUS_GUIDS = [f"0a1b2c3d-0000-4000-8000-{i:012d}" for i in range(12)]
+
+
+def write_corpus(folder, files=30):
+    """12个GUID（含重复行和空行）的Excel，以及分布在两级目录中、每个文件引用0~3个GUID的XML"""
+    guids = CORPUS_GUIDS + [CORPUS_GUIDS[3], None]
+    pd.DataFrame({
+        "Guid": guids,
+        "PhysicalPort": [f"PORT_{i}" for i in range(len(guids))],
+        "Word_Name/Message_Name": [f"MSG_{i}" for i in range(len(guids))],
+        "DP_Name": [f"DP_{i}" for i in range(len(guids))],
+        "Fullname": [f"FULL_{i}" for i in range(len(guids))],
+    }).to_excel(folder / "corpus.xlsx", sheet_name="BUS", index=False)
+    for index in range(files):
+        subfolder = folder / "corpus" / f"part{index % 3}"
+        subfolder.mkdir(parents=True, exist_ok=True)
+        refs = "".join(f'<Port Guid="{CORPUS_GUIDS[(index * 5 + k) % 10]}"/>' for k in range(index % 4))
+        (subfolder / f"f{index:02d}.xml").write_text(
+            f'<Root><Message Name="MSG_{index}">{refs}<Port Guid="{CORPUS_GUIDS[index % 10]}" Ref="x"/></Message>'
+            f'</Root>' if index % 5 else f"<Root>{refs}</Root>", encoding="utf-8")
+    return ["--excel", "corpus.xlsx", "--xml-folder", "corpus", "--no-workbook-cache"]
+
+
+def mapping_rows(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return sorted(conn.execute("SELECT guid, xml_file_path, match_node_path, match_attribute FROM guid_xml_mapping"))
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """在临时目录中运行main（日志和相对路径都写到这里），结束后移除main()添加的日志处理器"""
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    tool_logger = logging.getLogger("ExcelToXMLChecker")
+    for handler in list(tool_logger.handlers):
+        tool_logger.removeHandler(handler)
+        handler.close()
+
+
+@pytest.fixture
+def match_args(workdir):
+    tmp_path = workdir
+    pd.DataFrame({
+        "Guid": [GUID],
+        "PhysicalPort": ["PORT_A"],
+        "Word_Name/Message_Name": ["MSG_A"],
+        "DP_Name": ["DP_A"],
+        "Fullname": ["FULL_A"],
+    }).to_excel(tmp_path / "moicd.xlsx", sheet_name="BUS", index=False)
+    (tmp_path / "xml").mkdir()
+    (tmp_path / "xml" / "a.xml").write_text(f'<Root><Message Guid="{GUID}"/></Root>', encoding="utf-8")
+    (tmp_path / "xml" / "b.xml").write_text('<Root><Message Guid="no-match"/></Root>', encoding="utf-8")
+    return ["--excel", "moicd.xlsx", "--xml-folder", "xml", "--db", "mapping.db", "--no-workbook-cache"]
+
+
+def snapshot(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {row[0] for row in conn.execute("SELECT guid FROM excel_guid_snapshot")}
+    finally:
+        conn.close()
+
+
+def test_full_run_refreshes_guid_snapshot(match_args, tmp_path):
+    main.main(match_args)
+    assert snapshot(tmp_path / "mapping.db") == {GUID}
+
+    conn = sqlite3.connect(tmp_path / "mapping.db")
+    conn.execute("INSERT INTO excel_guid_snapshot (guid) VALUES ('stale')")
+    conn.commit()
+    conn.close()
+    main.main(match_args)
+    assert snapshot(tmp_path / "mapping.db") == {GUID}
+
+
+def test_incremental_run_after_full_run_parses_nothing(match_args, tmp_path, monkeypatch):
+    main.main(match_args)
+    conn = sqlite3.connect(tmp_path / "mapping.db")
+    states = conn.execute("SELECT xml_file_name, file_size, file_mtime_ns, content_hash FROM xml_metadata").fetchall()
+    conn.close()
+    # 无匹配的b.xml也记录了文件状态
+    assert sorted(row[0] for row in states) == ["a.xml", "b.xml"]
+    assert all(None not in row for row in states)
+
+    parsed = []
+    match_xml_file = main.match_xml_file
+
+    def counting_match_xml_file(xml_file, *args, **kwargs):
+        parsed.append(xml_file)
+        return match_xml_file(xml_file, *args, **kwargs)
+
+    monkeypatch.setattr(main, "match_xml_file", counting_match_xml_file)
+    main.main(match_args + ["--incremental"])
+    assert parsed == []
+    assert "新增/变更0个，未变化2个" in (tmp_path / "excel_xml_check.log").read_text(encoding="utf-8")
+
+
+def test_parallel_run_matches_sequential_run(workdir):
+    tmp_path = workdir
+    corpus_args = write_corpus(tmp_path)
+    main.main(corpus_args + ["--db", "sequential.db", "--output", "sequential.xlsx"])
+    main.main(corpus_args + ["--db", "parallel.db", "--output", "parallel.xlsx", "--workers", "3",
+                             "--batch-size", "4", "--verify-sequential"])
+
+    sequential_rows = mapping_rows(tmp_path / "sequential.db")
+    assert sequential_rows
+    assert mapping_rows(tmp_path / "parallel.db") == sequential_rows
+    pd.testing.assert_frame_equal(pd.read_excel(tmp_path / "parallel.xlsx"), pd.read_excel(tmp_path / "sequential.xlsx"))
+    assert "并行结果校验通过" in (tmp_path / "excel_xml_check.log").read_text(encoding="utf-8")
+
+
+def test_excel_ingestion_and_write_back(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "logger", logging.getLogger("ExcelToXMLChecker"), raising=False)
+    meta_columns = {"physical_port": "PhysicalPort", "message_name": "Word_Name/Message_Name"}
+    pd.DataFrame({
+        "Guid": ["g1", "g2", None, "g1", "g3"],
+        "PhysicalPort": ["P1", "P2", "P_blank", "P1b", None],
+        "Word_Name/Message_Name": ["M1", "M2", "M_blank", "M1b", "M3"],
+    }).to_excel(tmp_path / "moicd.xlsx", sheet_name="BUS", index=False)
+
+    df, guid_info = main.read_excel_data(str(tmp_path / "moicd.xlsx"), "Guid", meta_columns, use_cache=False)
+    # 空GUID不入表；重复GUID取首行行号、末行元数据；空元数据为""
+    assert list(guid_info) == ["g1", "g2", "g3"]
+    assert [guid_info.first_row(guid) for guid in guid_info] == [0, 1, 4]
+    assert guid_info.metadata_of("g1") == {"physical_port": "P1b", "message_name": "M1b"}
+    assert guid_info.metadata_of("g3") == {"physical_port": "", "message_name": "M3"}
+
+    guid_info.add_file_matches("b.xml", ["g1", "g1"])
+    guid_info.add_file_matches("a.xml", ["g1", "g2"])
+    guid_info.add_file_matches("b.xml", ["g1"])
+    df = main.write_back_match_results(df, "Guid", guid_info, {"g1", "g2"})
+    assert df["是否存在"].tolist() == [True, True, False, True, False]
+    assert df["匹配XML文件数"].tolist() == [2, 1, 0, 2, 0]
+    assert df["匹配XML文件名"].tolist() == ["b.xml,a.xml", "a.xml", "", "b.xml,a.xml", ""]
@@ -0,0 +1,35 @@
+#  _*_ coding:utf-8 _*_
+import datetime
+
+import pytest
+from openpyxl import load_workbook
+
+from result_export import StreamingXlsxWriter
+
+
+@pytest.mark.parametrize("engine", ["xlsxwriter", "openpyxl"])
+def test_backends_write_identical_cells(tmp_path, engine):
+    if engine == "xlsxwriter":
+        pytest.importorskip("xlsxwriter")
+    output = tmp_path / f"{engine}.xlsx"
+    moment = datetime.datetime(2024, 1, 2, 3, 4, 5)
+    with StreamingXlsxWriter(str(output), max_rows=3, engine=engine) as writer:
+        sheet = writer.add_sheet("结果", ["值", "链接", "时间"])
+        sheet.write_rows([
+            ["=SUM(A1:A9)", "https://example.com/a", moment],
+            ["-1", None, 1.5],
+            ["第三行", "x", 3],
+        ])
+    assert sheet.sheet_names == ["结果", "结果_2"]
+
+    workbook = load_workbook(output)
+    first = workbook["结果"]
+    assert [cell.value for cell in first[1]] == ["值", "链接", "时间"]
+    assert first["A2"].value == "=SUM(A1:A9)"
+    assert first["A2"].data_type == "s"
+    assert first["B2"].hyperlink is None
+    assert first["C2"].value == moment
+    assert first["C2"].number_format == "yyyy-mm-dd hh:mm:ss"
+    assert [cell.value for cell in first[3]] == ["-1", None, 1.5]
+    second = workbook["结果_2"]
+    assert [[cell.value for cell in row] for row in second.iter_rows()] == [["值", "链接", "时间"], ["第三行", "x", 3]]
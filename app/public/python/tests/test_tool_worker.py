@@ -0,0 +1,57 @@
+#  _*_ coding:utf-8 _*_
+import io
+import json
+import logging
+
+import pandas as pd
+
+import tool_worker
+
+GUID = "0a1b2c3d-0000-4000-8000-000000000001"
+
+
+def write_match_inputs(folder):
+    excel_path = folder / "moicd.xlsx"
+    pd.DataFrame({
+        "Guid": [GUID],
+        "PhysicalPort": ["PORT_A"],
+        "Word_Name/Message_Name": ["MSG_A"],
+        "DP_Name": ["DP_A"],
+        "Fullname": ["FULL_A"],
+    }).to_excel(excel_path, sheet_name="BUS", index=False)
+    xml_folder = folder / "xml"
+    xml_folder.mkdir()
+    (xml_folder / "a.xml").write_text(f'<Root><Message Guid="{GUID}"/></Root>', encoding="utf-8")
+    return excel_path, xml_folder
+
+
+def call(worker, request_id, method, params):
+    worker.out.seek(0)
+    worker.out.truncate()
+    response = worker.handle_line(json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}))
+    progress = [json.loads(line) for line in worker.out.getvalue().splitlines()]
+    return response, progress
+
+
+def test_match_request_writes_log_file(tmp_path):
+    excel_path, xml_folder = write_match_inputs(tmp_path)
+    worker = tool_worker.ToolWorker(io.StringIO(), cache_max_mb=16)
+    tool_logger = logging.getLogger("ExcelToXMLChecker")
+    try:
+        args = ["--excel", str(excel_path), "--xml-folder", str(xml_folder), "--db", "mapping.db",
+                "--no-workbook-cache"]
+        for request_id in (1, 2):
+            response, progress = call(worker, request_id, "match", {"args": args, "cwd": str(tmp_path)})
+            assert "result" in response, response
+            assert any(message["params"]["id"] == request_id for message in progress)
+
+            log_path = tmp_path / "excel_xml_check.log"
+            assert log_path.exists()
+            assert "任务完成" in log_path.read_text(encoding="utf-8")
+        # 重复请求不会叠加处理器，转发进度的处理器在请求结束后移除
+        assert [type(h).__name__ for h in tool_logger.handlers].count("StreamHandler") == 1
+        assert not any(isinstance(h, tool_worker.ProgressLogHandler) for h in tool_logger.handlers)
+    finally:
+        for handler in list(tool_logger.handlers):
+            tool_logger.removeHandler(handler)
+            handler.close()
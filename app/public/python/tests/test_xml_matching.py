@@ -0,0 +1,197 @@
+#  _*_ coding:utf-8 _*_
+import random
+import xml.etree.ElementTree as ET
+
+import pytest
+
+import main
+
+GUIDS = [f"0a1b2c3d-0000-4000-8000-{i:012d}" for i in range(8)]
+TAGS = ["Message", "Port", "Signal", "Item"]
+ATTR_NAMES = ["Guid", "Ref", "Name", "PhysicalPort", "DP_Name", "FullName", "Msg"]
+ATTR_VALUES = GUIDS[:6] + ["unknown", "port_a", "MessageB", "dpname_c", "full_name_d", "plain", ""]
+TEXTS = [None, "", "  ", "plain text", "message text", "Fullname: X", "全名 Y", "phyport 3"]
+
+
+def random_element(rng, depth=0):
+    element = ET.Element(rng.choice(TAGS), {name: rng.choice(ATTR_VALUES)
+                                            for name in rng.sample(ATTR_NAMES, rng.randint(0, 3))})
+    element.text = rng.choice(TEXTS)
+    element.tail = rng.choice(TEXTS)
+    if depth < 4:
+        element.extend(random_element(rng, depth + 1) for _ in range(rng.randint(0, 3)))
+    return element
+
+
+def write_samples(folder, count=40, seed=0):
+    """生成结构、属性、文本随机的XML样例，覆盖元数据关键字、GUID和无关值"""
+    rng = random.Random(seed)
+    paths = []
+    for index in range(count):
+        root = ET.Element("Root")
+        root.extend(random_element(rng) for _ in range(rng.randint(1, 4)))
+        path = folder / f"sample{index:02d}.xml"
+        ET.ElementTree(root).write(path, encoding="utf-8", xml_declaration=True)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture
+def samples(tmp_path):
+    return write_samples(tmp_path)
+
+
+def test_stream_matching_equals_tree_matching(samples, tmp_path):
+    guid_keys = frozenset(GUIDS)
+    matched = 0
+    for path in samples:
+        tree = main.tree_match_xml_file(path, guid_keys)
+        stream = main.stream_match_xml_file(path, guid_keys)
+        assert stream["error"] is None
+        assert stream["matches"] == tree["matches"]
+        assert stream["metadata"] == tree["metadata"]
+        matched += len(tree["matches"])
+    assert matched
+
+    broken = tmp_path / "broken.xml"
+    broken.write_text('<Root><Port Guid="x">', encoding="utf-8")
+    assert main.stream_match_xml_file(str(broken), guid_keys)["error"] is not None
+
+
+def test_stream_threshold_selects_streaming(samples, monkeypatch):
+    streamed = []
+    stream_match_xml_file = main.stream_match_xml_file
+    monkeypatch.setattr(main, "stream_match_xml_file",
+                        lambda path, *args: streamed.append(path) or stream_match_xml_file(path, *args))
+    main.match_xml_file(samples[0], frozenset(GUIDS), dict(main.DEFAULT_MATCH_OPTIONS, stream_threshold=None,
+                                                           prefilter=False))
+    assert streamed == []
+    main.match_xml_file(samples[0], frozenset(GUIDS), dict(main.DEFAULT_MATCH_OPTIONS, stream_threshold=0,
+                                                           prefilter=False))
+    assert streamed == [samples[0]]
+
+
+def reference_extract_metadata(root):
+    """改造前的递归实现（逐字段逐关键字比较），作为元数据提取的对照"""
+    metadata = main.new_xml_metadata()
+
+    def traverse_nodes(node):
+        for attr_name, attr_value in node.attrib.items():
+            for field, keywords in main.KEYWORD_MAPPING.items():
+                if metadata[field] is not None:
+                    continue
+                if any(kw in attr_name.lower() or kw in str(attr_value).lower() for kw in keywords):
+                    metadata[field] = attr_value
+        node_text = str(node.text).strip() if node.text else ""
+        if node_text:
+            for field, keywords in main.KEYWORD_MAPPING.items():
+                if metadata[field] is None and any(kw in node_text.lower() for kw in keywords):
+                    metadata[field] = node_text
+        for child in node:
+            traverse_nodes(child)
+
+    traverse_nodes(root)
+    return metadata
+
+
+def test_metadata_extraction_matches_reference(samples):
+    found = 0
+    for path in samples:
+        root = ET.parse(path).getroot()
+        metadata = main.extract_xml_metadata(root)
+        assert metadata == reference_extract_metadata(root)
+        found += sum(value is not None for value in metadata.values())
+    assert found
+
+
+def test_metadata_extraction_stops_when_complete(monkeypatch):
+    root = ET.fromstring('<Root PhysicalPort="P" Msg="M" DPName="D" FullName="F">'
+                         '<Item PhysicalPort="later"/></Root>')
+    visited = []
+    collect_attr_metadata = main.collect_attr_metadata
+
+    def counting_collect(metadata, attrib):
+        visited.append(dict(attrib))
+        collect_attr_metadata(metadata, attrib)
+
+    monkeypatch.setattr(main, "collect_attr_metadata", counting_collect)
+    metadata = main.extract_xml_metadata(root)
+    assert metadata == {"physical_port": "P", "message_name": "M", "dp_name": "D", "full_name": "F"}
+    assert len(visited) == 1
+
+
+def reference_matches(root, guid_keys):
+    """改造前的递归遍历（每个节点都拼接完整路径），作为GUID匹配的对照"""
+    matches = []
+
+    def traverse_nodes(node, parent_path=""):
+        current_path = f"{parent_path}/{node.tag}" if parent_path else node.tag
+        for attr_name, attr_value in node.attrib.items():
+            if attr_value in guid_keys:
+                matches.append({"guid": attr_value, "node_path": current_path, "attribute": attr_name,
+                                "match_type": "attribute"})
+        for child in node:
+            traverse_nodes(child, current_path)
+
+    traverse_nodes(root)
+    return matches
+
+
+def test_tree_matching_matches_recursive_reference(samples):
+    guid_keys = frozenset(GUIDS)
+    for path in samples:
+        assert main.tree_match_xml_file(path, guid_keys)["matches"] == reference_matches(ET.parse(path).getroot(),
+                                                                                         guid_keys)
+
+
+def test_tree_matching_handles_nesting_deeper_than_recursion_limit(tmp_path):
+    depth = 5000
+    path = tmp_path / "deep.xml"
+    path.write_text("<A>" * depth + f'<B Guid="{GUIDS[0]}"/>' + "</A>" * depth, encoding="utf-8")
+    result = main.tree_match_xml_file(str(path), frozenset(GUIDS))
+    assert result["error"] is None
+    assert result["matches"] == [{"guid": GUIDS[0], "node_path": "/".join(["A"] * depth + ["B"]),
+                                  "attribute": "Guid", "match_type": "attribute"}]
+
+
+def match_key(match):
+    return match["guid"], match["node_path"], match["attribute"], match["match_type"]
+
+
+def test_substring_matching_finds_embedded_guids(tmp_path):
+    guid_a, guid_b, guid_c = GUIDS[:3]
+    path = tmp_path / "embedded.xml"
+    path.write_text(f'<Root><Port Guid="{guid_a}" Refs="{guid_b};{guid_c}" Id="{{{guid_c}}}" Bad="x{guid_a}">'
+                    f'see {guid_b}<Item/>tail {guid_c}</Port></Root>', encoding="utf-8")
+    automaton = main.GuidAutomaton(GUIDS)
+    expected = sorted([
+        (guid_a, "Root/Port", "Guid", "attribute"),
+        (guid_b, "Root/Port", "Refs", "attribute_substring"),
+        (guid_c, "Root/Port", "Refs", "attribute_substring"),
+        (guid_c, "Root/Port", "Id", "attribute_substring"),
+        (guid_b, "Root/Port", "#text", "text"),
+        (guid_c, "Root/Port", "#text", "text"),
+    ])
+    for match in (main.tree_match_xml_file, main.stream_match_xml_file):
+        assert sorted(map(match_key, match(str(path), frozenset(GUIDS), automaton)["matches"])) == expected
+    # 不开子串模式时只有整值匹配
+    assert [match_key(m) for m in main.tree_match_xml_file(str(path), frozenset(GUIDS))["matches"]] == expected[:1]
+
+
+def test_substring_stream_matching_equals_tree_matching(tmp_path, monkeypatch):
+    # 在随机样例的属性值和文本中内嵌GUID
+    monkeypatch.setitem(globals(), "ATTR_VALUES",
+                        ATTR_VALUES + [f"{GUIDS[0]};{GUIDS[6]}", f"{{{GUIDS[7]}}}", f"ID_{GUIDS[1]}"])
+    monkeypatch.setitem(globals(), "TEXTS", TEXTS + [f"ref {GUIDS[2]} and {GUIDS[7]}", f"x{GUIDS[3]}"])
+    samples = write_samples(tmp_path, seed=1)
+    guid_keys = frozenset(GUIDS)
+    automaton = main.GuidAutomaton(GUIDS)
+    substring_matches = 0
+    for path in samples:
+        tree = main.tree_match_xml_file(path, guid_keys, automaton)
+        stream = main.stream_match_xml_file(path, guid_keys, automaton)
+        assert stream["error"] is None
+        # 流式在节点结束时才处理尾随文本，只比较匹配集合
+        assert sorted(map(match_key, stream["matches"])) == sorted(map(match_key, tree["matches"]))
+        substring_matches += sum(m["match_type"] != "attribute" for m in tree["matches"])
+    assert substring_matches
@@ -0,0 +1,200 @@
+#  _*_ coding:utf-8 _*_
+"""
+常驻Python工具进程：Node服务启动一次，之后通过stdin/stdout按行收发JSON-RPC 2.0消息（每行一个JSON对象）。
+解释器、pandas等依赖只加载一次，解析过的工作簿保留在进程内的LRU缓存中（见workbook_cache.SheetMemoryCache），
+重复的任务不再为启动和读取工作簿付出秒级的时间。
+- 方法 match / xml_diff / membership / dedup 分别对应 main.py、compare_xml_by_folder2.py、
+  compare_csv_and_xlsx_messagename.py、get_port_message_name.py，params.args与各脚本的命令行参数相同，
+  params.cwd（可选）为本次调用的工作目录（相对的输出路径按它解析）
+- 调用期间脚本的print和ExcelToXMLChecker日志逐行作为progress通知发出；stdout只用于协议消息，tqdm进度条照常写到stderr
+- 另有 ping / cache_stats / cache_clear / shutdown；stdin关闭时退出
+请求：{"jsonrpc": "2.0", "id": 1, "method": "dedup", "params": {"args": ["--input", "a.xlsx"], "cwd": "D:/out"}}
+进度：{"jsonrpc": "2.0", "method": "progress", "params": {"id": 1, "message": "📄 「a.xlsx/BUS」：..."}}
+响应：{"jsonrpc": "2.0", "id": 1, "result": {"seconds": 0.21, "cache": {...}}}
+用法：
+    python tool_worker.py [--cache-max-mb 1024]
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import sys
+import time
+import traceback
+
+import compare_csv_and_xlsx_messagename as membership
+import compare_xml_by_folder2 as folder_diff
+import get_port_message_name as dedup
+import main as xml_main
+import workbook_cache
+
+TOOL_METHODS = {
+    "match": xml_main.main,
+    "xml_diff": folder_diff.main,
+    "membership": membership.main,
+    "dedup": dedup.main,
+}
+
+# JSON-RPC 2.0 错误码；-32000起为本工具自定义
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+TOOL_ERROR = -32000
+TOOL_EXIT = -32001
+
+
+class RpcError(Exception):
+
+    def __init__(self, code, message, data=None):
+        super().__init__(message)
+        self.code = code
+        self.data = data
+
+
+class ProgressStream(io.TextIOBase):
+    """替换调用期间的sys.stdout：按行缓冲，每个非空行发一条progress通知"""
+
+    def __init__(self, notify):
+        self.notify = notify
+        self._buffer = ""
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            if line.strip():
+                self.notify(line)
+        return len(text)
+
+    def flush(self):
+        if self._buffer.strip():
+            self.notify(self._buffer)
+        self._buffer = ""
+
+
+class ProgressLogHandler(logging.Handler):
+
+    def __init__(self, notify):
+        super().__init__(logging.INFO)
+        self.notify = notify
+
+    def emit(self, record):
+        self.notify(record.getMessage())
+
+
+class ToolWorker:
+
+    def __init__(self, out, cache_max_mb=1024):
+        self.out = out
+        self.cache = workbook_cache.SheetMemoryCache(cache_max_mb)
+        workbook_cache.set_memory_cache(self.cache)
+        self.running = True
+
+    def send(self, message):
+        self.out.write(json.dumps(message, ensure_ascii=False, default=str) + "\n")
+        self.out.flush()
+
+    def serve(self, lines):
+        for line in lines:
+            if not line.strip():
+                continue
+            response = self.handle_line(line)
+            if response is not None:
+                self.send(response)
+            if not self.running:
+                break
+
+    def handle_line(self, line):
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": PARSE_ERROR, "message": f"无效的JSON：{e}"}}
+        request_id = request.get("id") if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+                raise RpcError(INVALID_REQUEST, "请求必须是含method的JSON对象")
+            params = request.get("params") or {}
+            if not isinstance(params, dict):
+                raise RpcError(INVALID_PARAMS, "params必须是对象")
+            result = self.dispatch(request_id, request["method"], params)
+        except RpcError as e:
+            error = {"code": e.code, "message": str(e)}
+            if e.data is not None:
+                error["data"] = e.data
+            return {"jsonrpc": "2.0", "id": request_id, "error": error}
+        # 没有id的请求是通知，不回复
+        if "id" not in request:
+            return None
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    def dispatch(self, request_id, method, params):
+        if method == "ping":
+            return {"pid": os.getpid()}
+        if method == "cache_stats":
+            return self.cache.stats()
+        if method == "cache_clear":
+            self.cache.clear()
+            return self.cache.stats()
+        if method == "shutdown":
+            self.running = False
+            return {}
+        tool = TOOL_METHODS.get(method)
+        if tool is None:
+            raise RpcError(METHOD_NOT_FOUND, f"未知方法：{method}")
+        args = params.get("args", [])
+        if not isinstance(args, list) or not all(isinstance(arg, str) for arg in args):
+            raise RpcError(INVALID_PARAMS, "params.args必须是字符串数组")
+        return self.run_tool(request_id, tool, args, params.get("cwd"))
+
+    def run_tool(self, request_id, tool, args, cwd=None):
+        def notify(message):
+            self.send({"jsonrpc": "2.0", "method": "progress", "params": {"id": request_id, "message": message}})
+
+        stream = ProgressStream(notify)
+        log_handler = ProgressLogHandler(notify)
+        tool_logger = logging.getLogger("ExcelToXMLChecker")
+        previous_cwd = os.getcwd()
+        previous_stdout = sys.stdout
+        start = time.perf_counter()
+        try:
+            if cwd:
+                os.chdir(cwd)
+            sys.stdout = stream
+            tool_logger.addHandler(log_handler)
+            tool(args)
+        except SystemExit as e:
+            # argparse报错和脚本中的exit(1)
+            if e.code not in (None, 0):
+                raise RpcError(TOOL_EXIT, f"命令以退出码{e.code}结束", {"args": args}) from None
+        except Exception as e:
+            raise RpcError(TOOL_ERROR, str(e), {"traceback": traceback.format_exc()}) from None
+        finally:
+            stream.flush()
+            tool_logger.removeHandler(log_handler)
+            sys.stdout = previous_stdout
+            os.chdir(previous_cwd)
+        return {"seconds": round(time.perf_counter() - start, 4), "cache": self.cache.stats()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="常驻工具进程：stdin/stdout上的JSON-RPC 2.0")
+    parser.add_argument("--cache-max-mb", type=float, default=1024,
+                        help="进程内工作簿缓存的内存上限（MB，默认：1024）")
+    args = parser.parse_args()
+
+    # 协议消息固定UTF-8、逐行刷新；脚本的print在调用期间转为progress通知，其余时间写到stderr
+    out = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8", line_buffering=True)
+    sys.stdout = sys.stderr
+    stdin = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8")
+    # 脚本中的exit()会关闭sys.stdin，协议输入不能与其共用
+    sys.stdin = io.StringIO()
+    ToolWorker(out, args.cache_max_mb).serve(stdin)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#  _*_ coding:utf-8 _*_
+"""
+MoICD/EoICD 工作簿共享加载器：
+首次读取某个工作表时，把整张表转存为列式旁路文件（有pyarrow时用Parquet，否则用pickle），
+按 路径 + 修改时间 + 文件大小 + 工作表名 定位；之后的调用直接读旁路文件，且只加载需要的列。
+缓存未命中时优先用更快的只读引擎（python-calamine），没有则退回openpyxl。
+常驻进程（tool_worker.py）可再通过set_memory_cache启用进程内的LRU缓存，重复请求直接复用已解析的DataFrame。
+
+命令行对比冷/热加载耗时：
+    python workbook_cache.py MoICD.xlsx --sheet BUS --columns Guid PhysicalPort
+"""
+import argparse
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  Parquet旁路文件需要
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+
+try:
+    import python_calamine  # noqa: F401  pandas>=2.2 的 engine="calamine"
+    FAST_ENGINE = "calamine"
+except ImportError:
+    FAST_ENGINE = "openpyxl"
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "WORKBOOK_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".workbook_cache")
+)
+
+
+def _cache_prefix(xlsx_path, sheet_name):
+    key = f"{os.path.abspath(xlsx_path)}|{sheet_name}".encode("utf-8")
+    return hashlib.sha1(key).hexdigest()[:16]
+
+
+def sidecar_paths(xlsx_path, sheet_name, cache_dir=DEFAULT_CACHE_DIR):
+    """返回当前版本工作簿对应的 (parquet旁路文件, pickle旁路文件)"""
+    stat = os.stat(xlsx_path)
+    name = f"{_cache_prefix(xlsx_path, sheet_name)}-{stat.st_mtime_ns}-{stat.st_size}"
+    return os.path.join(cache_dir, name + ".parquet"), os.path.join(cache_dir, name + ".pkl")
+
+
+def _remove_stale_sidecars(cache_dir, prefix, keep):
+    for file_name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, file_name)
+        if file_name.startswith(prefix + "-") and path not in keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _select_columns(df, columns):
+    # 只返回存在的列，缺列由调用方按各自的提示处理
+    if columns is None:
+        return df
+    return df[[col for col in columns if col in df.columns]]
+
+
+def _read_parquet_columns(parquet_path, columns):
+    """Parquet按列存储，只读取需要的列"""
+    if columns is not None:
+        import pyarrow.parquet as pq
+        available = set(pq.read_schema(parquet_path).names)
+        columns = [col for col in columns if col in available]
+    return pd.read_parquet(parquet_path, columns=columns)
+
+
+def _write_sidecar(df, parquet_path, pickle_path):
+    """优先写Parquet；混合类型列等Parquet不支持的情况退回pickle"""
+    tmp_suffix = f".{os.getpid()}.tmp"
+    if HAS_PARQUET:
+        try:
+            df.to_parquet(parquet_path + tmp_suffix, index=False)
+            os.replace(parquet_path + tmp_suffix, parquet_path)
+            return parquet_path
+        except Exception:
+            if os.path.exists(parquet_path + tmp_suffix):
+                os.remove(parquet_path + tmp_suffix)
+    df.to_pickle(pickle_path + tmp_suffix)
+    os.replace(pickle_path + tmp_suffix, pickle_path)
+    return pickle_path
+
+
+class SheetMemoryCache:
+    """
+    进程内的整表LRU缓存，按 路径 + 修改时间 + 文件大小 + 工作表名 定位，按DataFrame的内存占用限制总大小；
+    工作簿更新后旧版本的条目在放入新版本时一并移除
+    """
+
+    def __init__(self, max_mb=1024):
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._entries = OrderedDict()  # key -> (DataFrame, 字节数)
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, df):
+        for stale in [k for k in self._entries if k[:2] == key[:2]]:
+            self._remove(stale)
+        nbytes = int(df.memory_usage(index=True, deep=True).sum())
+        if nbytes > self.max_bytes:
+            return  # 单表超过上限时不缓存
+        self._entries[key] = (df, nbytes)
+        self.total_bytes += nbytes
+        while self.total_bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        _, nbytes = self._entries.pop(key)
+        self.total_bytes -= nbytes
+
+    def clear(self):
+        self._entries.clear()
+        self.total_bytes = 0
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "mb": round(self.total_bytes / 1024 / 1024, 2),
+            "max_mb": round(self.max_bytes / 1024 / 1024, 2),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+_memory_cache = None
+
+
+def set_memory_cache(cache):
+    """启用（传入SheetMemoryCache）或关闭（传入None）进程内缓存"""
+    global _memory_cache
+    _memory_cache = cache
+
+
+def load_sheet(xlsx_path, sheet_name="BUS", columns=None, use_cache=True, cache_dir=DEFAULT_CACHE_DIR, report=print):
+    """
+    读取工作表为DataFrame，columns为None时返回全部列，否则只返回其中存在的列
+    report: 接收一行说明文字的函数（print / logger.info），None表示不输出
+    use_cache为False时旁路文件和进程内缓存都不使用
+    """
+    if not use_cache or _memory_cache is None:
+        return _load_sheet_files(xlsx_path, sheet_name, columns, use_cache, cache_dir, report)
+
+    start = time.perf_counter()
+    stat = os.stat(xlsx_path)
+    key = (os.path.abspath(xlsx_path), sheet_name, stat.st_mtime_ns, stat.st_size)
+    df = _memory_cache.get(key)
+    if df is None:
+        df = _load_sheet_files(xlsx_path, sheet_name, None, use_cache, cache_dir, report)
+        _memory_cache.put(key, df)
+    elif report:
+        report(f"工作簿缓存命中「{os.path.basename(xlsx_path)}/{sheet_name}」（内存）："
+               f"{len(df)}行×{len(df.columns)}列，耗时{time.perf_counter() - start:.3f}秒")
+    # 返回副本，调用方修改（如写回匹配结果）不影响缓存中的表
+    return _select_columns(df, columns).copy()
+
+
+def _load_sheet_files(xlsx_path, sheet_name, columns, use_cache, cache_dir, report):
+    start = time.perf_counter()
+    if use_cache:
+        parquet_path, pickle_path = sidecar_paths(xlsx_path, sheet_name, cache_dir)
+        if HAS_PARQUET and os.path.exists(parquet_path):
+            df = _read_parquet_columns(parquet_path, columns)
+            source = "Parquet缓存"
+        elif os.path.exists(pickle_path):
+            df = _select_columns(pd.read_pickle(pickle_path), columns)
+            source = "pickle缓存"
+        else:
+            df = None
+        if df is not None:
+            if report:
+                report(f"工作簿缓存命中「{os.path.basename(xlsx_path)}/{sheet_name}」（{source}）："
+                       f"{len(df)}行×{len(df.columns)}列，耗时{time.perf_counter() - start:.2f}秒")
+            return df
+
+    df = pd.read_excel(xlsx_path, sheet_name=sheet_name, engine=FAST_ENGINE)
+    read_seconds = time.perf_counter() - start
+    if use_cache:
+        os.makedirs(cache_dir, exist_ok=True)
+        written = _write_sidecar(df, parquet_path, pickle_path)
+        _remove_stale_sidecars(cache_dir, _cache_prefix(xlsx_path, sheet_name), {written})
+    if report:
+        report(f"工作簿缓存未命中「{os.path.basename(xlsx_path)}/{sheet_name}」（引擎：{FAST_ENGINE}）："
+               f"读取{read_seconds:.2f}秒，含写缓存共{time.perf_counter() - start:.2f}秒")
+    return _select_columns(df, columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="工作簿列式缓存：对比冷/热加载耗时")
+    parser.add_argument("xlsx", help="工作簿路径")
+    parser.add_argument("--sheet", default="BUS", help="工作表名（默认：BUS）")
+    parser.add_argument("--columns", nargs="*", help="只加载这些列（默认全部）")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="旁路文件目录")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    pd.read_excel(args.xlsx, sheet_name=args.sheet, engine="openpyxl")
+    openpyxl_seconds = time.perf_counter() - start
+
+    # 删除当前版本的旁路文件，保证第一次是冷加载
+    for path in sidecar_paths(args.xlsx, args.sheet, args.cache_dir):
+        if os.path.exists(path):
+            os.remove(path)
+    start = time.perf_counter()
+    load_sheet(args.xlsx, args.sheet, args.columns, cache_dir=args.cache_dir)
+    cold_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    load_sheet(args.xlsx, args.sheet, args.columns, cache_dir=args.cache_dir)
+    warm_seconds = time.perf_counter() - start
+
+    print(f"openpyxl直接读取：{openpyxl_seconds:.2f}秒")
+    print(f"冷加载（{FAST_ENGINE} + 写缓存）：{cold_seconds:.2f}秒")
+    print(f"热加载（读缓存）：{warm_seconds:.3f}秒，较openpyxl快{openpyxl_seconds / max(warm_seconds, 1e-9):.0f}倍")
+
+
+if __name__ == "__main__":
+    main()